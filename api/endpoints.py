@@ -0,0 +1,386 @@
+"""
+API Urban Data Explorer
+-----------------------
+Service HTTP en lecture seule au-dessus des tables SILVER / GOLD.
+
+- Les tables sont chargées une seule fois au démarrage et indexées en
+  mémoire ; les requêtes zone / rayon passent par l'index spatial
+  (``pipeline.spatial_index``).
+- Si le pipeline a publié les tables (``pipeline.serving``), tous les
+  workers projettent les mêmes fichiers Arrow sans copie, et passent à
+  une nouvelle version publiée entre deux requêtes (vérification au plus
+  toutes les ``API_RELOAD_INTERVAL`` secondes) ; sinon chaque worker lit
+  SILVER / GOLD (``pipeline.silver_store.read_silver``).
+- Les réponses sont mises en cache (LRU) sur les paramètres normalisés :
+  deux requêtes équivalentes (ordre des paramètres, valeurs par défaut)
+  partagent la même entrée.
+- Chaque réponse porte un ETag ; ``If-None-Match`` renvoie 304 sans corps.
+
+Lancement (depuis la racine du dépôt) :
+
+    uvicorn api.endpoints:app --port 8000 --workers 4
+
+Variables d'environnement : ``DATA_DIR`` (défaut ``data/``),
+``SILVER_FORMAT`` (``csv`` ou ``parquet``), ``API_CACHE_SIZE``,
+``API_RELOAD_INTERVAL`` (défaut 1 s).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from pipeline.gold.aggregate_cube import CUBE_DIMS
+from pipeline.gold.tiles import Z_MAX, Z_MIN
+from pipeline.instrument import log
+from pipeline.serving import current_version, load_source_tables, open_version
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MAX_LIMIT = 1000
+MAX_RADIUS_M = 5000
+
+
+# ---------- Données en mémoire ----------
+def _records(df: pd.DataFrame) -> list[dict]:
+    """DataFrame → liste de dicts sérialisables (NA → None, dates ISO,
+    float32 à leur plus courte écriture décimale, colonnes Arrow comprises)."""
+    df = df.copy()
+    for c in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = df[c].dt.strftime("%Y-%m-%d")
+        elif getattr(df[c].dtype, "numpy_dtype", df[c].dtype) == "float32":
+            df[c] = df[c].astype("float32").astype(str).astype("float64")
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _group_positions(df: pd.DataFrame, keys: list[str]) -> dict[tuple, np.ndarray]:
+    """Clés entières → positions croissantes des lignes (lignes à clé manquante ignorées).
+
+    Tri lexicographique stable des clés puis découpage aux changements de
+    clé : plus rapide que ``groupby().indices`` avec beaucoup de groupes
+    (tuiles), et sans conversion élément par élément des colonnes Arrow.
+    """
+    cols = [df[k].to_numpy("float64", na_value=np.nan) for k in keys]
+    pos = np.flatnonzero(~np.any([np.isnan(c) for c in cols], axis=0)) if len(df) else np.empty(0, np.intp)
+    if not len(pos):
+        return {}
+    cols = [c[pos].astype("int64") for c in cols]
+    order = np.lexsort(cols[::-1])
+    pos, cols = pos[order], [c[order] for c in cols]
+    starts = np.flatnonzero(np.r_[True, np.any([np.diff(c) != 0 for c in cols], axis=0)])
+    ends = np.r_[starts[1:], len(pos)]
+    return {k: pos[s:e] for k, s, e in zip(zip(*(c[starts].tolist() for c in cols)), starts, ends)}
+
+
+class DataStore:
+    """Tables SILVER/GOLD chargées une fois, avec leurs index de requête.
+
+    Si le pipeline a publié une version (``pipeline.serving``), ses tables
+    sont projetées en mémoire sans copie ; sinon elles sont lues dans
+    SILVER / GOLD.
+    """
+
+    def __init__(self, data_dir: str | Path, fmt: str = "csv"):
+        data_dir = Path(data_dir)
+        published = current_version(data_dir)
+        if published is not None:
+            tables, self.tx_spatial = open_version(data_dir, published)
+            log("API", f"version {published} projetée : "
+                  + ", ".join(f"{k} {len(t):,}" for k, t in tables.items() if t is not None))
+            self.version = published
+        else:
+            tables, self.tx_spatial = load_source_tables(data_dir, fmt)
+            sizes = [len(t) if t is not None else 0 for t in tables.values()]
+            self.version = hashlib.sha1(f"{data_dir}:{fmt}:{sizes}:{os.getpid()}".encode()).hexdigest()[:12]
+        self.cube = tables["cube"]
+        self.profil = tables["profil"]
+        self.ls_arr_annee = tables["ls_arr_annee"]
+
+        # Tuiles de la carte : (annee, z, x, y) → positions des clusters
+        self.tiles = tables["tiles"]
+        self.tile_index: dict[tuple, np.ndarray] = {}
+        self.tile_years: list[int] = []
+        if self.tiles is not None:
+            self.tile_index = _group_positions(self.tiles, ["annee", "z", "x", "y"])
+            self.tile_years = sorted(int(a) for a in self.tiles["annee"].dropna().unique())
+
+        # Cube : une sous-table par niveau de regroupement
+        self.cube_levels: dict[str, pd.DataFrame] = {}
+        if self.cube is not None:
+            self.cube_levels = {lvl: g.reset_index(drop=True) for lvl, g in self.cube.groupby("niveau")}
+
+        # Transactions : triées par date décroissante (prepare_transactions),
+        # index (annee, arrondissement) → positions
+        self.transactions = tx = tables["transactions"]
+        self.tx_index: dict[tuple, np.ndarray] = {}
+        if tx is not None:
+            self.tx_index = _group_positions(tx, ["annee", "arrondissement"])
+
+    def transaction_positions(self, annee: int | None, arrondissement: int | None) -> np.ndarray:
+        keys = [
+            k for k in self.tx_index
+            if (annee is None or k[0] == annee) and (arrondissement is None or k[1] == arrondissement)
+        ]
+        if not keys:
+            return np.empty(0, dtype=np.intp)
+        if len(keys) == 1:
+            return self.tx_index[keys[0]]
+        return np.sort(np.concatenate([self.tx_index[k] for k in keys]))
+
+
+# ---------- Cache de réponses ----------
+class ResponseCache:
+    """LRU thread-safe : clé normalisée → (corps JSON, ETag)."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get_or_build(self, key, build) -> tuple[bytes, str]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+        body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode()
+        value = (body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+        with self._lock:
+            self.misses += 1
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _normalize(params: dict) -> tuple:
+    return tuple(sorted((k, v) for k, v in params.items() if v is not None))
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Vrai si l'en-tête ``If-None-Match`` (liste d'ETags séparés par des
+    virgules, ou ``*``) désigne `etag` ; comparaison faible (``W/`` ignoré)."""
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in (t.removeprefix("W/") for t in tags)
+
+
+# ---------- Application ----------
+def create_app(data_dir: str | Path | None = None, fmt: str | None = None) -> FastAPI:
+    data_dir = data_dir or os.environ.get("DATA_DIR", ROOT / "data")
+    fmt = fmt or os.environ.get("SILVER_FORMAT", "csv")
+    cache = ResponseCache(int(os.environ.get("API_CACHE_SIZE", 4096)))
+    reload_interval = float(os.environ.get("API_RELOAD_INTERVAL", 1.0))
+    reload_lock = threading.Lock()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.store = DataStore(data_dir, fmt)
+        app.state.checked = time.monotonic()
+        cache.clear()
+        yield
+
+    app = FastAPI(title="Urban Data Explorer API", lifespan=lifespan)
+    app.state.cache = cache
+
+    def reload_if_published(app: FastAPI) -> DataStore:
+        """Passe à la version publiée courante si elle a changé (un seul thread recharge)."""
+        with reload_lock:
+            app.state.checked = time.monotonic()
+            published = current_version(data_dir)
+            if published is not None and published != app.state.store.version:
+                app.state.store = DataStore(data_dir, fmt)
+                cache.clear()
+        return app.state.store
+
+    @app.middleware("http")
+    async def snapshot_store(request: Request, call_next):
+        # Une requête voit une seule version du début à la fin, même si une autre arrive entre-temps
+        store = request.app.state.store
+        if time.monotonic() - request.app.state.checked >= reload_interval:
+            store = await run_in_threadpool(reload_if_published, request.app)
+        request.state.store = store
+        return await call_next(request)
+
+    def respond(request: Request, endpoint: str, params: dict, build) -> Response:
+        store: DataStore = request.state.store
+        body, etag = cache.get_or_build((store.version, endpoint, _normalize(params)), build)
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def require(table, name: str):
+        if table is None:
+            raise HTTPException(503, f"Table {name} non disponible")
+        return table
+
+    @app.get("/health")
+    def health(request: Request):
+        store: DataStore = request.state.store
+        return {
+            "status": "ok",
+            "version": store.version,
+            "transactions": 0 if store.transactions is None else len(store.transactions),
+            "cache": {"hits": cache.hits, "misses": cache.misses},
+        }
+
+    @app.get("/prix-m2")
+    def prix_m2(request: Request,
+                arrondissement: int | None = Query(None, ge=1, le=20),
+                annee: int | None = None,
+                type_local: str | None = None,
+                typologie: str | None = None,
+                par: str | None = Query(None, description="dimension de ventilation")):
+        """Statistiques de prix/m² lues dans le cube GOLD (sans parcours des transactions)."""
+        filters = {"arrondissement": arrondissement, "annee": annee,
+                   "type_local": type_local, "typologie": typologie}
+        if par is not None and (par not in CUBE_DIMS or filters[par] is not None):
+            raise HTTPException(422, f"par doit être une dimension libre parmi {CUBE_DIMS}")
+
+        def build():
+            store: DataStore = request.state.store
+            require(store.cube, "dvf_prix_m2_cube")
+            dims = [d for d in CUBE_DIMS if filters[d] is not None or d == par]
+            level = store.cube_levels.get(",".join(dims) or "total")
+            if level is None:
+                return []
+            mask = np.ones(len(level), dtype=bool)
+            for d in dims:
+                if filters[d] is not None:
+                    mask &= (level[d] == filters[d]).fillna(False).to_numpy(dtype=bool)
+            return _records(level[mask].drop(columns="niveau"))
+
+        return respond(request, "prix-m2", {**filters, "par": par}, build)
+
+    @app.get("/arrondissements")
+    def arrondissements(request: Request):
+        def build():
+            return _records(require(request.state.store.profil, "arrondissement_profil"))
+        return respond(request, "arrondissements", {}, build)
+
+    @app.get("/arrondissements/{arrondissement}")
+    def arrondissement_detail(request: Request, arrondissement: int):
+        if not 1 <= arrondissement <= 20:
+            raise HTTPException(404, "Arrondissement inconnu")
+
+        def build():
+            profil = require(request.state.store.profil, "arrondissement_profil")
+            rows = _records(profil[profil["arrondissement"] == arrondissement])
+            if not rows:
+                raise HTTPException(404, f"Pas de profil pour l'arrondissement {arrondissement}")
+            return rows[0]
+        return respond(request, "arrondissement", {"arrondissement": arrondissement}, build)
+
+    @app.get("/logements-sociaux")
+    def logements_sociaux(request: Request,
+                          arrondissement: int | None = Query(None, ge=1, le=20),
+                          annee: int | None = None):
+        def build():
+            df = require(request.state.store.ls_arr_annee, "logements_sociaux_arr_annee")
+            if arrondissement is not None:
+                df = df[df["arrondissement"] == arrondissement]
+            if annee is not None:
+                df = df[df["annee"] == annee]
+            return _records(df)
+        return respond(request, "logements-sociaux",
+                       {"arrondissement": arrondissement, "annee": annee}, build)
+
+    @app.get("/transactions")
+    def transactions(request: Request,
+                     arrondissement: int | None = Query(None, ge=1, le=20),
+                     annee: int | None = None,
+                     type_local: str | None = None,
+                     limit: int = Query(100, ge=1, le=MAX_LIMIT),
+                     offset: int = Query(0, ge=0)):
+        """Transactions (les plus récentes d'abord), via l'index (annee, arrondissement)."""
+        def build():
+            store: DataStore = request.state.store
+            tx = require(store.transactions, "transactions_residentiel")
+            pos = store.transaction_positions(annee, arrondissement)
+            if type_local is not None:
+                pos = pos[(tx["type_local"].to_numpy()[pos] == type_local)]
+            page = tx.iloc[pos[offset:offset + limit]]
+            return {"total": int(len(pos)), "limit": limit, "offset": offset, "items": _records(page)}
+
+        return respond(request, "transactions", {
+            "arrondissement": arrondissement, "annee": annee, "type_local": type_local,
+            "limit": limit, "offset": offset,
+        }, build)
+
+    @app.get("/tuiles/{z}/{x}/{y}")
+    def tuile(request: Request, z: int, x: int, y: int, annee: int | None = None):
+        """Clusters d'une tuile de la carte (année la plus récente par défaut)."""
+        if not Z_MIN <= z <= Z_MAX:
+            raise HTTPException(404, f"Zoom disponible : {Z_MIN} à {Z_MAX}")
+
+        def build():
+            store: DataStore = request.state.store
+            tiles = require(store.tiles, "dvf_tuiles")
+            year = annee if annee is not None else (store.tile_years[-1] if store.tile_years else None)
+            pos = store.tile_index.get((year, z, x, y), np.empty(0, dtype=np.intp))
+            clusters = tiles.iloc[pos][["nb_ventes", "prix_m2_median", "longitude", "latitude"]]
+            return {"annee": year, "z": z, "x": x, "y": y, "clusters": _records(clusters)}
+
+        return respond(request, "tuile", {"z": z, "x": x, "y": y, "annee": annee}, build)
+
+    @app.get("/transactions/zone")
+    def transactions_zone(request: Request,
+                          bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+                          limit: int = Query(100, ge=1, le=MAX_LIMIT),
+                          offset: int = Query(0, ge=0)):
+        """Transactions dans la zone affichée (les plus récentes d'abord)."""
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+        except ValueError:
+            raise HTTPException(422, "bbox attendu : min_lon,min_lat,max_lon,max_lat")
+
+        def build():
+            store: DataStore = request.state.store
+            tx = require(store.transactions, "transactions_residentiel")
+            pos = store.tx_spatial.bbox(min_lon, min_lat, max_lon, max_lat)
+            page = tx.iloc[pos[offset:offset + limit]]
+            return {"total": int(len(pos)), "limit": limit, "offset": offset, "items": _records(page)}
+
+        return respond(request, "transactions-zone", {
+            "bbox": (min_lon, min_lat, max_lon, max_lat), "limit": limit, "offset": offset,
+        }, build)
+
+    @app.get("/transactions/rayon")
+    def transactions_rayon(request: Request,
+                           lon: float = Query(..., ge=-180, le=180),
+                           lat: float = Query(..., ge=-90, le=90),
+                           r: float = Query(500, gt=0, le=MAX_RADIUS_M, description="rayon en mètres"),
+                           limit: int = Query(100, ge=1, le=MAX_LIMIT),
+                           offset: int = Query(0, ge=0)):
+        """Transactions à moins de `r` mètres du point, de la plus proche à la plus lointaine."""
+        def build():
+            store: DataStore = request.state.store
+            tx = require(store.transactions, "transactions_residentiel")
+            pos, dist = store.tx_spatial.radius(lon, lat, r)
+            window = slice(offset, offset + limit)
+            page = tx.iloc[pos[window]].assign(distance_m=dist[window].round(1))
+            return {"total": int(len(pos)), "limit": limit, "offset": offset, "items": _records(page)}
+
+        return respond(request, "transactions-rayon", {
+            "lon": lon, "lat": lat, "r": r, "limit": limit, "offset": offset,
+        }, build)
+
+    return app
+
+
+app = create_app()
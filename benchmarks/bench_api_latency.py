@@ -0,0 +1,110 @@
+"""
+Benchmark : latence de l'API (api/endpoints.py)
+-----------------------------------------------
+Génère des tables SILVER/GOLD synthétiques dans un dossier temporaire,
+démarre l'application en mémoire (TestClient, sans réseau) et mesure
+p50 / p99 et débit pour un mélange de requêtes :
+
+- premier passage (cache vide : filtre + sérialisation) ;
+- passages suivants (réponse servie par le cache LRU) ;
+- revalidation ``If-None-Match`` (304 sans corps).
+
+    python -m benchmarks.bench_api_latency --rows 200000 --requests 2000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from api.endpoints import create_app
+from pipeline.gold.aggregate_cube import build_gold
+from pipeline.silver_store import write_silver
+
+
+def synthetic_transactions(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    arr = rng.integers(1, 21, n)
+    date = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365, n), unit="D")
+    surface = rng.uniform(15, 200, n).round(0)
+    return pd.DataFrame({
+        "id_mutation": [f"m{i}" for i in range(n)],
+        "date_mutation": date,
+        "annee": date.year,
+        "arrondissement": arr,
+        "code_postal": [f"750{a:02d}" for a in arr],
+        "nature_mutation": "Vente",
+        "type_local": np.where(rng.random(n) < 0.85, "Appartement", "Maison"),
+        "surface_reelle_bati": surface,
+        "nombre_pieces_principales": rng.integers(1, 7, n).astype(float),
+        "valeur_fonciere": (surface * rng.uniform(6000, 14000, n)).round(0),
+        "longitude": rng.uniform(2.25, 2.42, n),
+        "latitude": rng.uniform(48.81, 48.90, n),
+    })
+
+
+def query_mix(k: int, seed: int = 0) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(k):
+        arr, annee = rng.randint(1, 20), rng.randint(2020, 2023)
+        queries.append(rng.choice([
+            ("/prix-m2", {"arrondissement": arr, "par": "annee"}),
+            ("/prix-m2", {"annee": annee, "type_local": "Appartement", "par": "typologie"}),
+            ("/arrondissements/%d" % arr, {}),
+            ("/transactions", {"arrondissement": arr, "annee": annee, "limit": 50}),
+        ]))
+    return queries
+
+
+def _run(client, queries, headers=None):
+    lat = []
+    t0 = time.perf_counter()
+    for path, params in queries:
+        t = time.perf_counter()
+        r = client.get(path, params=params, headers=(headers or {}).get((path, tuple(params.items()))))
+        lat.append(time.perf_counter() - t)
+        assert r.status_code in (200, 304), (path, params, r.status_code)
+    total = time.perf_counter() - t0
+    lat = np.array(lat) * 1000
+    return np.percentile(lat, 50), np.percentile(lat, 99), len(queries) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        tx = write_silver(synthetic_transactions(args.rows), tmp / "silver" / "transactions_residentiel.csv",
+                          "transactions_residentiel")
+        build_gold({"dvf": tx}, tmp / "gold", "csv")
+
+        t0 = time.perf_counter()
+        with TestClient(create_app(tmp, "csv")) as client:
+            print(f"{args.rows:,} transactions — démarrage (chargement + index) : "
+                  f"{(time.perf_counter() - t0) * 1000:.0f} ms")
+            queries = query_mix(args.requests)
+            distinct = list(dict.fromkeys((p, tuple(q.items())) for p, q in queries))
+            cold = _run(client, [(p, dict(q)) for p, q in distinct])
+            warm = _run(client, queries)
+            etags = {
+                (p, q): {"If-None-Match": client.get(p, params=dict(q)).headers["etag"]}
+                for p, q in distinct
+            }
+            revalidate = _run(client, queries, headers=etags)
+
+    print(f"{'':14}{'p50 (ms)':>10}{'p99 (ms)':>10}{'req/s':>10}")
+    for name, (p50, p99, rps) in [("cache vide", cold), ("cache chaud", warm), ("304", revalidate)]:
+        print(f"{name:14}{p50:10.2f}{p99:10.2f}{rps:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark : nettoyage delta (CDC) entre deux BRONZE
+---------------------------------------------------
+Pour chaque jeu à clé métier (PAVDA, logements sociaux, espaces verts) :
+nettoie un BRONZE synthétique, le modifie (--changes lignes mises à jour,
+supprimées et insérées), puis mesure :
+
+- le nettoyage delta (``pipeline.clean.cdc``) sur la table existante ;
+- le nettoyage complet du nouveau BRONZE (``delta=False``) ;
+- une seconde exécution delta sans changement.
+
+Vérifie que les tables delta et complète sont identiques.
+
+    python -m benchmarks.bench_cdc --rows 1000000 --changes 100
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import GENERATORS, write_bronze
+from pipeline.clean.cdc import read_changelog
+from pipeline.clean.clean_data_to_silver_espaces_verts import clean_espaces_verts
+from pipeline.clean.dechet_alimentaires_to_silver import clean_dechets_silver
+from pipeline.clean.logements_sociaux_to_silver import clean_logements_sociaux
+from pipeline.silver_store import read_silver
+
+# jeu → (nettoyeur, table SILVER, clé BRONZE, colonne BRONZE modifiée)
+CASES = {
+    "dechets_alimentaires": (clean_dechets_silver, "abribac_dechets_alimentaires", "pavda_idt", "arrdt"),
+    "logements_sociaux": (clean_logements_sociaux, "logements_sociaux_programmes",
+                          "Identifiant livraison", "Bailleur social"),
+    "espaces_verts": (clean_espaces_verts, "espaces_verts", "nsq_espace_vert", "nom_ev"),
+}
+
+
+def mutate(src: Path, sep: str, key: str, column: str, changes: int, seed: int = 1) -> None:
+    """Modifie `changes` lignes, en supprime autant et en insère autant (nouvelles clés)."""
+    df = pd.read_csv(src, sep=sep, dtype=str)
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(df), 2 * changes, replace=False)
+    updated, deleted = picked[:changes], picked[changes:]
+    df.loc[updated, column] = df.loc[updated, column].fillna("") + " bis"
+    inserted = df.sample(changes, random_state=seed).assign(**{key: [f"NEW{i}" for i in range(changes)]})
+    pd.concat([df.drop(index=deleted), inserted]).to_csv(src, sep=sep, index=False)
+
+
+def timed(fn, *args, **kwargs) -> float:
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--changes", type=int, default=50)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--datasets", nargs="+", choices=list(CASES), default=list(CASES))
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} lignes, {args.changes} mises à jour / suppressions / insertions")
+    print(f"  {'':22}{'delta (s)':>10}{'complet (s)':>12}{'sans chgt (s)':>14}  journal")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for name in args.datasets:
+            cleaner, table, key, column = CASES[name]
+            src = write_bronze(name, args.rows, tmp / f"{name}.csv")
+            dst, ref = tmp / f"silver_{name}.{args.format}", tmp / f"silver_{name}_complet.{args.format}"
+            timed(cleaner, src, dst)
+            mutate(src, GENERATORS[name][1], key, column, args.changes)
+            t_delta = timed(cleaner, src, dst)
+            t_full = timed(cleaner, src, ref, delta=False)
+            pd.testing.assert_frame_equal(read_silver(dst, table), read_silver(ref, table))
+            t_noop = timed(cleaner, src, dst)
+            log = read_changelog(dst)[-2]
+            print(f"  {name:<22}{t_delta:10.2f}{t_full:12.2f}{t_noop:14.2f}  "
+                  f"+{len(log['inserted'])} ~{len(log['updated'])} -{len(log['deleted'])}, "
+                  f"{len(log['arrondissements'])} arrondissements")
+
+
+if __name__ == "__main__":
+    main()
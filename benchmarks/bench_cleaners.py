@@ -0,0 +1,148 @@
+"""
+Benchmark : débit des nettoyeurs BRONZE → SILVER
+------------------------------------------------
+Pour chaque nettoyeur de ``CLEANERS`` (main.py) et chaque taille demandée :
+génère le BRONZE synthétique (``benchmarks.synthetic``, gardé en cache
+dans --workdir), lance le nettoyeur dans un processus neuf et relève la
+durée, le débit (lignes BRONZE/s), le pic de mémoire résidente du
+processus et le nombre de lignes SILVER produites.
+
+Les mesures sont écrites en JSON (--out). Avec --baseline, chaque mesure
+est comparée à celle du fichier de référence (même jeu, taille et format) ;
+une durée supérieure de plus de --tolerance fait sortir en erreur.
+
+    python -m benchmarks.bench_cleaners --rows 10000 100000 1000000
+    python -m benchmarks.bench_cleaners --rows 100000 --baseline bench_cleaners.json
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import GENERATORS, write_bronze
+from pipeline.instrument import peak_rss_mb
+from pipeline.silver_store import is_parquet
+
+
+def _count_rows(path: Path) -> int:
+    if is_parquet(path):
+        import pyarrow.dataset as ds
+        return ds.dataset(path, format="parquet", partitioning="hive").count_rows()
+    return len(pd.read_csv(path, usecols=[0]))
+
+
+def _run_cleaner(dataset: str, src: str, dst: str) -> dict:
+    """Exécuté dans un processus neuf : pic RSS propre à ce nettoyeur."""
+    from main import CLEANERS, load_cleaner
+
+    target, _, _, kwargs = CLEANERS[dataset]
+    cleaner = load_cleaner(target)
+    if "delta" in inspect.signature(cleaner).parameters:
+        kwargs = {**kwargs, "delta": False}  # nettoyage complet à chaque mesure
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaner(src, dst, **kwargs)
+    wall = time.perf_counter() - t0
+    peak = peak_rss_mb()
+    return {"wall_s": wall, "peak_rss_mb": peak, "rows_out": _count_rows(Path(dst))}
+
+
+def measure(dataset: str, rows: int, workdir: Path, fmt: str, seed: int, repeat: int) -> dict:
+    src = workdir / "bronze" / f"{dataset}-{rows}-{seed}.csv"
+    if not src.exists():
+        write_bronze(dataset, rows, src, seed)
+    dst = workdir / "silver" / f"{dataset}.{fmt}"
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            runs.append(pool.submit(_run_cleaner, dataset, str(src), str(dst)).result())
+    best = min(runs, key=lambda r: r["wall_s"])
+    return {
+        "dataset": dataset, "rows": rows, "format": fmt,
+        "wall_s": round(best["wall_s"], 4),
+        "rows_per_s": round(rows / best["wall_s"]),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+        "rows_out": best["rows_out"],
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Mesures plus lentes que la référence au-delà de `tolerance` (fraction)."""
+    ref = {(r["dataset"], r["rows"], r["format"]): r for r in baseline["results"]}
+    slower = []
+    for r in results:
+        b = ref.get((r["dataset"], r["rows"], r["format"]))
+        if b and r["wall_s"] > b["wall_s"] * (1 + tolerance):
+            slower.append(f"{r['dataset']} ({r['rows']:,} lignes, {r['format']}): "
+                          f"{b['wall_s']:.2f} s → {r['wall_s']:.2f} s")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--datasets", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="meilleure durée sur N exécutions")
+    parser.add_argument("--workdir", type=Path, default=Path("data/bench"))
+    parser.add_argument("--out", type=Path, default=Path("bench_cleaners.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        for dataset in args.datasets:
+            r = measure(dataset, rows, args.workdir, args.format, args.seed, args.repeat)
+            results.append(r)
+            print(f"  {dataset:<22} {rows:>11,} lignes  {r['wall_s']:8.2f} s  "
+                  f"{r['rows_per_s']:>11,} lignes/s  {r['peak_rss_mb']:8.1f} Mo  → {r['rows_out']:,}")
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    args.out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Résultats → {args.out}")
+
+    if args.baseline:
+        slower = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in slower:
+            print(f"  RÉGRESSION {line}")
+        sys.exit(1 if slower else 0)
+
+
+if __name__ == "__main__":
+    main()
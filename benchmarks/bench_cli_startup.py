@@ -0,0 +1,74 @@
+"""
+Benchmark : démarrage de la CLI du pipeline (main.py)
+-----------------------------------------------------
+Lance ``python main.py <commande> --dry-run`` dans un processus neuf
+(--repeat fois, meilleur temps retenu) pour plusieurs sélections de jeux,
+et relève avec ``-X importtime`` les modules les plus coûteux importés
+par chacune. Vérifie que ``clean`` / ``collect`` n'importent ni pandas ni
+les modules des nettoyeurs.
+
+    python -m benchmarks.bench_cli_startup --repeat 5
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = [
+    ("clean espaces_verts", ["clean", "espaces_verts"]),
+    ("collect", ["collect"]),
+    ("clean", ["clean"]),
+    ("run espaces_verts", ["run", "espaces_verts"]),
+    ("run", ["run"]),
+]
+# Modules qui ne doivent pas être importés par le processus principal de ces commandes
+LAZY = ("pandas", "pyarrow", "pipeline.clean.")
+
+
+def wall(argv: list[str] | None, repeat: int) -> float:
+    """Meilleur temps de `python main.py <argv> --dry-run` (interpréteur seul si `argv` est None)."""
+    cmd = ["-c", "pass"] if argv is None else ["main.py", *argv, "--dry-run"]
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *cmd], cwd=ROOT, check=True, capture_output=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def imported(argv: list[str]) -> dict[str, float]:
+    """Modules importés → durée cumulée (s), d'après ``-X importtime``."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "main.py", *argv, "--dry-run"],
+                         cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    modules = {}
+    for m in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \| *(\S+)$", out, re.M):
+        modules[m.group(2)] = int(m.group(1)) / 1e6
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    baseline = wall(None, args.repeat)
+    print(f"interpréteur seul : {baseline:.2f} s")
+    print(f"  {'commande':<22}{'mur (s)':>9}{'pandas':>9}  imports les plus lourds")
+    for label, argv in COMMANDS:
+        t = wall(argv, args.repeat)
+        modules = imported(argv)
+        heavy = sorted(((s, m) for m, s in modules.items() if "." not in m), reverse=True)[:3]
+        pandas = "oui" if "pandas" in modules else "non"
+        print(f"  {label:<22}{t:9.2f}{pandas:>9}  " + ", ".join(f"{m} {s:.2f}s" for s, m in heavy))
+        if argv[0] in ("clean", "collect"):
+            lazy = [m for m in modules if m.startswith(LAZY)]
+            assert not lazy, f"{label} : imports inattendus {lazy[:5]}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark : nettoyage DVF → SILVER
+----------------------------------
+Compare le chemin unique ``dvf_to_silver.clean_dvf_frame`` (lecture typée,
+filtres catégoriels avant conversions, une ligne par mutation) aux deux
+anciens chemins, reproduits ici :
+
+- ``clean_dvf`` d'origine puis ``add_prix_m2_typologie`` côté GOLD ;
+- ``build_silver_dvf`` d'origine (tout en texte, prix/m² ligne à ligne).
+
+Les anciens chemins ne regroupent pas les mutations multi-lots ; la
+vérification porte donc sur les mutations d'un seul logement (mêmes
+prix/m² et typologies) et sur l'unicité de ``id_mutation`` en sortie.
+
+    python -m benchmarks.bench_dvf_silver --rows 1000000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_bronze
+from pipeline.clean.csv_reader import read_bronze_csv
+from pipeline.clean.dvf_to_silver import KEEP_COLS, READ_DTYPES, clean_dvf_frame
+from pipeline.gold.aggregate_cube import add_prix_m2_typologie
+
+TEXT_DTYPES = {**{c: str for c in KEEP_COLS}, "nature_mutation": "category", "type_local": "category"}
+
+
+def legacy_clean_dvf(src: Path) -> pd.DataFrame:
+    """clean_dvf d'origine + add_prix_m2_typologie (GOLD)."""
+    df = read_bronze_csv(src, usecols=KEEP_COLS, dtype=TEXT_DTYPES)
+    df = df.dropna(how="all")
+    df = df[df["valeur_fonciere"] != "valeur_fonciere"].copy()
+    for c in ["valeur_fonciere", "surface_reelle_bati", "nombre_pieces_principales"]:
+        df[c] = df[c].str.replace(",", ".", regex=False).str.replace(" ", "", regex=False)
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    df["date_mutation"] = pd.to_datetime(df["date_mutation"], errors="coerce")
+    df["annee"] = df["date_mutation"].dt.year.astype("Int16")
+    df = df[df["code_postal"].astype(str).str.match(r"750(0[1-9]|1[0-9]|20)", na=False)]
+    df["arrondissement"] = pd.to_numeric(df["code_postal"].str[-2:]).astype("Int8")
+    df = df[df["nature_mutation"].isin(["Vente", "Vente en l'état futur d'achèvement"])]
+    df = df[df["type_local"].isin(["Appartement", "Maison"])]
+    return add_prix_m2_typologie(df)
+
+
+def legacy_build_silver_dvf(src: Path) -> pd.DataFrame:
+    """build_silver_dvf d'origine (sans l'écriture)."""
+    df = read_bronze_csv(src, usecols=KEEP_COLS, dtype=TEXT_DTYPES)
+    df = df.dropna(how="all")
+    df = df[df["valeur_fonciere"] != "valeur_fonciere"]
+    for col in ["valeur_fonciere", "surface_reelle_bati", "nombre_pieces_principales"]:
+        df[col] = df[col].astype(str).str.replace(",", ".", regex=False).str.replace(" ", "", regex=False)
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df[df["code_postal"].astype(str).str.match(r"750(0[1-9]|1[0-9]|20)", na=False)]
+    df["arrondissement"] = df["code_postal"].astype(str).str[-2:].astype(int)
+    df["date_mutation"] = pd.to_datetime(df["date_mutation"], errors="coerce")
+    df["annee"] = df["date_mutation"].dt.year
+    df = df[df["nature_mutation"].isin(["Vente", "Vente en l'état futur d'achèvement"])]
+    df = df[df["type_local"].isin(["Appartement", "Maison"])]
+    df["prix_m2"] = df["valeur_fonciere"] / df["surface_reelle_bati"]
+    df = df[(df["prix_m2"].between(500, 30000)) & (df["surface_reelle_bati"].between(8, 1000))]
+    df["typologie"] = pd.cut(df["nombre_pieces_principales"], bins=[-1, 1, 2, 3, 4, 100],
+                             labels=["T1", "T2", "T3", "T4", "T5+"])
+    return df
+
+
+def new_clean(src: Path) -> pd.DataFrame:
+    return clean_dvf_frame(read_bronze_csv(src, usecols=KEEP_COLS, dtype=READ_DTYPES))
+
+
+def timed(fn, src):
+    t0 = time.perf_counter()
+    out = fn(src)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "dvf.csv"
+        write_bronze("dvf", args.rows, src)
+        old_a, t_a = timed(legacy_clean_dvf, src)
+        old_b, t_b = timed(legacy_build_silver_dvf, src)
+        new, t_new = timed(new_clean, src)
+
+    assert new["id_mutation"].is_unique, "plusieurs lignes pour une mutation"
+    # Mutations d'un seul logement, sans local exclu : les anciens chemins font foi
+    single = new.loc[new["nb_locaux"] == 1, ["id_mutation", "prix_m2", "typologie"]]
+    for name, old in (("clean_dvf", old_a), ("build_silver_dvf", old_b)):
+        ref = old[["id_mutation", "prix_m2", "typologie"]].merge(single, on="id_mutation")
+        assert np.allclose(ref["prix_m2_x"], ref["prix_m2_y"]), f"prix/m² différents ({name})"
+        assert (ref["typologie_x"].astype(str) == ref["typologie_y"].astype(str)).all(), \
+            f"typologies différentes ({name})"
+
+    print(f"{args.rows:,} lignes DVF → {len(new):,} mutations "
+          f"({(new['nb_locaux'] > 1).sum():,} multi-lots)")
+    print(f"  clean_dvf + GOLD (ancien) : {t_a:6.2f} s")
+    print(f"  build_silver_dvf (ancien) : {t_b:6.2f} s")
+    print(f"  dvf_to_silver             : {t_new:6.2f} s  (x{min(t_a, t_b) / t_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark : ingestion DVF multi-années
+--------------------------------------
+Génère un fichier DVF compressé par année (``benchmarks.synthetic``) puis
+mesure ``clean_dvf`` sur le dossier :
+
+- complet avec 1 processus, puis avec --workers processus ;
+- rafraîchissement après remplacement du fichier d'une seule année
+  (seule sa partition est retraitée).
+
+Vérifie que les tables produites sont identiques quel que soit le nombre
+de processus. Le gain du mode parallèle dépend du nombre de cœurs.
+
+    python -m benchmarks.bench_dvf_years --years 2019 2020 2021 2022 2023 --rows 500000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_bronze
+from pipeline.clean.dvf_to_silver import DEFAULT_CHUNKSIZE, clean_dvf, partitions_dir
+from pipeline.manifest import file_hash
+
+
+def timed_clean(src: Path, dst: Path, workers: int) -> float:
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        clean_dvf(src, dst, chunksize=DEFAULT_CHUNKSIZE, workers=workers)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, nargs="+", default=[2020, 2021, 2022, 2023])
+    parser.add_argument("--rows", type=int, default=300_000, help="lignes par année")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        bronze = tmp / "dvf"
+        for year in args.years:
+            write_bronze("dvf", args.rows, bronze / f"{year}.csv.gz", seed=year, year=year)
+
+        serial, parallel = tmp / "serial.csv", tmp / "parallel.csv"
+        t_serial = timed_clean(bronze, serial, 1)
+        t_parallel = timed_clean(bronze, parallel, args.workers)
+        assert file_hash(serial) == file_hash(parallel), "tables différentes selon le nombre de processus"
+
+        year = args.years[-1]
+        write_bronze("dvf", args.rows, bronze / f"{year}.csv.gz", seed=year + 1, year=year)
+        t_refresh = timed_clean(bronze, parallel, args.workers)
+        shutil.rmtree(partitions_dir(parallel))
+
+    total = args.rows * len(args.years)
+    print(f"{len(args.years)} années × {args.rows:,} lignes ({total:,} lignes, {os.cpu_count()} cœurs)")
+    print(f"  1 processus          : {t_serial:7.2f} s  ({total / t_serial:,.0f} lignes/s)")
+    print(f"  {args.workers} processus          : {t_parallel:7.2f} s  ({total / t_parallel:,.0f} lignes/s)")
+    print(f"  rafraîchissement {year} : {t_refresh:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark : noyaux de parsing (pipeline/clean/kernels.py)
+---------------------------------------------------------
+Sur des colonnes synthétiques de --rows lignes (texte comme à la sortie
+de ``read_bronze_csv``), compare chaque noyau à la version pandas qu'il
+remplace et vérifie que les résultats sont identiques :
+
+- nombres au format français (``"1 234 567,50"``) et au format C ;
+- dates ISO (``pd.to_datetime`` sur chaque ligne) ;
+- code postal → arrondissement (``astype(str).map``, texte et catégories) ;
+- extraction par regex (``astype("string").str.extract``).
+
+    python -m benchmarks.bench_kernels --rows 5000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.clean.kernels import PARIS_CP, arrondissement_from_cp, extract_unique, parse_date, parse_number
+from pipeline.clean.specs import PARIS_CP_RE
+
+
+# ---------- Versions remplacées ----------
+def legacy_parse_number(s: pd.Series) -> pd.Series:
+    out = pd.to_numeric(s, errors="coerce").astype("float64")
+    bad = out.isna() & s.notna()
+    if bad.any():
+        fixed = s[bad].astype(str).str.replace(",", ".", regex=False).str.replace(" ", "", regex=False)
+        out[bad] = pd.to_numeric(fixed, errors="coerce")
+    return out
+
+
+def legacy_parse_date(s: pd.Series) -> pd.Series:
+    out = pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+    bad = out.isna() & s.notna()
+    if bad.any():
+        out[bad] = pd.to_datetime(s[bad], errors="coerce", format="mixed")
+    return out
+
+
+def legacy_arrondissement(s: pd.Series) -> pd.Series:
+    return s.astype(str).map(PARIS_CP).astype("Int8")
+
+
+def legacy_extract(s: pd.Series, regex: str) -> pd.Series:
+    return s.astype("string").str.extract(regex, expand=False)
+
+
+def columns(n: int, seed: int = 0) -> dict[str, pd.Series]:
+    rng = np.random.default_rng(seed)
+    value = rng.integers(50_000, 3_000_000, n)
+    dates = pd.Timestamp("2014-01-01") + pd.to_timedelta(rng.integers(0, 10 * 365, n), unit="D")
+    cp = rng.choice([*PARIS_CP, "75116", "92100", "93100", None], n)
+    return {
+        "nombres_fr": pd.Series([f"{v:,}".replace(",", " ") + ",50" for v in value], dtype="str"),
+        "nombres_c": pd.Series([f"{v}.5" for v in value], dtype="str"),
+        "dates": pd.Series(dates.strftime("%Y-%m-%d"), dtype="str"),
+        "code_postal": pd.Series(cp, dtype="str"),
+        "code_postal_cat": pd.Series(cp, dtype="category"),
+    }
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    args = parser.parse_args()
+
+    cols = columns(args.rows)
+    cases = [
+        ("nombres français", legacy_parse_number, parse_number, (cols["nombres_fr"],)),
+        ("nombres format C", legacy_parse_number, parse_number, (cols["nombres_c"],)),
+        ("dates ISO", legacy_parse_date, parse_date, (cols["dates"],)),
+        ("code postal (texte)", legacy_arrondissement, arrondissement_from_cp, (cols["code_postal"],)),
+        ("code postal (catégorie)", legacy_arrondissement, arrondissement_from_cp, (cols["code_postal_cat"],)),
+        ("regex arrondissement", legacy_extract, extract_unique, (cols["code_postal"], PARIS_CP_RE)),
+    ]
+    print(f"{args.rows:,} lignes")
+    print(f"  {'':26}{'avant (s)':>10}{'noyau (s)':>10}{'gain':>8}")
+    for name, old_fn, new_fn, fn_args in cases:
+        old, t_old = timed(old_fn, *fn_args)
+        new, t_new = timed(new_fn, *fn_args)
+        pd.testing.assert_series_equal(new, old, check_dtype=False, check_names=False)
+        print(f"  {name:26}{t_old:10.3f}{t_new:10.3f}{t_old / t_new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
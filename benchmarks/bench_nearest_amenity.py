@@ -0,0 +1,59 @@
+"""
+Benchmark : distance à l'équipement le plus proche
+--------------------------------------------------
+Compare ``spatial_index.nearest_within`` (grille, par morceaux) au calcul
+de toutes les distances transaction × équipement (haversine vectorisé,
+par blocs pour tenir en mémoire), et vérifie que distances et comptages
+dans les rayons sont identiques.
+
+    python -m benchmarks.bench_nearest_amenity --transactions 300000 --amenities 1500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from pipeline.spatial_index import GridIndex, haversine_m, nearest_within
+
+RADII = (200, 500)
+
+
+def all_pairs(qlon, qlat, alon, alat, block=5000):
+    dist, counts = [], {r: [] for r in RADII}
+    for i in range(0, len(qlon), block):
+        d = haversine_m(qlon[i:i + block, None], qlat[i:i + block, None], alon[None], alat[None])
+        dist.append(d.min(axis=1))
+        for r in RADII:
+            counts[r].append((d <= r).sum(axis=1))
+    return np.concatenate(dist), {r: np.concatenate(c) for r, c in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, default=300_000)
+    parser.add_argument("--amenities", type=int, default=1_500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    alon, alat = rng.uniform(2.25, 2.42, args.amenities), rng.uniform(48.81, 48.90, args.amenities)
+    qlon, qlat = rng.uniform(2.25, 2.42, args.transactions), rng.uniform(48.81, 48.90, args.transactions)
+
+    t0 = time.perf_counter()
+    ref_d, ref_c = all_pairs(qlon, qlat, alon, alat)
+    t_brute = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = GridIndex.build(alon, alat, cell_m=max(RADII))
+    d, c = nearest_within(index, qlon, qlat, RADII)
+    t_grid = time.perf_counter() - t0
+
+    assert np.allclose(d, ref_d), "distances différentes"
+    assert all(np.array_equal(c[r], ref_c[r]) for r in RADII), "comptages différents"
+    print(f"{args.transactions:,} transactions × {args.amenities:,} équipements")
+    print(f"  toutes paires : {t_brute:7.2f} s")
+    print(f"  grille        : {t_grid:7.2f} s  (x{t_brute / t_grid:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark : extraction des coordonnées PAVDA (geo_point_2d / geo_shape)
+-----------------------------------------------------------------------
+Compare l'ancien chemin ligne à ligne (.apply + listes de tuples) au
+parsing vectorisé de ``dechet_alimentaires_to_silver.parse_lon_lat``.
+
+    python -m benchmarks.bench_pavda_geometry --rows 50000
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.clean.dechet_alimentaires_to_silver import parse_lon_lat
+
+
+def synthetic_geo(n: int, seed: int = 0) -> pd.DataFrame:
+    """Points dans Paris ; ~10 % sans geo_point_2d (repli sur geo_shape)."""
+    rng = random.Random(seed)
+    points, shapes = [], []
+    for _ in range(n):
+        lon, lat = 2.25 + rng.random() * 0.17, 48.81 + rng.random() * 0.09
+        shapes.append(f'{{"coordinates": [{lon:.6f}, {lat:.6f}], "type": "Point"}}')
+        points.append(None if rng.random() < 0.1 else f"{lat:.6f}, {lon:.6f}")
+    return pd.DataFrame({"geo_point_2d": points, "geo_shape": shapes})
+
+
+# ---------- Ancien parsing ligne à ligne (référence) ----------
+def parse_lon_lat_from_point(s: str):
+    if not isinstance(s, str):
+        return (None, None)
+    # format "lat, lon"
+    m = re.match(r"\s*([\-0-9.]+)\s*,\s*([\-0-9.]+)\s*$", s)
+    if m:
+        lat = pd.to_numeric(m.group(1), errors="coerce")
+        lon = pd.to_numeric(m.group(2), errors="coerce")
+        return (lon, lat)
+    return (None, None)
+
+
+def parse_lon_lat_from_geojson(s: str):
+    if not isinstance(s, str):
+        return (None, None)
+    try:
+        obj = json.loads(s.replace('""','"'))
+        coords = obj.get("coordinates") if isinstance(obj, dict) else None
+        if coords and len(coords) >= 2:
+            lon = pd.to_numeric(coords[0], errors="coerce")
+            lat = pd.to_numeric(coords[1], errors="coerce")
+            return (lon, lat)
+    except Exception:
+        pass
+    # fallback regex
+    m = re.search(r"\[([\-0-9.]+)\s*,\s*([\-0-9.]+)\]", s)
+    if m:
+        lon = pd.to_numeric(m.group(1), errors="coerce")
+        lat = pd.to_numeric(m.group(2), errors="coerce")
+        return (lon, lat)
+    return (None, None)
+
+
+def legacy_lon_lat(df: pd.DataFrame) -> pd.DataFrame:
+    """Ancienne implémentation (avant vectorisation), pour comparaison."""
+    lon_lat_point = df["geo_point_2d"].apply(parse_lon_lat_from_point).tolist()
+    lon_lat_shape = df["geo_shape"].apply(parse_lon_lat_from_geojson).tolist()
+    lon_lat = [(lon or lon2, lat or lat2) for (lon, lat), (lon2, lat2) in zip(lon_lat_point, lon_lat_shape)]
+    return pd.DataFrame({
+        "longitude": [t[0] for t in lon_lat],
+        "latitude": [t[1] for t in lon_lat],
+    }, dtype="float64")
+
+
+def _best_of(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_geo(args.rows)
+    t_legacy, legacy = _best_of(legacy_lon_lat, df, args.repeat)
+    t_vec, vec = _best_of(parse_lon_lat, df, args.repeat)
+
+    assert np.allclose(legacy.to_numpy(), vec.to_numpy(), equal_nan=True), "résultats différents"
+    print(f"{args.rows:,} lignes")
+    print(f"  ligne à ligne : {t_legacy * 1000:9.1f} ms")
+    print(f"  vectorisé     : {t_vec * 1000:9.1f} ms  (x{t_legacy / t_vec:.1f})")
+
+
+if __name__ == "__main__":
+    main()
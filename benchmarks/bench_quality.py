@@ -0,0 +1,76 @@
+"""
+Benchmark : coût des règles de qualité à l'écriture SILVER
+----------------------------------------------------------
+Écrit --rows transactions synthétiques par chunks (``SilverWriter``) avec
+et sans évaluation des règles de ``pipeline.quality``, puis vérifie qu'un
+lot abîmé (doublons, arrondissement incohérent avec le code postal, dates
+manquantes) fait échouer l'écriture sans remplacer la table en place.
+
+    python -m benchmarks.bench_quality --rows 2000000 --format parquet
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_api_latency import synthetic_transactions
+from pipeline.instrument import stage
+from pipeline.quality import QualityError
+from pipeline.silver_store import SilverWriter, read_silver
+
+TABLE = "transactions_residentiel"
+
+
+def timed_write(df: pd.DataFrame, dst: Path, chunksize: int, check: bool) -> float:
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), SilverWriter(dst, TABLE, check) as w:
+        for start in range(0, len(df), chunksize):
+            w.write(df.iloc[start:start + chunksize])
+    return time.perf_counter() - t0
+
+
+def damage(df: pd.DataFrame, n: int) -> pd.DataFrame:
+    """n doublons d'id_mutation, n arrondissements faux, 2 % de dates manquantes."""
+    df = pd.concat([df, df.head(n)], ignore_index=True)
+    df.loc[df.index[-2 * n:-n], "arrondissement"] = df["arrondissement"].iloc[-2 * n:-n] % 20 + 1
+    df.loc[df.sample(frac=0.02, random_state=0).index, "date_mutation"] = pd.NaT
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    df = synthetic_transactions(args.rows).assign(prix_m2=lambda d: d["valeur_fonciere"] / d["surface_reelle_bati"])
+    with tempfile.TemporaryDirectory() as tmp:
+        dst = Path(tmp) / f"{TABLE}.{args.format}"
+        t_plain = timed_write(df, dst, args.chunksize, check=False)
+        t_check = timed_write(df, dst, args.chunksize, check=True)
+
+        with stage("bench:qualite") as st:
+            try:
+                timed_write(damage(df, 100), dst, args.chunksize, check=True)
+                raise AssertionError("le lot abîmé aurait dû être refusé")
+            except QualityError:
+                pass
+        assert len(read_silver(dst, TABLE)) == len(df), "la table en place a été remplacée"
+
+    print(f"{args.rows:,} lignes ({args.format}, chunks de {args.chunksize:,})")
+    print(f"  écriture sans règles : {t_plain:6.2f} s")
+    print(f"  écriture avec règles : {t_check:6.2f} s  ({100 * (t_check / t_plain - 1):+.1f} %)")
+    print("  lot abîmé refusé :")
+    for r in st.quality:
+        if r["status"] != "ok":
+            print(f"    {r['rule']:<40}{r['failed']:>8,} / {r['checked']:,}  ({r['status']})")
+
+
+if __name__ == "__main__":
+    main()
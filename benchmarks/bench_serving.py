@@ -0,0 +1,94 @@
+"""
+Benchmark : démarrage et mémoire des workers de l'API
+-----------------------------------------------------
+Génère des tables SILVER/GOLD synthétiques, puis démarre --workers
+processus qui construisent chacun un ``DataStore`` :
+
+- lu dans SILVER / GOLD (chaque worker a sa copie) ;
+- projeté depuis la version publiée (``pipeline.serving.publish``).
+
+Relève pour chaque mode la durée de chargement et la mémoire copiée par
+chaque worker (pages modifiées, ``*_Dirty`` de /proc/self/smaps_rollup,
+Linux). Les fichiers projetés restent dans le cache disque, payés une
+fois pour tous les workers : leur taille est donnée à part.
+
+    python -m benchmarks.bench_serving --rows 1000000 --workers 4
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from benchmarks.bench_api_latency import synthetic_transactions
+from pipeline.gold.aggregate_cube import build_gold
+from pipeline.instrument import path_bytes
+from pipeline.serving import SERVING_DIR, publish
+from pipeline.silver_store import write_silver
+
+
+def _smaps_mb() -> dict[str, float]:
+    out = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Private_Dirty", "Shared_Dirty"):
+                out[key] = int(value.split()[0]) / 1024
+    return out
+
+
+def _start_worker(data_dir: str) -> dict:
+    """Exécuté dans un processus neuf : construit le DataStore."""
+    from api.endpoints import DataStore
+
+    before = _smaps_mb()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = DataStore(data_dir, "csv")
+    load = time.perf_counter() - t0
+    after = _smaps_mb()
+    del store
+    return {"load_s": load, "copied_mb": sum(after[k] - before[k] for k in ("Private_Dirty", "Shared_Dirty"))}
+
+
+def run_workers(data_dir: Path, n: int) -> list[dict]:
+    with ProcessPoolExecutor(max_workers=n, mp_context=get_context("spawn")) as pool:
+        return list(pool.map(_start_worker, [str(data_dir)] * n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tx = write_silver(synthetic_transactions(args.rows), tmp / "silver" / "transactions_residentiel.csv",
+                              "transactions_residentiel")
+            build_gold({"dvf": tx}, tmp / "gold", "csv")
+        silver = run_workers(tmp, args.workers)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            published = publish(tmp, "csv")
+        size_mb = path_bytes(published) / 2**20
+        t_publish = time.perf_counter() - t0
+        mapped = run_workers(tmp, args.workers)
+        shutil.rmtree(tmp / SERVING_DIR)
+
+    print(f"{args.rows:,} transactions, {args.workers} workers "
+          f"(publication : {t_publish:.2f} s, {size_mb:.1f} Mo projetés)")
+    print(f"{'':20}{'chargement (ms)':>16}{'copié, total (Mo)':>19}")
+    for name, runs in (("SILVER / GOLD", silver), ("version publiée", mapped)):
+        load = max(r["load_s"] for r in runs) * 1000
+        print(f"{name:20}{load:16.0f}{sum(r['copied_mb'] for r in runs):19.1f}")
+
+
+if __name__ == "__main__":
+    main()
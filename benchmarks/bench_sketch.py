@@ -0,0 +1,88 @@
+"""
+Benchmark : quantiles de prix/m² exacts ou par sketchs
+------------------------------------------------------
+Génère un fichier DVF compressé par année, le nettoie (``clean_dvf``, qui
+écrit les sketchs de prix/m² de chaque partition puis leur fusion), puis
+compare pour le cube GOLD :
+
+- les quantiles exacts (``build_dvf_cube`` sans sketchs) ;
+- les quantiles estimés à partir des sketchs fusionnés.
+
+Relève les durées, la taille des sketchs face à celle des valeurs, et
+vérifie que l'écart relatif reste sous ``alpha`` (et que les comptes
+sont identiques). Vérifie aussi que nettoyer en une fois ou par chunks
+donne les mêmes sketchs.
+
+    python -m benchmarks.bench_sketch --years 2019 2020 2021 2022 2023 --rows 500000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_bronze
+from pipeline.clean.dvf_to_silver import DEFAULT_CHUNKSIZE, SKETCH_KEYS, clean_dvf, sketch_path
+from pipeline.gold.aggregate_cube import QUANTILES, build_dvf_cube
+from pipeline.gold.sketch import ALPHA, read_long
+from pipeline.silver_store import memory_bytes, read_silver
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, nargs="+", default=[2020, 2021, 2022, 2023])
+    parser.add_argument("--rows", type=int, default=300_000, help="lignes par année")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        bronze = tmp / "dvf"
+        for year in args.years:
+            write_bronze("dvf", args.rows, bronze / f"{year}.csv.gz", seed=year, year=year)
+        dst = tmp / "transactions_residentiel.csv"
+        timed(clean_dvf, bronze, dst, workers=args.workers)
+        tx = read_silver(dst, "transactions_residentiel")
+        sketch = read_long(sketch_path(dst))
+
+        one = tmp / "un_fichier.csv"
+        pd.concat([pd.read_csv(f, dtype=str) for f in sorted(bronze.glob("*.csv.gz"))]).to_csv(one, index=False)
+        for chunksize in (None, DEFAULT_CHUNKSIZE // 4):
+            timed(clean_dvf, one, tmp / "une_passe.csv", chunksize=chunksize)
+            other = read_long(sketch_path(tmp / "une_passe.csv"))
+            pd.testing.assert_frame_equal(other.sort_values([*SKETCH_KEYS, "bucket"], ignore_index=True),
+                                          sketch.sort_values([*SKETCH_KEYS, "bucket"], ignore_index=True))
+
+    exact, t_exact = timed(build_dvf_cube, tx)
+    approx, t_sketch = timed(build_dvf_cube, tx, sketch)
+    assert exact["nb_ventes"].tolist() == approx["nb_ventes"].tolist()
+    cols = ["prix_m2_median", *QUANTILES.values()]
+    err = np.abs(approx[cols].to_numpy() / exact[cols].to_numpy() - 1)
+    small = (exact["nb_ventes"] < 20).to_numpy()
+
+    print(f"{len(tx):,} transactions, {len(exact):,} lignes de cube, {len(sketch):,} seaux")
+    print(f"  valeurs prix_m2   : {memory_bytes(tx[['prix_m2']]) / 1e6:8.1f} Mo")
+    print(f"  sketchs fusionnés : {memory_bytes(sketch) / 1e6:8.1f} Mo")
+    print(f"  cube exact        : {t_exact:8.2f} s")
+    print(f"  cube par sketchs  : {t_sketch:8.2f} s")
+    print(f"  écart relatif     : max {np.nanmax(err):.4f}, moyen {np.nanmean(err):.4f} (alpha = {ALPHA})")
+    if small.any():
+        print(f"  groupes < 20 ventes : {small.sum():,}, écart max {np.nanmax(err[small]):.4f}")
+    assert np.nanmax(err) <= ALPHA * 1.0001, "écart supérieur à alpha"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark : index spatial (pipeline/spatial_index.py)
+-----------------------------------------------------
+Compare les requêtes rectangle (zone affichée) et rayon (500 m) par la
+grille au parcours complet vectorisé, sur des points synthétiques dans
+Paris, et vérifie que les résultats sont identiques.
+
+    python -m benchmarks.bench_spatial_index --points 2000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from pipeline.spatial_index import GridIndex, haversine_m
+
+
+def synthetic_points(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(2.25, 2.42, n)
+    lat = rng.uniform(48.81, 48.90, n)
+    lon[rng.random(n) < 0.01] = np.nan  # transactions non géolocalisées
+    return lon, lat
+
+
+def _timed(fn, queries):
+    t0 = time.perf_counter()
+    out = [fn(*q) for q in queries]
+    return (time.perf_counter() - t0) / len(queries), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=2_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--radius", type=float, default=500.0)
+    args = parser.parse_args()
+
+    lon, lat = synthetic_points(args.points)
+    t0 = time.perf_counter()
+    index = GridIndex.build(lon, lat)
+    print(f"{args.points:,} points — construction : {(time.perf_counter() - t0) * 1000:.0f} ms, "
+          f"grille {index.shape[0]}×{index.shape[1]}")
+
+    rng = np.random.default_rng(1)
+    centers = np.column_stack([rng.uniform(2.27, 2.40, args.queries), rng.uniform(48.82, 48.89, args.queries)])
+    bboxes = [(x - 0.01, y - 0.006, x + 0.01, y + 0.006) for x, y in centers]
+    circles = [(x, y, args.radius) for x, y in centers]
+
+    def scan_bbox(a, b, c, d):
+        return np.flatnonzero((lon >= a) & (lon <= c) & (lat >= b) & (lat <= d))
+
+    def scan_radius(x, y, r):
+        dist = haversine_m(x, y, lon, lat)
+        return np.sort(np.flatnonzero(dist <= r))
+
+    t_scan, ref = _timed(scan_bbox, bboxes)
+    t_idx, got = _timed(index.bbox, bboxes)
+    assert all(np.array_equal(a, b) for a, b in zip(ref, got)), "rectangle : résultats différents"
+    print(f"rectangle  parcours {t_scan * 1000:8.2f} ms   index {t_idx * 1000:7.2f} ms  (x{t_scan / t_idx:.0f})")
+
+    t_scan, ref = _timed(scan_radius, circles)
+    t_idx, got = _timed(index.radius, circles)
+    assert all(np.array_equal(a, np.sort(b[0])) for a, b in zip(ref, got)), "rayon : résultats différents"
+    print(f"rayon      parcours {t_scan * 1000:8.2f} ms   index {t_idx * 1000:7.2f} ms  (x{t_scan / t_idx:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Données BRONZE synthétiques
+---------------------------
+Un générateur déterministe par schéma BRONZE, aux colonnes et séparateurs
+des fichiers réels (DVF géolocalisé, exports CSV opendata.paris.fr), avec
+leurs défauts habituels : lignes hors Paris, valeurs manquantes, codes
+postaux mal formés, mutations DVF multi-lots.
+
+Les fichiers sont écrits par tranches de ``CHUNK_ROWS`` lignes : la
+mémoire reste bornée jusqu'à 10M lignes, et une tranche ne dépend que de
+``(seed, numéro de tranche)`` — mêmes arguments, même fichier.
+
+    from benchmarks.synthetic import write_bronze
+    write_bronze("dvf", 1_000_000, "data/bronze/dvf.csv")
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+
+ARR = np.arange(1, 21)
+CP_PARIS = np.array([f"750{a:02d}" for a in ARR])
+
+
+def _lon_lat(rng: np.random.Generator, n: int) -> tuple[np.ndarray, np.ndarray]:
+    return rng.uniform(2.25, 2.42, n).round(6), rng.uniform(48.81, 48.90, n).round(6)
+
+
+def _with_missing(rng: np.random.Generator, values, rate: float) -> np.ndarray:
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < rate] = None
+    return values
+
+
+def dvf(rng: np.random.Generator, start: int, n: int, year: int | None = None) -> pd.DataFrame:
+    """DVF géolocalisé : une ligne par local, 1 à 3 lots par mutation.
+
+    Avec `year`, toutes les mutations tombent dans l'année (fichier annuel).
+    """
+    n_mut = n  # au moins n lignes, tronquées à n
+    lots = rng.choice([1, 1, 1, 2, 3], n_mut)
+    mut = np.repeat(np.arange(n_mut), lots)[:n]
+    m = len(mut)
+    cp = np.concatenate([CP_PARIS, ["92100", "93100", "69001"]])
+    first, days = (pd.Timestamp(f"{year}-01-01"), 365) if year else (pd.Timestamp("2020-01-01"), 5 * 365)
+    date = first + pd.to_timedelta(rng.integers(0, days, n_mut), unit="D")
+    type_local = rng.choice(["Appartement", "Appartement", "Appartement", "Maison", "Dépendance",
+                             "Local industriel. commercial ou assimilé"], m)
+    habitation = np.isin(type_local, ["Appartement", "Maison"])
+    lon, lat = _lon_lat(rng, n_mut)
+    return pd.DataFrame({
+        "id_mutation": [f"{year or 2022}-{start + k}" for k in mut],
+        "date_mutation": date.strftime("%Y-%m-%d").to_numpy()[mut],
+        "numero_disposition": 1,
+        "nature_mutation": rng.choice(["Vente"] * 6 + ["Vente en l'état futur d'achèvement", "Echange",
+                                                        "Adjudication"], n_mut)[mut],
+        "valeur_fonciere": _with_missing(rng, rng.integers(50_000, 3_000_000, n_mut), 0.02)[mut],
+        "adresse_numero": rng.integers(1, 200, m),
+        "code_postal": cp[rng.integers(0, len(cp), n_mut)][mut],
+        "code_commune": "75056",
+        "type_local": type_local,
+        "surface_reelle_bati": np.where(habitation, rng.integers(6, 350, m), np.nan),
+        "nombre_pieces_principales": np.where(habitation, rng.integers(0, 8, m), np.nan),
+        "nature_culture": None,
+        "longitude": lon[mut],
+        "latitude": lat[mut],
+    })
+
+
+def logements_sociaux(rng: np.random.Generator, start: int, n: int) -> pd.DataFrame:
+    """Programmes de logements sociaux financés (export opendata.paris.fr)."""
+    arr = rng.integers(1, 21, n)
+    total = rng.integers(1, 200, n)
+    plai = (total * rng.uniform(0, 0.4, n)).astype(int)
+    plus = ((total - plai) * rng.uniform(0, 0.8, n)).astype(int)
+    return pd.DataFrame({
+        "Identifiant livraison": [f"P{start + i}" for i in range(n)],
+        "Adresse du programme": [f"{k} rue {chr(65 + k % 26)}" for k in rng.integers(1, 300, n)],
+        "Code postal": _with_missing(rng, CP_PARIS[arr - 1], 0.01),
+        "Ville": "Paris",
+        "Année du financement - agrément": rng.integers(2001, 2025, n),
+        "Bailleur social": rng.choice(["Paris Habitat", "RIVP", "Elogie-Siemp", "ICF Habitat", "3F"], n),
+        "Nombre total de logements financés": total,
+        "Dont nombre de logements PLA I": plai,
+        "Dont nombre de logements PLUS": plus,
+        "Dont nombre de logements PLUS CD": 0,
+        "Dont nombre de logements PLS": total - plai - plus,
+        "Mode de réalisation": rng.choice(["Construction neuve", "Acquisition-amélioration",
+                                           "Acquisition"], n),
+        "Arrondissement": arr,
+    })
+
+
+def etablissements(rng: np.random.Generator, start: int, n: int) -> pd.DataFrame:
+    """Établissements scolaires (collèges, élémentaires, maternelles : même schéma)."""
+    arr = rng.integers(1, 21, n)
+    libelle = np.where(arr == 1, "1er Ardt", np.char.add(arr.astype(str), "ème Ardt"))
+    return pd.DataFrame({
+        "annee_scol": "2024-2025",
+        "libelle": [f"Ecole {start + i}" for i in range(n)],
+        "adresse": [f"{k} rue B" for k in rng.integers(1, 300, n)],
+        "arr_libelle": libelle,
+        "arr_insee": _with_missing(rng, 75100 + arr, 0.05),
+        "geo_point_2d": [f"{b}, {a}" for a, b in zip(*_lon_lat(rng, n))],
+    })
+
+
+def espaces_verts(rng: np.random.Generator, start: int, n: int) -> pd.DataFrame:
+    """Espaces verts : code postal parfois écrit « 75 012 » ou hors Paris."""
+    arr = rng.integers(1, 21, n)
+    cp = np.where(rng.random(n) < 0.1, np.char.add("75 0", np.char.zfill(arr.astype(str), 2)),
+                  CP_PARIS[arr - 1])
+    cp = np.where(rng.random(n) < 0.05, "94300", cp)
+    return pd.DataFrame({
+        "nsq_espace_vert": start + np.arange(n),
+        "nom_ev": [f"Square {start + i}" for i in range(n)],
+        "type_ev": rng.choice(["Promenades ouvertes", "Jardins grillagés", "Bois", "Cimetières"], n),
+        "adresse_codepostal": _with_missing(rng, cp, 0.02),
+        "poly_area": rng.integers(50, 50_000, n),
+    })
+
+
+def pavda(rng: np.random.Generator, start: int, n: int) -> pd.DataFrame:
+    """Points d'apport volontaire de déchets alimentaires ; ~10 % sans geo_point_2d."""
+    lon, lat = _lon_lat(rng, n)
+    return pd.DataFrame({
+        "pavda_idt": [f"PAV{start + i}" for i in range(n)],
+        "adr": [f"{k} rue C" for k in rng.integers(1, 300, n)],
+        "arrdt": CP_PARIS[rng.integers(0, 20, n)],
+        "pavda_etat": rng.choice(["Actif", "Inactif"], n, p=[0.9, 0.1]),
+        "geo_shape": [f'{{"coordinates": [{a}, {b}], "type": "Point"}}' for a, b in zip(lon, lat)],
+        "geo_point_2d": _with_missing(rng, [f"{b}, {a}" for a, b in zip(lon, lat)], 0.1),
+    })
+
+
+# Jeu nettoyé (clé de CLEANERS dans main.py) → (générateur, séparateur)
+GENERATORS = {
+    "dvf": (dvf, ","),
+    "logements_sociaux": (logements_sociaux, ";"),
+    "colleges": (etablissements, ";"),
+    "elementaires": (etablissements, ";"),
+    "maternelles": (etablissements, ";"),
+    "espaces_verts": (espaces_verts, ";"),
+    "dechets_alimentaires": (pavda, ";"),
+}
+
+
+def write_bronze(dataset: str, rows: int, path: str | Path, seed: int = 0, **options) -> Path:
+    """Écrit `rows` lignes BRONZE synthétiques du jeu `dataset` dans `path`.
+
+    Un `path` en ``.gz`` / ``.bz2`` / ``.xz`` est compressé ; `options` sont
+    passées au générateur (ex. ``year=2022`` pour DVF).
+    """
+    fn, sep = GENERATORS[dataset]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name("tmp-" + path.name)  # garde l'extension : compression déduite
+    for i, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        rng = np.random.default_rng([seed, i])
+        chunk = fn(rng, start, min(CHUNK_ROWS, rows - start), **options)
+        chunk.to_csv(tmp, sep=sep, index=False, header=i == 0, mode="w" if i == 0 else "a")
+    tmp.replace(path)
+    return path
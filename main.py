@@ -1,21 +1,54 @@
-import concurrent.futures
+"""
+Pipeline Urban Data Explorer (bronze → silver → gold)
+-----------------------------------------------------
+    python main.py                              # tout : téléchargements, nettoyages, GOLD, API
+    python main.py run espaces_verts            # un jeu, puis enrichissement / GOLD / API
+    python main.py clean espaces_verts --force  # nettoyage seul, fichier BRONZE déjà présent
+    python main.py collect colleges maternelles # téléchargements seuls
+    python main.py clean --dry-run              # tâches prévues, sans rien exécuter
+
+Sans jeu nommé, une commande porte sur tous les jeux de ``CLEANERS``.
+
+Démarrage rapide : les nettoyeurs sont référencés par ``"module:fonction"``
+et importés par leur worker seulement s'ils tournent (stage
+``import:<jeu>`` du rapport) ; un jeu inchangé (manifeste) n'importe même
+pas son module. Enrichissement, GOLD et publication ne sont importés que
+par ``run``. Le temps de démarrage du processus principal (imports et
+construction du DAG) est affiché et repris dans le rapport (``startup_s``).
+"""
+
+import time
+
+_IMPORTS_START = time.perf_counter()
+
+import argparse
+import importlib
+import inspect
 import os
+import sys
 from pathlib import Path
 
 import pipeline.collect.collect_data as p_collect
-from pipeline.clean.clean_data_to_silver_college import clean_colleges
-from pipeline.clean.clean_data_to_silver_elementaire import clean_elementaires
-from pipeline.clean.clean_data_to_silver_espaces_verts import \
-    clean_espaces_verts
-from pipeline.clean.clean_data_to_silver_maternelles import clean_maternelles
-from pipeline.clean.dvf_to_silver import clean_dvf
-from pipeline.clean.logements_sociaux_to_silver import clean_logements_sociaux
+from pipeline.instrument import PROFILE_ENV, log, stage, write_run_report
+from pipeline.manifest import (Manifest, derived_is_up_to_date, entry_is_up_to_date, make_derived_entry,
+                               make_entry)
+from pipeline.scheduler import Task, print_summary, run_dag
+
+# Durée des imports de ce module ; démarrage = imports + construction du DAG (voir main)
+IMPORTS_S = time.perf_counter() - _IMPORTS_START
 
 #from pipeline.clean.colleges_to_silver import clean_colleges
 
 ROOT = Path(__file__).parent.resolve()
+DATA_DIR = ROOT / "data"
 BRONZE_DIR = ROOT / "data" / "bronze"
 SILVER_DIR = ROOT / "data" / "silver"
+GOLD_DIR = ROOT / "data" / "gold"
+# Format SILVER : "csv" (par défaut) ou "parquet" (typé, partitionné)
+SILVER_FORMAT = os.environ.get("SILVER_FORMAT", "csv")
+MANIFEST_PATH = ROOT / "data" / "manifest.json"
+# Rapport JSON de chaque exécution (durées, lignes par filtre, mémoire, octets)
+REPORT_PATH = ROOT / "data" / "run_report.json"
 
 urls = {
     "logement_sociaux.csv": "https://opendata.paris.fr/api/explore/v2.1/catalog/datasets/logements-sociaux-finances-a-paris/exports/csv",
@@ -27,23 +60,232 @@ urls = {
 }
 
 def collect(filename, url):
-    path = BRONZE_DIR / filename
-    os.makedirs(BRONZE_DIR, exist_ok=True)
-    p_collect.collect_csv(filename, url)
+    return p_collect.collect_csv(filename, url, BRONZE_DIR)
+
+def silver(name):
+    return SILVER_DIR / f"{name}.{SILVER_FORMAT}"
+
+# DVF : un dossier data/bronze/dvf/ de fichiers annuels (.csv, .csv.gz, ...)
+# s'il existe, nettoyés en parallèle année par année ; sinon data/bronze/dvf.csv
+DVF_BRONZE = "dvf" if (BRONZE_DIR / "dvf").is_dir() else "dvf.csv"
+
+# Nettoyeurs : nom -> ("module:fonction", fichier BRONZE, table SILVER, options)
+# Les modules (pandas, pyarrow) ne sont importés qu'à l'exécution : voir load_cleaner.
+# Un nettoyeur par morceaux lit le DEFAULT_CHUNKSIZE de son module (voir clean)
+CLEANERS = {
+    "dvf": ("pipeline.clean.dvf_to_silver:clean_dvf", DVF_BRONZE, "transactions_residentiel", {}),
+    "logements_sociaux": ("pipeline.clean.logements_sociaux_to_silver:clean_logements_sociaux", "logement_sociaux.csv", "logements_sociaux_programmes", {}),
+    "colleges": ("pipeline.clean.clean_data_to_silver_college:clean_colleges", "colleges.csv", "colleges_clean", {}),
+    "elementaires": ("pipeline.clean.clean_data_to_silver_elementaire:clean_elementaires", "elementaire.csv", "ecoles_elementaires_clean", {}),
+    "maternelles": ("pipeline.clean.clean_data_to_silver_maternelles:clean_maternelles", "maternelle.csv", "ecoles_maternelle_clean", {}),
+    "espaces_verts": ("pipeline.clean.clean_data_to_silver_espaces_verts:clean_espaces_verts", "espace_verts.csv", "espace_vert_clean", {}),
+    "dechets_alimentaires": ("pipeline.clean.dechet_alimentaires_to_silver:clean_dechets_silver", "abribac_dechets_alimentaires.csv", "abribac_dechets_alimentaires", {}),
+}
+
+# Enrichissement des transactions (importé par son worker, comme les nettoyeurs)
+ENRICHER = "pipeline.clean.enrich_transactions:enrich_transactions"
+
+COMMANDS = ("collect", "clean", "run")
+
+def load_cleaner(target):
+    """``"module:fonction"`` → fonction (import du module à la demande)."""
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+def select(datasets=None):
+    """Jeux demandés dans l'ordre de CLEANERS (tous si `datasets` est vide)."""
+    unknown = sorted(set(datasets or ()) - set(CLEANERS))
+    if unknown:
+        raise ValueError(f"Jeux inconnus {unknown} (connus : {', '.join(CLEANERS)})")
+    return [name for name in CLEANERS if not datasets or name in datasets]
+
+def clean(name, cleaner, src, dst, entry=None, force=False, **kwargs):
+    """Lance `cleaner` (cible ``"module:fonction"``) sauf si BRONZE, code et
+    SILVER correspondent à `entry`.
+
+    Exécutée dans un processus worker : le module du nettoyeur n'y est
+    importé que si le nettoyage a lieu (avec lui son ``DEFAULT_CHUNKSIZE``,
+    passé en `chunksize` sauf option contraire). Renvoie l'entrée de manifeste à
+    enregistrer par le processus principal.
+    """
+    if not force and entry_is_up_to_date(entry, src, dst, cleaner):
+        log("MANIFEST", f"{name}: entrées inchangées, nettoyage ignoré")
+        return entry
+    with stage(f"import:{name}", tag="IMPORT") as st:
+        fn = load_cleaner(cleaner)
+    log("IMPORT", f"{name}: {cleaner.partition(':')[0]} importé en {st.duration_s:.2f}s")
+    params = inspect.signature(fn).parameters
+    if force and "delta" in params:
+        kwargs["delta"] = False  # --force : nettoyage complet, sans mode delta (pipeline.clean.cdc)
+    default_chunksize = getattr(sys.modules[fn.__module__], "DEFAULT_CHUNKSIZE", None)
+    if "chunksize" in params and default_chunksize is not None:
+        kwargs.setdefault("chunksize", default_chunksize)  # mémoire bornée (lecture par morceaux)
+    fn(src, dst, **kwargs)
+    return make_entry(src, dst, fn)
+
+def enrich(transactions, amenities, entry=None, force=False):
+    """Enrichit la table des transactions sauf si elle est encore celle
+    produite par le dernier enrichissement (`entry`) et que les couches
+    d'équipements (`amenities` : jeu → table SILVER) n'ont pas changé.
+
+    Exécutée dans un processus worker ; renvoie l'entrée de manifeste
+    ``enrich``. Un nettoyage DVF réécrit la table : son hash change et
+    l'enrichissement est refait.
+    """
+    if not force and derived_is_up_to_date(entry, amenities, transactions, ENRICHER):
+        log("MANIFEST", "enrich: transactions et couches inchangées, enrichissement ignoré")
+        return entry
+    fn = load_cleaner(ENRICHER)
+    fn(transactions, amenities)
+    return make_derived_entry(amenities, transactions, fn)
+
+def build_tasks(manifest, force=False, command="run", datasets=None):
+    """DAG de `command` sur les jeux `datasets` (tous par défaut).
+
+    - ``collect`` : téléchargement des fichiers BRONZE des jeux ;
+    - ``clean`` : nettoyage des jeux, fichiers BRONZE en place ;
+    - ``run`` : les deux (chaque nettoyeur ne dépend que du téléchargement
+      de son propre fichier), puis enrichissement si les transactions ou
+      une couche d'équipements sont concernées, GOLD et publication de l'API.
+    """
+    names = select(datasets)
+    tasks = []
+    if command in ("collect", "run"):
+        bronzes = {CLEANERS[name][1] for name in names}
+        tasks += [
+            Task(f"collect:{filename}", collect, (filename, url))
+            for filename, url in urls.items() if filename in bronzes
+        ]
+    if command == "collect":
+        return tasks
+    for name in names:
+        cleaner, bronze, table, kwargs = CLEANERS[name]
+        deps = (f"collect:{bronze}",) if command == "run" and bronze in urls else ()
+        tasks.append(Task(
+            f"clean:{name}", clean,
+            (name, cleaner, BRONZE_DIR / bronze, silver(table)),
+            {"entry": manifest.entries.get(name), "force": force, **kwargs},
+            deps=deps, cpu=True,
+        ))
+    if command == "clean":
+        return tasks
+
+    from pipeline.clean.enrich_transactions import AMENITY_LAYERS
+    from pipeline.gold.aggregate_cube import build_gold
+    from pipeline.serving import publish
+
+    cleaned = tuple(f"clean:{name}" for name in names)
+    # Enrichissement des transactions par les couches d'équipements géolocalisés
+    layers = {layer.dataset for layer in AMENITY_LAYERS}
+    inputs = ["dvf", *sorted(layers)]
+    if any(name in names for name in inputs):
+        tasks.append(Task(
+            "enrich", enrich,
+            (silver(CLEANERS["dvf"][2]), {name: silver(CLEANERS[name][2]) for name in sorted(layers)}),
+            {"entry": manifest.entries.get("enrich"), "force": force},
+            deps=tuple(f"clean:{name}" for name in inputs if name in names), cpu=True,
+        ))
+        cleaned += ("enrich",)
+    # GOLD : agrégats recalculés sur tous les SILVER une fois ceux des jeux à jour
+    tasks.append(Task(
+        "gold", build_gold,
+        ({name: silver(table) for name, (_, _, table, _) in CLEANERS.items()}, GOLD_DIR, SILVER_FORMAT),
+        deps=cleaned, cpu=True,
+    ))
+    # Tables de l'API publiées en Arrow IPC (projetées par les workers, voir pipeline.serving)
+    tasks.append(Task("serving", publish, (DATA_DIR, SILVER_FORMAT), deps=("gold",), cpu=True))
+    return tasks
+
+def print_plan(tasks, force=False):
+    """--dry-run : tâches prévues, dépendances et état du manifeste des nettoyages."""
+    print(f"[PLAN] {len(tasks)} tâche(s)")
+    for t in tasks:
+        note = ""
+        if t.fn is clean:
+            name, cleaner, src, dst = t.args
+            up_to_date = not force and entry_is_up_to_date(t.kwargs["entry"], src, dst, cleaner)
+            note = "inchangé, sera ignoré" if up_to_date else f"à nettoyer ({cleaner})"
+        elif t.fn is enrich:
+            transactions, amenities = t.args
+            up_to_date = not force and derived_is_up_to_date(t.kwargs["entry"], amenities, transactions, ENRICHER)
+            note = "inchangé, sera ignoré" if up_to_date else "à enrichir"
+        deps = f" ← {', '.join(t.deps)}" if t.deps else ""
+        print((f"  {t.name:<42}{deps}" + (f"  [{note}]" if note else "")).rstrip())
+
+def main(force=False, report=REPORT_PATH, profile=None, command="run", datasets=None, dry_run=False):
+    """Exécute le DAG de `command` et écrit le rapport d'exécution dans `report`.
+
+    `profile` : motif(s) de stages à profiler avec cProfile (ex. "clean:dvf",
+    voir pipeline.instrument) ; hérité par les processus workers.
+    `dry_run` : affiche les tâches prévues sans rien exécuter.
+    """
+    if profile:
+        os.environ[PROFILE_ENV] = profile
+    started, t0 = time.time(), time.perf_counter()
+    manifest = Manifest(MANIFEST_PATH)
+    tasks = build_tasks(manifest, force=force, command=command, datasets=datasets)
+    startup = IMPORTS_S + time.perf_counter() - t0
+    print(f"[RUN] Démarrage : {startup:.2f}s (imports {IMPORTS_S:.2f}s, DAG de {len(tasks)} tâche(s))")
+    if dry_run:
+        print_plan(tasks, force=force)
+        return {}
+
+    # Téléchargements (threads) et nettoyages (processus) au fil des dépendances
+    results = run_dag(tasks, io_workers=4)
+
+    for name in CLEANERS:
+        r = results.get(f"clean:{name}")
+        if r is not None and r.status == "ok":
+            manifest.entries[name] = r.value
+    r = results.get("enrich")
+    if r is not None and r.status == "ok":
+        manifest.entries["enrich"] = r.value
+        # La table DVF en place est la table enrichie (hash relevé par
+        # l'enrichissement) : c'est elle que le prochain run doit retrouver
+        if "dvf" in manifest.entries:
+            manifest.entries["dvf"]["silver"]["sha256"] = r.value["silver"]["sha256"]
+    manifest.save()
+
+    print_summary(tasks, results)
+    print(f"[RUN] Rapport → {write_run_report(report, results, started, startup)}")
+    return results
+
 
-def main():
-    # Téléchargement parallèle
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        executor.map(lambda args: collect(*args), urls.items())
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(__doc__.splitlines()[3:8]))
+    sub = parser.add_subparsers(dest="command", metavar="{collect,clean,run}")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("datasets", nargs="*", metavar="JEU",
+                        help=f"jeux concernés (par défaut tous) : {', '.join(CLEANERS)}")
+    common.add_argument("--dry-run", action="store_true", help="affiche les tâches prévues sans rien exécuter")
+    common.add_argument("--report", type=Path, default=REPORT_PATH,
+                        help="rapport JSON de l'exécution (durées, lignes, mémoire, octets)")
+    cleaning = argparse.ArgumentParser(add_help=False)
+    cleaning.add_argument("--force", action="store_true",
+                          help="relance les nettoyages même si les entrées sont inchangées")
+    cleaning.add_argument("--profile", metavar="MOTIF",
+                          help='profile cProfile des stages correspondants, ex. "clean:dvf"')
+    sub.add_parser("collect", parents=[common], help="télécharge les fichiers BRONZE")
+    sub.add_parser("clean", parents=[common, cleaning], help="nettoie les fichiers BRONZE en place (→ SILVER)")
+    sub.add_parser("run", parents=[common, cleaning],
+                   help="téléchargements, nettoyages, enrichissement, GOLD et API (par défaut)")
 
-    # Nettoyage SEQUENTIEL
-    clean_dvf(BRONZE_DIR / "dvf.csv", SILVER_DIR / "transactions_residentiel.csv")
-    clean_logements_sociaux(BRONZE_DIR / "logement_sociaux.csv", SILVER_DIR / "logements_sociaux_programmes.csv")
-    clean_colleges(BRONZE_DIR / "colleges.csv", SILVER_DIR / "colleges_clean.csv")
-    clean_elementaires(BRONZE_DIR / "elementaire.csv", SILVER_DIR / "ecoles_elementaires_clean.csv")
-    clean_maternelles(BRONZE_DIR / "maternelle.csv", SILVER_DIR / "ecoles_maternelle_clean.csv")
-    clean_espaces_verts(BRONZE_DIR / "espace_verts.csv", SILVER_DIR / "espace_vert_clean.csv")
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Sans commande (ancien usage « python main.py [--force] ») : run
+    if not argv or argv[0] not in (*COMMANDS, "-h", "--help"):
+        argv = ["run", *argv]
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.datasets) - set(CLEANERS))
+    if unknown:
+        parser.error(f"jeux inconnus : {', '.join(unknown)} (connus : {', '.join(CLEANERS)})")
+    return args
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    results = main(force=getattr(args, "force", False), report=args.report,
+                   profile=getattr(args, "profile", None), command=args.command,
+                   datasets=args.datasets, dry_run=args.dry_run)
+    sys.exit(0 if all(r.status == "ok" for r in results.values()) else 1)
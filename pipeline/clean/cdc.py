@@ -0,0 +1,231 @@
+"""
+Détection des changements (CDC) entre deux BRONZE
+-------------------------------------------------
+Les exports opendata.paris.fr sont republiés en entier alors que seules
+quelques lignes changent d'une fois à l'autre (nouveaux points PAVDA,
+nouveaux programmes de logements sociaux). En mode delta, un nettoyeur :
+
+- calcule pour chaque clé métier (``pavda_idt``, ``Identifiant
+  livraison``, ...) un hash de ses lignes BRONZE, limité aux colonnes lues
+  par le nettoyeur ;
+- compare ces hashes à ceux de l'exécution précédente : clés insérées,
+  mises à jour, supprimées, inchangées ;
+- ne nettoie que les lignes des clés insérées ou mises à jour, retire de
+  la table SILVER existante les lignes des clés mises à jour ou
+  supprimées, et réécrit la table dans l'ordre du BRONZE ;
+- ajoute une entrée au journal des changements (``changelog.jsonl``) :
+  clés touchées et arrondissements concernés, pour invalider en aval
+  uniquement ce qui a changé (agrégats, cache de l'API).
+
+Une clé présente plusieurs fois dans le BRONZE est traitée comme un
+groupe : une ligne modifiée fait renettoyer tout le groupe.
+
+L'état (clé → hash) est gardé dans ``<table>.cdc/`` à côté de la table
+SILVER, avec la version du nettoyeur et la taille / date de la table
+écrite. Le diff s'applique à la table SILVER elle-même, relue avec son
+schéma explicite (``SCHEMAS``) en CSV comme en Parquet : pas de seconde
+copie de la table. Si la version change, si la table a été réécrite par
+ailleurs ou si l'état manque, le nettoyage est complet (entrée
+``"mode": "full"``).
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from pipeline.instrument import count, log, path_bytes
+from pipeline.silver_store import read_silver, write_silver
+
+STATE_FILE = "state.parquet"
+META_FILE = "meta.json"
+CHANGELOG_FILE = "changelog.jsonl"
+
+
+def cdc_dir(dst: str | Path) -> Path:
+    dst = Path(dst)
+    return dst.with_name(dst.name + ".cdc")
+
+
+def _keys(s: pd.Series) -> np.ndarray:
+    return s.astype("string").fillna("").to_numpy(dtype=object)
+
+
+def _ranks(codes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(rang de chaque ligne dans son code, ordre stable par code, débuts des groupes)."""
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    rank = np.empty(len(codes), dtype="int64")
+    rank[order] = np.arange(len(codes)) - np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+    return rank, order, starts
+
+
+def key_hashes(df: pd.DataFrame, key: str) -> pd.Series:
+    """Hash (uint64) des lignes de chaque clé, indexé par la clé dans l'ordre
+    de première apparition.
+
+    Chaque ligne est hachée avec son rang dans la clé, puis les hashes
+    d'une même clé sont combinés par XOR : le résultat dépend du contenu
+    et de l'ordre des lignes de la clé, pas de leur position dans le fichier.
+    """
+    codes, uniques = pd.factorize(_keys(df[key]))
+    if not len(codes):
+        return pd.Series(np.empty(0, "uint64"), index=pd.Index([], dtype=object))
+    rank, order, starts = _ranks(codes)
+    rows = pd.util.hash_pandas_object(df, index=False, categorize=False).to_numpy()
+    h = pd.util.hash_pandas_object(pd.DataFrame({"h": rows, "r": rank}), index=False).to_numpy()
+    return pd.Series(np.bitwise_xor.reduceat(h[order], starts), index=pd.Index(uniques, dtype=object))
+
+
+@dataclass
+class Delta:
+    inserted: pd.Index
+    updated: pd.Index
+    deleted: pd.Index
+    unchanged: int
+
+    def to_dict(self) -> dict:
+        return {"inserted": self.inserted.tolist(), "updated": self.updated.tolist(),
+                "deleted": self.deleted.tolist(), "unchanged": self.unchanged}
+
+
+def diff(previous: pd.Series, current: pd.Series) -> Delta:
+    """Clés insérées / mises à jour / supprimées entre deux états clé → hash."""
+    pos = previous.index.get_indexer(current.index)
+    found = pos >= 0
+    changed = current.to_numpy()[found] != previous.to_numpy()[pos[found]]
+    kept = np.zeros(len(previous), dtype=bool)
+    kept[pos[found]] = True
+    return Delta(
+        inserted=current.index[~found],
+        updated=current.index[found][changed],
+        deleted=previous.index[~kept],
+        unchanged=int((~changed).sum()),
+    )
+
+
+def _stamp(path: Path) -> list[int]:
+    return [path_bytes(path), path.stat().st_mtime_ns]
+
+
+def _load_state(path: Path, dst: Path, version: str) -> tuple[pd.Series, int] | None:
+    """(état clé → hash, lignes de la table) de l'exécution précédente, s'il vaut
+    pour `dst` et `version`."""
+    try:
+        meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+        if meta.get("version") != version or meta.get("silver") != _stamp(dst) or "rows" not in meta:
+            return None
+        state = pd.read_parquet(path / STATE_FILE)
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+    hashes = pd.Series(state["hash"].to_numpy("uint64"), index=pd.Index(state["key"].astype(str), dtype=object))
+    return hashes, meta["rows"]
+
+
+def _save_state(path: Path, dst: Path, hashes: pd.Series, version: str, key: str, rows: int) -> None:
+    tmp = path / (STATE_FILE + ".tmp")
+    pd.DataFrame({"key": hashes.index.astype(str), "hash": hashes.to_numpy()}).to_parquet(tmp, index=False)
+    tmp.replace(path / STATE_FILE)
+    meta = path / (META_FILE + ".tmp")
+    meta.write_text(json.dumps({"version": version, "key": key, "keys": len(hashes), "rows": rows,
+                                "silver": _stamp(dst)}), encoding="utf-8")
+    meta.replace(path / META_FILE)
+
+
+def _arrondissements(df: pd.DataFrame, col: str | None) -> list[int]:
+    if col is None or col not in df.columns:
+        return []
+    return sorted(int(a) for a in pd.to_numeric(df[col], errors="coerce").dropna().unique())
+
+
+def _bronze_order(bronze_keys: pd.Series, silver_keys: pd.Series, index: pd.Index) -> np.ndarray:
+    """Permutation des lignes SILVER dans l'ordre du BRONZE, comme un nettoyage complet.
+
+    La r-ième ligne SILVER d'une clé prend la position de la r-ième ligne
+    BRONZE de cette clé : les lignes d'une clé en double, même dispersées
+    dans le fichier, retrouvent leur place.
+    """
+    codes = index.get_indexer(_keys(bronze_keys))
+    _, order, starts = _ranks(codes)
+    sizes = np.diff(np.r_[starts, len(codes)])
+    first = np.empty(len(index), dtype="int64")
+    first[codes[order[starts]]] = starts
+    size = np.zeros(len(index), dtype="int64")
+    size[codes[order[starts]]] = sizes
+
+    out_codes = index.get_indexer(_keys(silver_keys))
+    rank, _, _ = _ranks(out_codes)
+    known = out_codes >= 0
+    pos = np.full(len(out_codes), len(codes), dtype="int64")  # clés inconnues : à la fin
+    c = out_codes[known]
+    pos[known] = order[first[c] + np.minimum(rank[known], size[c] - 1)]
+    return np.argsort(pos, kind="stable")
+
+
+def apply_delta(bronze: pd.DataFrame, dst: str | Path, table: str, key: str, silver_key: str,
+                clean: Callable[[pd.DataFrame], pd.DataFrame], version: str,
+                arrondissement: str | None = None, source: str | Path | None = None) -> int:
+    """Met à jour la table SILVER `dst` à partir du BRONZE complet `bronze`.
+
+    `key` : clé métier dans le BRONZE, `silver_key` : la même dans la table
+    SILVER ; `clean` nettoie un sous-ensemble de lignes BRONZE ; `version`
+    (``cleaner_version``) invalide l'état si le nettoyeur change ;
+    `arrondissement` : colonne SILVER reportée dans le journal.
+    Renvoie le nombre de lignes de la table SILVER (relue seulement s'il y
+    a des changements à appliquer).
+    """
+    dst = Path(dst)
+    state_dir = cdc_dir(dst)
+    hashes = key_hashes(bronze, key)
+    state = _load_state(state_dir, dst, version) if dst.exists() else None
+    entry = {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+             "source": str(source) if source else None, "table": table}
+
+    if state is None:
+        out = clean(bronze)
+        entry.update(mode="full", rows=len(out))
+        log("CDC", f"{table}: état absent, table ou nettoyeur modifiés : nettoyage complet")
+    else:
+        previous, rows = state
+        delta = diff(previous, hashes)
+        log("CDC", f"{table}: {len(delta.inserted):,} insérées, {len(delta.updated):,} mises à jour, "
+                   f"{len(delta.deleted):,} supprimées, {delta.unchanged:,} inchangées")
+        if not (len(delta.inserted) or len(delta.updated) or len(delta.deleted)):
+            entry.update(mode="delta", rows=rows, **delta.to_dict(), arrondissements=[])
+            _append(state_dir, entry)
+            return rows
+        old = read_silver(dst, table)
+        changed = delta.inserted.append(delta.updated)
+        fresh = clean(bronze[changed.get_indexer(_keys(bronze[key])) >= 0])
+        stale = delta.updated.append(delta.deleted).get_indexer(_keys(old[silver_key])) >= 0
+        count("cdc_lignes_retirees", len(old), len(old) - int(stale.sum()))
+        out = pd.concat([old[~stale], fresh], ignore_index=True)
+        out = out.iloc[_bronze_order(bronze[key], out[silver_key], hashes.index)].reset_index(drop=True)
+        entry.update(mode="delta", rows=len(out), **delta.to_dict(),
+                     arrondissements=sorted(set(_arrondissements(old[stale], arrondissement))
+                                            | set(_arrondissements(fresh, arrondissement))))
+
+    write_silver(out, dst, table)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    _save_state(state_dir, dst, hashes, version, key, len(out))
+    _append(state_dir, entry)
+    return len(out)
+
+
+def _append(state_dir: Path, entry: dict) -> None:
+    with open(state_dir / CHANGELOG_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def read_changelog(dst: str | Path, since: str | None = None) -> list[dict]:
+    """Entrées du journal d'une table SILVER (postérieures à la date ISO `since`)."""
+    path = cdc_dir(dst) / CHANGELOG_FILE
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return [e for e in entries if since is None or e["date"] > since]
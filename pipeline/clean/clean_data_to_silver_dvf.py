@@ -21,6 +21,13 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
+from pipeline.clean.csv_reader import read_bronze_csv
+from pipeline.clean.dvf_to_silver import KEEP_COLS, READ_DTYPES, clean_dvf_frame
+from pipeline.clean.kernels import extract_unique
+from pipeline.clean.specs import PARIS_CP_RE
+from pipeline.instrument import log, path_bytes, stage
+from pipeline.silver_store import SCHEMAS, write_silver
+
 # --- Dossiers ---
 ROOT = Path(__file__).resolve().parents[2]
 BRONZE = ROOT / "data" / "bronze"
@@ -37,78 +44,20 @@ def ensure_dirs():
 
 # ---------- 1. DVF -> SILVER ----------
 def build_silver_dvf(src: Path, out_path: Path) -> pd.DataFrame:
-    """Nettoie le fichier DVF pour ne garder que les ventes résidentielles à Paris."""
-
-    print(f"Lecture du fichier DVF : {src}")
-
-    # Lecture du CSV avec détection de séparateur
-    try:
-        df = pd.read_csv(src, sep=";", low_memory=False)
-        if "valeur_fonciere" not in df.columns:
-            df = pd.read_csv(src, sep=",", low_memory=False)
-    except Exception as e:
-        raise RuntimeError(f"Impossible de lire {src}: {e}")
-
-    # Supprimer lignes vides ou doublons d’en-têtes
-    df = df.dropna(how="all")
-    df = df[df["valeur_fonciere"] != "valeur_fonciere"]
-
-    # Conversion des nombres
-    for col in ["valeur_fonciere", "surface_reelle_bati", "nombre_pieces_principales"]:
-        if col in df.columns:
-            df[col] = (
-                df[col].astype(str)
-                .str.replace(",", ".", regex=False)
-                .str.replace(" ", "", regex=False)
-            )
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    # Filtrer Paris (75001 à 75020)
-    df = df[df["code_postal"].astype(str).str.match(r"750(0[1-9]|1[0-9]|20)", na=False)]
-    df["arrondissement"] = df["code_postal"].astype(str).str[-2:].astype(int)
-
-    # Date et année
-    df["date_mutation"] = pd.to_datetime(df["date_mutation"], errors="coerce")
-    df["annee"] = df["date_mutation"].dt.year
-
-    # Garde ventes résidentielles
-    df = df[df["nature_mutation"].isin(["Vente", "Vente en l'état futur d'achèvement"])]
-    df = df[df["type_local"].isin(["Appartement", "Maison"])]
-
-    # Prix/m² et nettoyage des outliers
-    df["prix_m2"] = df["valeur_fonciere"] / df["surface_reelle_bati"]
-    df = df[
-        (df["prix_m2"].between(500, 30000))
-        & (df["surface_reelle_bati"].between(8, 1000))
-    ]
-
-    # Typologie
-    df["typologie"] = pd.cut(
-        df["nombre_pieces_principales"],
-        bins=[-1, 1, 2, 3, 4, 100],
-        labels=["T1", "T2", "T3", "T4", "T5+"],
-    )
-
-    # Colonnes finales
-    cols = [
-        "id_mutation",
-        "date_mutation",
-        "annee",
-        "arrondissement",
-        "code_postal",
-        "type_local",
-        "typologie",
-        "surface_reelle_bati",
-        "nombre_pieces_principales",
-        "valeur_fonciere",
-        "prix_m2",
-        "longitude",
-        "latitude",
-    ]
-    df = df[[c for c in cols if c in df.columns]]
-
-    df.to_csv(out_path, index=False)
-    print(f"✅ {len(df):,} lignes nettoyées → {out_path}")
+    """Nettoie le fichier DVF pour ne garder que les ventes résidentielles à Paris.
+
+    Même traitement que ``pipeline.clean.dvf_to_silver`` (une ligne par
+    mutation, prix_m2 et typologie) ; renvoie la table écrite.
+    """
+    with stage("clean:dvf", src=src, dst=out_path) as st:
+        st.log(f"Lecture du fichier DVF : {src}")
+        df = read_bronze_csv(src, usecols=KEEP_COLS, dtype=READ_DTYPES)
+        st.rows_in = len(df)
+        df = clean_dvf_frame(df)
+
+        write_silver(df, out_path, "transactions_residentiel")
+        st.rows_out = len(df)
+        st.log(f"{len(df):,} lignes nettoyées → {out_path}")
     return df
 
 
@@ -116,59 +65,60 @@ def build_silver_dvf(src: Path, out_path: Path) -> pd.DataFrame:
 def build_silver_logements_sociaux(src: Path, out_prog: Path, out_agg: Path):
     """Nettoie les logements sociaux depuis le CSV et crée une version agrégée (arrondissement / année)."""
 
-    print(f"Lecture du fichier logements sociaux : {src}")
-
-    # Lecture CSV (détection du séparateur)
-    try:
-        df = pd.read_csv(src, sep=";", low_memory=False)
-        if "Année du financement - agrément" not in df.columns:
-            df = pd.read_csv(src, sep=",", low_memory=False)
-    except Exception as e:
-        raise RuntimeError(f"Impossible de lire {src}: {e}")
-
-    # Renommage des colonnes
-    rename = {
-        "Année du financement - agrément": "annee",
-        "Arrondissement": "arrondissement",
-        "Nombre total de logements financés": "nb_total",
-        "Dont nombre de logements PLA I": "nb_plai",
-        "Dont nombre de logements PLUS": "nb_plus",
-        "Dont nombre de logements PLUS CD": "nb_plus_cd",
-        "Dont nombre de logements PLS": "nb_pls",
-        "Bailleur social": "bailleur",
-        "Code postal": "code_postal",
-        "Adresse du programme": "adresse",
-        "Mode de réalisation": "mode_realisation",
-        "Ville": "ville",
-        "Identifiant livraison": "id_programme",
-    }
-    df.rename(columns={k: v for k, v in rename.items() if k in df.columns}, inplace=True)
-
-    # Garder Paris uniquement
-    if "code_postal" in df.columns:
-        df = df[df["code_postal"].astype(str).str.match(r"750(0[1-9]|1[0-9]|20)", na=False)]
-        df["arrondissement"] = df["code_postal"].astype(str).str[-2:].astype(int)
-
-    # Conversion numérique
-    numeric_cols = ["annee", "arrondissement", "nb_total", "nb_plai", "nb_plus", "nb_plus_cd", "nb_pls"]
-    for c in numeric_cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    # Export programmes détaillés
-    df.to_csv(out_prog, index=False)
-    print(f"✅ {len(df):,} programmes sauvegardés dans {out_prog}")
-
-    # Agrégat arrondissement / année
-    agg = (
-        df.groupby(["arrondissement", "annee"], dropna=True)
-        [["nb_total", "nb_plai", "nb_plus", "nb_plus_cd", "nb_pls"]]
-        .sum()
-        .reset_index()
-        .sort_values(["annee", "arrondissement"])
-    )
-    agg.to_csv(out_agg, index=False)
-    print(f"✅ {len(agg):,} lignes agrégées sauvegardées dans {out_agg}")
+    with stage("clean:logements_sociaux", "LOGEMENTS", src=src, dst=out_prog) as st:
+        st.log(f"Lecture du fichier logements sociaux : {src}")
+
+        # Renommage des colonnes
+        rename = {
+            "Année du financement - agrément": "annee",
+            "Arrondissement": "arrondissement",
+            "Nombre total de logements financés": "nb_total",
+            "Dont nombre de logements PLA I": "nb_plai",
+            "Dont nombre de logements PLUS": "nb_plus",
+            "Dont nombre de logements PLUS CD": "nb_plus_cd",
+            "Dont nombre de logements PLS": "nb_pls",
+            "Bailleur social": "bailleur",
+            "Code postal": "code_postal",
+            "Adresse du programme": "adresse",
+            "Mode de réalisation": "mode_realisation",
+            "Ville": "ville",
+            "Identifiant livraison": "id_programme",
+        }
+
+        # Lecture CSV (séparateur deviné, colonnes renommées uniquement)
+        df = read_bronze_csv(src, usecols=list(rename))
+        st.rows_in = len(df)
+        df.rename(columns={k: v for k, v in rename.items() if k in df.columns}, inplace=True)
+
+        # Garder Paris uniquement
+        if "code_postal" in df.columns:
+            arr = extract_unique(df["code_postal"], PARIS_CP_RE)
+            df = df[arr.notna()].copy()
+            df["arrondissement"] = arr[arr.notna()].astype(int)
+
+        # Conversion numérique
+        numeric_cols = ["annee", "arrondissement", "nb_total", "nb_plai", "nb_plus", "nb_plus_cd", "nb_pls"]
+        for c in numeric_cols:
+            if c in df.columns:
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+
+        # Export programmes détaillés (mêmes colonnes que logements_sociaux_to_silver)
+        keep = [c for c in SCHEMAS["logements_sociaux_programmes"] if c in df.columns]
+        write_silver(df[keep], out_prog, "logements_sociaux_programmes")
+        st.log(f"{len(df):,} programmes sauvegardés dans {out_prog}")
+
+        # Agrégat arrondissement / année
+        agg = (
+            df.groupby(["arrondissement", "annee"], dropna=True)
+            [["nb_total", "nb_plai", "nb_plus", "nb_plus_cd", "nb_pls"]]
+            .sum()
+            .reset_index()
+            .sort_values(["annee", "arrondissement"])
+        )
+        write_silver(agg, out_agg, "logements_sociaux_arr_annee")
+        st.bytes_written += path_bytes(out_agg)
+        st.rows_out = len(df)
+        st.log(f"{len(agg):,} lignes agrégées sauvegardées dans {out_agg}")
 
     return df, agg
 
@@ -181,11 +131,7 @@ def main():
     prog_out = SILVER / "logements_sociaux_programmes.csv"
     agg_out = SILVER / "logements_sociaux_arr_annee.csv"
 
-    print("=== Nettoyage DVF ===")
     build_silver_dvf(DVF_CSV, dvf_out)
-
-    print("\n=== Nettoyage Logements Sociaux ===")
     build_silver_logements_sociaux(LS_CSV, prog_out, agg_out)
-
-    print("\n✅ Toutes les tables SILVER ont été générées avec succès.")
+    log("SILVER", "Toutes les tables SILVER ont été générées.")
 
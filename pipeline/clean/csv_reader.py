@@ -0,0 +1,119 @@
+"""
+Lecture BRONZE partagée par tous les nettoyeurs
+-----------------------------------------------
+- le séparateur est deviné une seule fois à partir des premiers octets
+  (plus de double lecture ``sep=";"`` puis ``sep=","``) ;
+- seules les colonnes déclarées par le nettoyeur sont lues (``usecols``) ;
+- les dtypes sont appliqués pendant le parsing ;
+- les fichiers compressés (``.gz``, ``.bz2``, ``.xz``) sont lus directement.
+"""
+
+import bz2
+import csv
+import gzip
+import lzma
+from pathlib import Path
+
+import pandas as pd
+
+# Octets inspectés pour deviner le séparateur
+SNIFF_BYTES = 64 * 1024
+CANDIDATE_SEPS = (";", ",", "\t", "|")
+# Extension → module de décompression (pandas déduit la même chose de l'extension)
+COMPRESSED = {".gz": gzip, ".bz2": bz2, ".xz": lzma}
+
+
+def _open_text(path: str | Path):
+    opener = COMPRESSED.get(Path(path).suffix)
+    if opener is not None:
+        return opener.open(path, "rt", encoding="utf-8-sig", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8-sig", errors="replace", newline="")
+
+
+def sniff_sep(path: str | Path) -> str:
+    """Devine le séparateur à partir du début du fichier.
+
+    Chaque candidat découpe l'échantillon (guillemets respectés) ; on garde
+    celui qui donne le plus de colonnes avec un nombre de champs constant
+    d'une ligne à l'autre. Les virgules des champs GeoJSON entre guillemets
+    ne faussent donc pas la détection.
+    """
+    with _open_text(path) as f:
+        sample = f.read(SNIFF_BYTES)
+    lines = sample.splitlines(keepends=True)
+    if len(lines) > 1 and len(sample) == SNIFF_BYTES:
+        lines = lines[:-1]  # dernière ligne probablement tronquée
+
+    best, best_score = ",", 0
+    for sep in CANDIDATE_SEPS:
+        try:
+            rows = list(csv.reader(lines, delimiter=sep))
+        except csv.Error:
+            continue
+        if not rows or len(rows[0]) < 2:
+            continue
+        width = len(rows[0])
+        consistent = all(len(r) == width for r in rows[1:] if r)
+        score = width if consistent else 0
+        if score > best_score:
+            best, best_score = sep, score
+    return best
+
+
+def header_columns(path: str | Path, sep: str, strip: bool = True) -> list[str]:
+    with _open_text(path) as f:
+        row = next(csv.reader(f, delimiter=sep), [])
+    return [c.strip() for c in row] if strip else row
+
+
+def _stripped_chunks(reader):
+    """Morceaux de `reader`, colonnes renommées comme en lecture d'une traite."""
+    with reader:
+        for chunk in reader:
+            chunk.columns = [c.strip() for c in chunk.columns]
+            yield chunk
+
+
+def read_bronze_csv(path: str | Path,
+                    usecols: list[str] | None = None,
+                    dtype=str,
+                    required: list[str] | None = None,
+                    chunksize: int | None = None):
+    """Lit un CSV BRONZE en une seule passe.
+
+    `usecols` : colonnes voulues (celles absentes du fichier sont ignorées) ;
+    `required` : colonnes dont l'absence est une erreur ; `dtype` : dtype
+    unique ou dict par colonne. Les noms de colonnes sont partout pris sans
+    les espaces autour, y compris dans le résultat.
+    Avec `chunksize`, renvoie un itérateur de DataFrames.
+    """
+    path = Path(path)
+    try:
+        sep = sniff_sep(path)
+        raw = header_columns(path, sep, strip=False)
+        columns = [c.strip() for c in raw]
+    except Exception as e:
+        raise RuntimeError(f"Lecture CSV échouée pour {path}: {e}")
+
+    if required:
+        missing = [c for c in required if c not in columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes: {missing}\nColonnes trouvées: {columns}")
+
+    if isinstance(dtype, dict):
+        # read_csv associe les dtypes aux noms tels qu'écrits dans le fichier
+        dtype = {r: dtype[c] for r, c in zip(raw, columns) if c in dtype}
+
+    wanted = set(usecols) if usecols is not None else None
+    try:
+        df = pd.read_csv(
+            path, sep=sep, encoding="utf-8-sig", dtype=dtype,
+            usecols=(lambda c: c.strip() in wanted) if wanted is not None else None,
+            chunksize=chunksize, low_memory=False,
+        )
+    except Exception as e:
+        raise RuntimeError(f"Lecture CSV échouée pour {path}: {e}")
+    if chunksize:
+        return _stripped_chunks(df)
+    df.columns = [c.strip() for c in df.columns]
+    return df
@@ -2,128 +2,140 @@
 # -*- coding: utf-8 -*-
 
 from pathlib import Path
+import numpy as np
 import pandas as pd  # type: ignore
-import re
-import json
-import argparse
 
-# ---------- Utils lecture & parsing ----------
-def guess_read_csv(path: Path) -> pd.DataFrame:
-    try:
-        df = pd.read_csv(path, sep=";", dtype=str, low_memory=False)
-        if df.shape[1] < 2:
-            df = pd.read_csv(path, sep=",", dtype=str, low_memory=False)
-        return df
-    except Exception as e:
-        raise RuntimeError(f"Lecture CSV échouée pour {path}: {e}")
-
-def parse_lon_lat_from_point(s: str):
-    if not isinstance(s, str):
-        return (None, None)
-    # format "lat, lon"
-    m = re.match(r"\s*([\-0-9.]+)\s*,\s*([\-0-9.]+)\s*$", s)
-    if m:
-        lat = pd.to_numeric(m.group(1), errors="coerce")
-        lon = pd.to_numeric(m.group(2), errors="coerce")
-        return (lon, lat)
-    return (None, None)
-
-def parse_lon_lat_from_geojson(s: str):
-    if not isinstance(s, str):
-        return (None, None)
+from pipeline.clean.cdc import apply_delta
+from pipeline.clean.csv_reader import read_bronze_csv
+from pipeline.clean.kernels import extract_unique
+from pipeline.instrument import count, stage
+from pipeline.manifest import cleaner_version
+from pipeline.silver_store import write_silver
+
+# ---------- Parsing vectorisé (colonnes entières) ----------
+# Nombres décimaux stricts : tout ce qui matche se convertit sans erreur
+_NUM = r"-?\d+(?:\.\d*)?|-?\.\d+"
+_POINT_RE = rf"^\s*(?P<a>{_NUM})\s*,\s*(?P<b>{_NUM})\s*$"
+# Position GeoJSON [lon, lat] ou [lon, lat, altitude] (altitude ignorée)
+_ALT = rf"(?:\s*,\s*(?:{_NUM}))?"
+_GEOJSON_COORDS_RE = rf'"*coordinates"*\s*:\s*\[\s*(?P<a>{_NUM})\s*,\s*(?P<b>{_NUM}){_ALT}\s*\]'
+_GEOJSON_FALLBACK_RE = rf"\[(?P<a>{_NUM})\s*,\s*(?P<b>{_NUM}){_ALT}\]"
+
+def _extract_float_pair(s: pd.Series, regex: str) -> tuple[np.ndarray, np.ndarray]:
+    """Extrait les groupes a/b de `regex` en float64 (NaN si pas de correspondance).
+
+    Utilise le moteur regex de pyarrow s'il est installé (bien plus rapide
+    sur de grandes colonnes), sinon pandas.
+    """
     try:
-        obj = json.loads(s.replace('""','"'))
-        coords = obj.get("coordinates") if isinstance(obj, dict) else None
-        if coords and len(coords) >= 2:
-            lon = pd.to_numeric(coords[0], errors="coerce")
-            lat = pd.to_numeric(coords[1], errors="coerce")
-            return (lon, lat)
-    except Exception:
-        pass
-    # fallback regex
-    m = re.search(r"\[([\-0-9.]+)\s*,\s*([\-0-9.]+)\]", s)
-    if m:
-        lon = pd.to_numeric(m.group(1), errors="coerce")
-        lat = pd.to_numeric(m.group(2), errors="coerce")
-        return (lon, lat)
-    return (None, None)
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        parts = s.astype(object).str.extract(regex)
+        return parts["a"].astype("float64").to_numpy(), parts["b"].astype("float64").to_numpy()
+
+    arr = pa.array(s.astype(object), type=pa.string(), from_pandas=True)
+    parts = pc.extract_regex(arr, regex)
+    return tuple(
+        pc.cast(pc.struct_field(parts, k), pa.float64()).to_numpy(zero_copy_only=False) for k in ("a", "b")
+    )
+
+def parse_lon_lat_points(s: pd.Series) -> pd.DataFrame:
+    """Points au format "lat, lon" → colonnes longitude/latitude (NaN si illisible)."""
+    lat, lon = _extract_float_pair(s, _POINT_RE)
+    return pd.DataFrame({"longitude": lon, "latitude": lat}, index=s.index)
+
+def parse_lon_lat_geojsons(s: pd.Series) -> pd.DataFrame:
+    """Géométries GeoJSON → "coordinates" du Point, sinon première position
+    [lon, lat] (ou [lon, lat, altitude]) trouvée dans la géométrie."""
+    lon, lat = _extract_float_pair(s, _GEOJSON_COORDS_RE)
+    out = pd.DataFrame({"longitude": lon, "latitude": lat}, index=s.index)
+    missing = out["longitude"].isna() | out["latitude"].isna()
+    if missing.any():
+        lon, lat = _extract_float_pair(s[missing], _GEOJSON_FALLBACK_RE)
+        out.loc[missing, "longitude"] = lon
+        out.loc[missing, "latitude"] = lat
+    return out
 
-# ---------- Fonction principale ----------
-def clean_dechets_silver(
-    src: str | Path = "data/bronze/abribac_dechets_alimentaires.csv",
-    dst: str | Path = "data/silver/abribac_dechets_alimentaires.csv",
-) -> Path:
-    """Nettoie le CSV PAVDA et écrit une version silver.
-    Compatible avec ton main() (pas d'argparse quand appelée en lib).
+def parse_lon_lat(df: pd.DataFrame) -> pd.DataFrame:
+    """Coordonnées depuis geo_point_2d, complétées par geo_shape.
+
+    Le repli se fait par paire (lon, lat) et uniquement si la valeur est
+    absente : une coordonnée légitime à 0.0 est conservée.
     """
-    src, dst = Path(src), Path(dst)
-    dst.parent.mkdir(parents=True, exist_ok=True)
+    out = pd.DataFrame({"longitude": float("nan"), "latitude": float("nan")}, index=df.index)
+    if "geo_point_2d" in df.columns:
+        out = parse_lon_lat_points(df["geo_point_2d"])
+    if "geo_shape" in df.columns:
+        missing = out["longitude"].isna() | out["latitude"].isna()
+        if missing.any():
+            shape = parse_lon_lat_geojsons(df.loc[missing, "geo_shape"])
+            out.loc[missing, ["longitude", "latitude"]] = shape.to_numpy()
+    return out
 
-    print(f"[ABRIBAC] Lecture: {src}")
-    df = guess_read_csv(src).dropna(how="all")
-    df.columns = [c.strip() for c in df.columns]  # trims entêtes
-
-    # --- RENOMMAGE ROBUSTE ---
-    rename = {
-        # anciens jeux "éducation" (si jamais)
-        "Type d'établissement - Année scolaire": "type_annee_scolaire",
-        "Libellé établissement": "etablissement",
-        #"Adresse": "adresse",
-        "Arrondissement": "arrondissement_txt",
-        "Code INSEE": "code_insee",
-        #"Année scolaire": "annee_scolaire",
-        #"Type établissement": "type_etablissement",
-
-        # jeu PAVDA (ton échantillon)
-        #"adr": "adresse",
-        "arrdt": "arrondissement_txt",   # ex: 75005 -> on en tire 05
-        "pavda_idt": "pavda_id",
-        #"pavda_etat": "etat",
-        #"cquartier": "quartier",
-        #"point_x": "point_x",
-        #"point_y": "point_y",
-
-        # géo (communs)
-        #"geo_shape": "geo_shape",
-        #"geo_point_2d": "geo_point_2d",
-    }
-    df.rename(columns={k: v for k, v in rename.items() if k in df.columns}, inplace=True)
+# ---------- Renommage robuste ----------
+RENAME = {
+    # anciens jeux "éducation" (si jamais)
+    "Type d'établissement - Année scolaire": "type_annee_scolaire",
+    "Libellé établissement": "etablissement",
+    #"Adresse": "adresse",
+    "Arrondissement": "arrondissement_txt",
+    "Code INSEE": "code_insee",
+    #"Année scolaire": "annee_scolaire",
+    #"Type établissement": "type_etablissement",
+
+    # jeu PAVDA (ton échantillon)
+    #"adr": "adresse",
+    "arrdt": "arrondissement_txt",   # ex: 75005 -> on en tire 05
+    "pavda_idt": "pavda_id",
+    #"pavda_etat": "etat",
+    #"cquartier": "quartier",
+    #"point_x": "point_x",
+    #"point_y": "point_y",
+
+    # géo (communs)
+    #"geo_shape": "geo_shape",
+    #"geo_point_2d": "geo_point_2d",
+}
+
+
+# Lecture des seules colonnes utiles (séparateur deviné, entêtes trimées)
+USECOLS = list(RENAME) + ["type_etablissement", "geo_point_2d", "geo_shape"]
+
+
+def _clean_pavda_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Lignes BRONZE PAVDA → lignes SILVER (arrondissement, longitude/latitude)."""
+    n = len(df)
+    df = df.dropna(how="all")
+    count("lignes_vides", n, len(df))
+    df = df.rename(columns={k: v for k, v in RENAME.items() if k in df.columns})
 
     # --- ARRONDISSEMENT ---
     # 1) depuis code_insee (751xx)
     arr_num = None
     if "code_insee" in df.columns:
-        arr_num = df["code_insee"].astype(str).str.extract(r"^751(\d{2})$", expand=False)
+        arr_num = extract_unique(df["code_insee"], r"^751(\d{2})$")
 
     # 2) sinon depuis arrondissement_txt
     if arr_num is None or arr_num.isna().all():
         if "arrondissement_txt" in df.columns:
-            txt = df["arrondissement_txt"].astype(str).str.strip()
+            txt = df["arrondissement_txt"]
             # CP de type 75005
-            arr_num = txt.str.extract(r"^750(\d{2})$", expand=False)
+            arr_num = extract_unique(txt, r"^\s*750(\d{2})\s*$")
             # sinon formats "5", "5e", "5ème", "05", "5eme", etc.
-            arr_num = arr_num.fillna(txt.str.extract(r"(\d{1,2})", expand=False))
+            arr_num = arr_num.fillna(extract_unique(txt, r"(\d{1,2})"))
 
     if arr_num is not None:
         df["arrondissement"] = pd.to_numeric(arr_num, errors="coerce")
-        df["arrondissement_str"] = df["arrondissement"].apply(
-            lambda x: f"{int(x):02d}" if pd.notna(x) and 1 <= int(x) <= 20 else None
+        in_paris = df["arrondissement"].between(1, 20)
+        df["arrondissement_str"] = (
+            df["arrondissement"].where(in_paris).astype("Int64").astype("string").str.zfill(2)
         )
 
     # --- LON/LAT (priorité geo_point_2d, fallback geo_shape) ---
-    if "geo_point_2d" in df.columns:
-        lon_lat_point = df["geo_point_2d"].apply(parse_lon_lat_from_point).tolist()
-    else:
-        lon_lat_point = [(None, None)] * len(df)
-
-    if "geo_shape" in df.columns:
-        lon_lat_shape = df["geo_shape"].apply(parse_lon_lat_from_geojson).tolist()
-        lon_lat = [(lon or lon2, lat or lat2) for (lon, lat), (lon2, lat2) in zip(lon_lat_point, lon_lat_shape)]
-    else:
-        lon_lat = lon_lat_point
-
-    df["longitude"] = [t[0] for t in lon_lat]
-    df["latitude"]  = [t[1] for t in lon_lat]
+    lon_lat = parse_lon_lat(df)
+    df["longitude"] = lon_lat["longitude"]
+    df["latitude"] = lon_lat["latitude"]
 
     # --- STABILISER LE SCHÉMA (cols vides si absentes) ---
     for col in ["arrondissement", "arrondissement_str"]:
@@ -148,9 +160,35 @@ def clean_dechets_silver(
         "arrondissement",
         #"arrondissement_str",
     ]
-    keep = [c for c in all_cols if c in df.columns]
+    return df[[c for c in all_cols if c in df.columns]]
 
-    df[keep].to_csv(dst, index=False)
-    out = dst.resolve()
-    print(f"[ABRIBAC] OK: {len(df):,} lignes → {out}")
-    return out
+
+# ---------- Fonction principale ----------
+def clean_dechets_silver(
+    src: str | Path = "data/bronze/abribac_dechets_alimentaires.csv",
+    dst: str | Path = "data/silver/abribac_dechets_alimentaires.csv",
+    delta: bool = True,
+) -> Path:
+    """Nettoie le CSV PAVDA et écrit une version silver.
+    Compatible avec ton main() (pas d'argparse quand appelée en lib).
+
+    Avec `delta`, seuls les points (``pavda_idt``) nouveaux ou modifiés
+    depuis l'exécution précédente sont nettoyés (voir pipeline.clean.cdc).
+    """
+    src, dst = Path(src), Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+
+    with stage("clean:abribac", "ABRIBAC", src=src, dst=dst) as st:
+        st.log(f"Lecture: {src}")
+        df = read_bronze_csv(src, usecols=USECOLS)
+        st.rows_in = len(df)
+        if delta and "pavda_idt" in df.columns:
+            st.rows_out = apply_delta(df, dst, "abribac_dechets_alimentaires", "pavda_idt", "pavda_id",
+                                      _clean_pavda_frame, cleaner_version(clean_dechets_silver),
+                                      arrondissement="arrondissement", source=src)
+        else:
+            out = _clean_pavda_frame(df)
+            write_silver(out, dst, "abribac_dechets_alimentaires")
+            st.rows_out = len(out)
+        st.log(f"OK: {st.rows_out:,} lignes → {dst.resolve()}")
+    return dst.resolve()
@@ -1,70 +1,445 @@
+"""
+DVF → SILVER (transactions_residentiel)
+---------------------------------------
+Chemin unique de nettoyage DVF : une ligne SILVER par mutation.
+
+Dans DVF, une mutation vendant plusieurs locaux (appartement + cave,
+deux lots, ...) apparaît sur plusieurs lignes qui répètent toutes la
+valeur foncière de la mutation entière. Sommer ou moyenner ces lignes
+gonfle les prix ; on regroupe donc par ``id_mutation`` :
+
+- valeur foncière : celle de la mutation (une seule fois) ;
+- surface et pièces : somme sur les locaux d'habitation (Appartement,
+  Maison) ; les dépendances n'ont pas de surface bâtie ;
+- mutations contenant un local commercial ou industriel : exclues, la
+  part habitation du prix n'est pas connue ;
+- ``prix_m2`` = valeur / surface totale, bornes 500–30 000 €/m² et
+  8–1 000 m² comme jusqu'ici ;
+- ``typologie`` (T1 … T5+) pour les ventes d'un seul logement, vide pour
+  les ventes de plusieurs logements (nb_locaux > 1).
+
+DVF est publié par année : ``clean_dvf`` accepte aussi un dossier ou un
+motif glob de fichiers annuels, éventuellement compressés, nettoyés en
+parallèle (une partition SILVER par fichier dans ``<table SILVER>.parts/``)
+puis réunis ; seuls les fichiers modifiés sont retraités.
+
+Chaque unité de nettoyage (fichier, chunk, partition) produit aussi les
+sketchs de quantiles du prix/m² (``pipeline.gold.sketch``) par
+arrondissement × annee × type_local × typologie ; ils sont fusionnés au
+fil de l'eau et entre processus, et écrits à côté de la table
+(``<table SILVER>.sketch.parquet``). Le GOLD en tire médianes, déciles et
+bornes IQR par groupe sans regrouper les transactions en mémoire.
+
+Tous les filtres (Paris, nature de mutation, type de local) portent sur
+des colonnes catégorielles et passent avant la conversion des nombres et
+des dates, qui ne concerne donc que les lignes conservées. Les dates sont
+converties après regroupement (une par mutation).
+"""
+
+import glob
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from pipeline.clean.csv_reader import read_bronze_csv
+from pipeline.clean.kernels import PARIS_CP, arrondissement_from_cp, normalize_cp, parse_date, parse_number
+from pipeline.gold.sketch import merge_long, read_long, sketch_long, write_long
+from pipeline.instrument import collect, count, keep, stage
+from pipeline.manifest import cleaner_version, file_hash
+from pipeline.silver_store import SilverWriter, is_parquet, write_silver
+from pipeline.spatial_index import GridIndex, build_spatial_index, index_path
+
+KEEP_COLS = [
+    "id_mutation","date_mutation","nature_mutation","valeur_fonciere",
+    "code_postal","type_local","surface_reelle_bati",
+    "nombre_pieces_principales","longitude","latitude"
+]
+
+# Types appliqués au parsing : texte à faible cardinalité en catégories,
+# identifiants et dates en texte. Les colonnes numériques sont laissées à
+# l'inférence du parseur C (float64 direct, bien plus rapide que du texte) ;
+# une colonne au format français ou avec des en-têtes répétés reste en
+# texte et passe par ``parse_number`` (pipeline/clean/kernels.py).
+READ_DTYPES = {
+    "id_mutation": str,
+    "date_mutation": str,
+    "nature_mutation": "category",
+    "type_local": "category",
+    "code_postal": "category",
+}
+
+# Taille de chunk par défaut en mode streaming (nombre de lignes)
+DEFAULT_CHUNKSIZE = 200_000
+
+# Fichiers annuels reconnus dans un dossier DVF (compression déduite de l'extension)
+SOURCE_PATTERNS = ("*.csv", "*.csv.gz", "*.csv.bz2", "*.csv.xz")
+
+VENTES = ["Vente", "Vente en l'état futur d'achèvement"]
+LOGEMENTS = ["Appartement", "Maison"]
+# Locaux dont la présence rend le prix/m² d'habitation non interprétable
+LOCAUX_EXCLUS = ["Local industriel. commercial ou assimilé"]
+PRIX_M2_BORNES = (500, 30000)
+SURFACE_BORNES = (8, 1000)
+TYPOLOGIE_BINS = [-1, 1, 2, 3, 4, 100]
+TYPOLOGIE_LABELS = ["T1", "T2", "T3", "T4", "T5+"]
+
+# Grain des sketchs de prix/m² (grain le plus fin du cube GOLD)
+SKETCH_KEYS = ["arrondissement", "annee", "type_local", "typologie"]
+
+SILVER_COLS = [
+    "id_mutation", "date_mutation", "annee", "arrondissement", "code_postal",
+    "nature_mutation", "type_local", "typologie", "nb_locaux",
+    "surface_reelle_bati", "nombre_pieces_principales", "valeur_fonciere",
+    "prix_m2", "longitude", "latitude",
+]
+
+
+def clean_dvf_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Nettoie un DataFrame DVF brut (fichier complet ou chunk) → une ligne par mutation.
+
+    Les lignes d'une même mutation doivent être dans le même DataFrame
+    (voir ``_clean_dvf_streaming``).
+    """
+    # Filtres sur colonnes catégorielles (les en-têtes répétés ne passent pas) ;
+    # codes postaux normalisés d'abord (" 75001", "75001.0" d'un export lu en nombres)
+    df = df.assign(code_postal=normalize_cp(df["code_postal"]))
+    df = keep("paris", df, df["code_postal"].isin(list(PARIS_CP)))
+    df = keep("ventes", df, df["nature_mutation"].isin(VENTES))
+    exclues = df.loc[df["type_local"].isin(LOCAUX_EXCLUS), "id_mutation"].unique()
+    df = keep("locaux_exclus", df, ~df["id_mutation"].isin(exclues))
+    df = keep("logements", df, df["type_local"].isin(LOGEMENTS))
+
+    df = df.assign(
+        surface_reelle_bati=parse_number(df["surface_reelle_bati"]),
+        nombre_pieces_principales=parse_number(df["nombre_pieces_principales"]),
+    )
+
+    # Une ligne par mutation
+    g = df.groupby("id_mutation", sort=False)
+    mut = g[["date_mutation", "nature_mutation", "valeur_fonciere", "code_postal",
+             "type_local", "longitude", "latitude"]].first()
+    mut = mut.join(g[["surface_reelle_bati", "nombre_pieces_principales"]].sum(min_count=1))
+    mut = mut.assign(nb_locaux=g.size()).reset_index()
+    count("une_ligne_par_mutation", len(df), len(mut))
+
+    mut["valeur_fonciere"] = parse_number(mut["valeur_fonciere"])
+    mut["longitude"] = parse_number(mut["longitude"])
+    mut["latitude"] = parse_number(mut["latitude"])
+    mut["date_mutation"] = parse_date(mut["date_mutation"])
+    mut["annee"] = mut["date_mutation"].dt.year.astype("Int16")
+    mut["arrondissement"] = arrondissement_from_cp(mut["code_postal"])
+
+    # Prix/m² et valeurs aberrantes
+    mut["prix_m2"] = mut["valeur_fonciere"] / mut["surface_reelle_bati"]
+    mut = keep("bornes_prix_surface", mut,
+               mut["prix_m2"].between(*PRIX_M2_BORNES)
+               & mut["surface_reelle_bati"].between(*SURFACE_BORNES))
+
+    # Typologie : ventes d'un seul logement
+    pieces = mut["nombre_pieces_principales"].where(mut["nb_locaux"] == 1)
+    mut = mut.assign(typologie=pd.cut(pieces, bins=TYPOLOGIE_BINS, labels=TYPOLOGIE_LABELS,
+                                                  ordered=False))
+    return mut[SILVER_COLS]
+
+
+def sketch_path(dst_path: str | Path) -> Path:
+    """Sketchs de prix/m² d'une table SILVER : ``transactions_residentiel.csv.sketch.parquet``."""
+    dst_path = Path(dst_path)
+    return dst_path.with_name(dst_path.name + ".sketch.parquet")
+
+
+def prix_m2_sketch(mut: pd.DataFrame) -> pd.DataFrame:
+    """Sketchs (forme longue) du prix/m² de transactions SILVER par SKETCH_KEYS.
+
+    Clés en types simples (texte, entiers) : les sketchs de fichiers
+    différents se fusionnent quelles que soient leurs catégories.
+    """
+    keys = mut[SKETCH_KEYS].astype({"arrondissement": "Int16", "annee": "Int16",
+                                    "type_local": "string", "typologie": "string"})
+    return sketch_long(keys.assign(prix_m2=mut["prix_m2"]), SKETCH_KEYS, "prix_m2")
+
 
 def clean_dvf(src: str = "data/bronze/dvf.csv",
-              dst: str = "data/silver/transactions_residentiel.csv") -> None:
+              dst: str = "data/silver/transactions_residentiel.csv",
+              chunksize: int | None = None,
+              workers: int | None = None) -> None:
     """
-    Nettoie le CSV DVF pour ne garder que les transactions résidentielles à Paris.
+    Nettoie le CSV DVF pour ne garder que les ventes résidentielles à Paris,
+    une ligne par mutation avec prix_m2 et typologie (voir le docstring du module).
+
+    `src` est un fichier, ou un dossier / motif glob de fichiers annuels
+    (``.csv``, ``.csv.gz``, ``.csv.bz2``, ``.csv.xz``) : chaque fichier est
+    alors nettoyé dans sa propre partition SILVER, en parallèle sur
+    `workers` processus (un par cœur par défaut), puis les partitions sont
+    réunies dans `dst`. Seuls les fichiers modifiés depuis la dernière
+    exécution (ou dont le nettoyeur a changé) sont retraités : remplacer le
+    fichier d'une année ne recalcule que cette année.
+
+    Si `chunksize` est fourni, chaque fichier est lu par morceaux de
+    `chunksize` lignes (colonnes utiles uniquement) et chaque morceau
+    filtré est ajouté au fichier silver : la mémoire reste bornée quelle
+    que soit la taille de l'entrée, et la sortie est identique au mode en
+    une passe.
+
+    Un `dst` en ``.parquet`` produit un dataset typé partitionné par
+    annee/arrondissement (voir pipeline.silver_store).
+
+    L'index spatial des coordonnées est écrit à côté de la table (voir
+    pipeline.spatial_index), les sketchs de prix/m² dans ``sketch_path(dst)`` ;
+    en mode partitionné, tous deux sont fusionnés depuis ceux des partitions.
     """
     src_path = Path(src)
     dst_path = Path(dst)
     dst_path.parent.mkdir(parents=True, exist_ok=True)
 
-    print(f"[DVF] Lecture: {src_path}")
-    
-    # Essaye ; puis , si nécessaire
-    try:
-        df = pd.read_csv(src_path, sep=";", dtype=str, low_memory=False)
-        if "valeur_fonciere" not in df.columns:
-            df = pd.read_csv(src_path, sep=",", dtype=str, low_memory=False)
-    except Exception as e:
-        raise RuntimeError(f"Lecture CSV échouée pour {src_path}: {e}")
-
-    df = df.dropna(how="all")
-
-    # En-têtes dupliquées
-    if "valeur_fonciere" in df.columns:
-        df = df[df["valeur_fonciere"] != "valeur_fonciere"]
-
-    keep_cols = [
-        "id_mutation","date_mutation","nature_mutation","valeur_fonciere",
-        "code_postal","type_local","surface_reelle_bati",
-        "nombre_pieces_principales","longitude","latitude"
-    ]
-    df = df[[c for c in keep_cols if c in df.columns]].copy()
-
-    # Casts numériques
-    for c in ["valeur_fonciere","surface_reelle_bati","nombre_pieces_principales"]:
-        if c in df.columns:
-            df[c] = (df[c].str.replace(",", ".", regex=False)
-                           .str.replace(" ", "", regex=False))
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    # Dates et année
-    if "date_mutation" in df.columns:
-        df["date_mutation"] = pd.to_datetime(df["date_mutation"], errors="coerce")
-        df["annee"] = df["date_mutation"].dt.year
-
-    # Filtrage Paris et arrondissement
-    if "code_postal" in df.columns:
-        mask_paris = df["code_postal"].astype(str).str.match(r"750(0[1-9]|1[0-9]|20)", na=False)
-        df = df[mask_paris]
-        df["arrondissement"] = df["code_postal"].astype(str).str[-2:]
-
-    # Filtrage nature_mutation et type_local
-    if "nature_mutation" in df.columns:
-        df = df[df["nature_mutation"].isin(["Vente","Vente en l'état futur d'achèvement"])]
-    if "type_local" in df.columns:
-        df = df[df["type_local"].isin(["Appartement","Maison"])]
-
-    # Colonnes finales
-    cols_out = [c for c in [
-        "id_mutation","date_mutation","annee","arrondissement","code_postal",
-        "nature_mutation","type_local","surface_reelle_bati",
-        "nombre_pieces_principales","valeur_fonciere","longitude","latitude"
-    ] if c in df.columns]
-
-    df.to_csv(dst_path, index=False)
-    print(f"[DVF] OK: {len(df):,} lignes → {dst_path.resolve()}")
+    with stage("clean:dvf", src=src_path, dst=dst_path) as st:
+        st.log(f"Lecture: {src_path}")
+
+        if src_path.is_file():
+            st.rows_in, st.rows_out = _clean_file(src_path, dst_path, chunksize)
+            build_spatial_index(dst_path, "transactions_residentiel")
+        else:
+            _clean_partitioned(str(src), dst_path, chunksize, workers, st)
+
+        st.log(f"OK: {st.rows_out:,} lignes → {dst_path.resolve()}")
+
+
+def _clean_file(src_path: Path, dst_path: Path, chunksize: int | None) -> tuple[int, int]:
+    """Nettoie un fichier DVF vers une table SILVER et ses sketchs ;
+    renvoie (lignes lues, lignes écrites)."""
+    if chunksize:
+        return _clean_dvf_streaming(src_path, dst_path, chunksize)
+    df = read_bronze_csv(src_path, usecols=KEEP_COLS, dtype=READ_DTYPES)
+    rows_in = len(df)
+    df = clean_dvf_frame(df)
+    write_silver(df, dst_path, "transactions_residentiel")
+    write_long(prix_m2_sketch(df), sketch_path(dst_path))
+    return rows_in, len(df)
+
+
+def _clean_dvf_streaming(src_path: Path, dst_path: Path, chunksize: int) -> tuple[int, int]:
+    """Nettoie le DVF chunk par chunk et écrit au fil de l'eau.
+    Renvoie (lignes BRONZE lues, lignes SILVER écrites).
+
+    DVF range les lignes d'une mutation à la suite : les lignes de la
+    dernière mutation d'un chunk sont reportées au chunk suivant pour ne
+    jamais couper une mutation en deux. Le sketch de chaque chunk est
+    fusionné au sketch courant, de taille bornée (groupes × seaux).
+    """
+    reader = read_bronze_csv(src_path, usecols=KEEP_COLS, dtype=READ_DTYPES,
+                             chunksize=chunksize)
+
+    # SilverWriter écrit dans un chemin temporaire puis renomme : pas de silver partiel
+    carry = None
+    rows_in = 0
+    sketch = prix_m2_sketch(pd.DataFrame(columns=[*SKETCH_KEYS, "prix_m2"]))
+
+    def write(chunk: pd.DataFrame) -> None:
+        nonlocal sketch
+        clean = clean_dvf_frame(chunk)
+        w.write(clean)
+        sketch = merge_long(sketch, prix_m2_sketch(clean), keys=SKETCH_KEYS)
+
+    with SilverWriter(dst_path, "transactions_residentiel") as w:
+        for chunk in reader:
+            rows_in += len(chunk)
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            ids = chunk["id_mutation"].to_numpy()
+            tail = ids == ids[-1]
+            carry = chunk[tail]
+            write(chunk[~tail])
+        if carry is not None:
+            write(carry)
+    write_long(sketch, sketch_path(dst_path))
+    return rows_in, w.rows
+
+
+# ---------- Fichiers annuels : une partition SILVER par fichier ----------
+def dvf_sources(src: str | Path) -> list[Path]:
+    """Fichiers DVF désignés par `src` : fichier, dossier (récursif) ou motif glob."""
+    path = Path(src)
+    if path.is_file():
+        return [path]
+    if path.is_dir():
+        files = [f for pattern in SOURCE_PATTERNS for f in path.rglob(pattern)]
+    else:
+        files = [Path(f) for f in glob.glob(str(src), recursive=True)]
+    return sorted(set(f for f in files if f.is_file()))
+
+
+def partition_name(source: Path, root: Path | None = None) -> str:
+    """Nom de partition stable : chemin relatif sans extensions (``2022/75.csv.gz`` → ``2022_75``).
+
+    Deux fichiers ne différant que par l'extension (``2022.csv`` et
+    ``2022.csv.gz``) ont le même nom : ``_clean_partitioned`` le refuse.
+    """
+    rel = source.relative_to(root) if root is not None else Path(source.name)
+    name = rel.name
+    for suffix in reversed(rel.suffixes):
+        name = name.removesuffix(suffix)
+    return "_".join([*rel.parent.parts, name])
+
+
+def partitions_dir(dst_path: Path) -> Path:
+    """Dossier des partitions d'une table : ``transactions_residentiel.csv.parts/``."""
+    return dst_path.with_name(dst_path.name + ".parts")
+
+
+def _clean_partition(src: str, dst: str, chunksize: int | None) -> dict:
+    """Worker : nettoie un fichier annuel, indexe ses coordonnées et renvoie
+    son stage instrumenté.
+
+    Les règles de qualité sont évaluées par partition : une partition en
+    échec laisse la précédente en place. ``id_mutation`` commence par
+    l'année de la mutation, deux fichiers annuels ne partagent donc pas de
+    clé et l'unicité par partition vaut pour la table réunie.
+    """
+    with collect() as records:
+        with stage(f"clean:dvf:{Path(dst).name}", "DVF", src=src, dst=dst) as st:
+            st.rows_in, st.rows_out = _clean_file(Path(src), Path(dst), chunksize)
+            build_spatial_index(dst, "transactions_residentiel")
+            st.log(f"{Path(src).name}: {st.rows_out:,} lignes")
+    return records[0]
+
+
+def _remove(path: Path) -> None:
+    shutil.rmtree(path) if path.is_dir() else path.unlink(missing_ok=True)
+
+
+def _clean_partitioned(src: str, dst_path: Path, chunksize: int | None,
+                       workers: int | None, st) -> None:
+    """Nettoie les fichiers modifiés dans leur partition puis publie la table
+    réunie, son index spatial et ses sketchs sans relire les partitions
+    inchangées (voir ``_publish_union``). Rien n'est réécrit si aucun
+    fichier n'a changé."""
+    sources = dvf_sources(src)
+    if not sources:
+        raise FileNotFoundError(f"Aucun fichier DVF pour {src}")
+    root = Path(src) if Path(src).is_dir() else None
+    parts = partitions_dir(dst_path)
+    parts.mkdir(parents=True, exist_ok=True)
+    fmt = dst_path.suffix
+    state_path = parts / "_sources.json"
+    previous = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+    version = cleaner_version(clean_dvf)
+
+    state, todo = {}, []
+    for source in sources:
+        name = partition_name(source, root)
+        if name in state:
+            raise ValueError(f"{state[name]['source']} et {source} donnent la même "
+                             f"partition {name!r} : renommer l'un des deux fichiers")
+        out = parts / f"{name}{fmt}"
+        key = {"source": str(source), "sha256": file_hash(source), "cleaner_version": version}
+        prev = previous.get(name, {})
+        state[name] = {**key, "rows": prev.get("rows")}
+        if ({k: prev.get(k) for k in key} != key or not out.exists()
+                or not sketch_path(out).exists() or not index_path(out).exists()):
+            todo.append((name, str(source), str(out)))
+    stale = set(previous) - set(state)
+    for name in stale:
+        stale_path = parts / f"{name}{fmt}"
+        for path in (stale_path, sketch_path(stale_path), index_path(stale_path)):
+            _remove(path)
+
+    st.log(f"{len(todo)}/{len(sources)} fichiers à nettoyer → {parts}")
+    workers = min(workers or os.cpu_count() or 1, len(todo)) or 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(_clean_partition, *list(zip(*todo))[1:], [chunksize] * len(todo)))
+    else:
+        done = [_clean_partition(s, d, chunksize) for _, s, d in todo]
+    for (name, _, _), rec in zip(todo, done):
+        state[name]["rows"] = rec["rows_out"]
+        st.rows_in += rec["rows_in"]
+        st.messages.extend(rec["messages"])
+        st.quality.extend(rec["quality"])
+        for f in rec["filters"]:
+            st.count(f["step"], f["rows_in"], f["rows_out"])
+
+    tmp = state_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(state_path)
+
+    names = sorted(state)
+    st.rows_out = sum(state[name]["rows"] for name in names)
+    published = [dst_path, sketch_path(dst_path), index_path(dst_path)]
+    if not todo and not stale and all(p.exists() for p in published):
+        st.log("Aucun fichier modifié : table réunie inchangée")
+        return
+
+    # Table complète = réunion des partitions, dans l'ordre des noms
+    paths = [parts / f"{name}{fmt}" for name in names]
+    positions = _publish_union(paths, [state[name]["rows"] for name in names], dst_path)
+    index = GridIndex.merge([GridIndex.load(index_path(p)) for p in paths], positions, st.rows_out)
+    index.save(index_path(dst_path))
+    st.log(f"Index spatial réuni : {len(index.rows):,} points → {index_path(dst_path)}")
+    # Sketchs de la table = fusion des sketchs des partitions (addition des comptes)
+    sketches = [read_long(sketch_path(p)) for p in paths]
+    write_long(merge_long(*sketches, keys=SKETCH_KEYS), sketch_path(dst_path))
+
+
+def _publish_union(paths: list[Path], rows: list[int], dst_path: Path) -> list:
+    """Publie dans `dst_path` la réunion des partitions `paths` (de `rows`
+    lignes chacune), sans les relire ni les retyper, et renvoie pour chacune
+    la position de ses lignes dans la table réunie.
+
+    - CSV : concaténation des fichiers (un seul en-tête) ;
+    - Parquet partitionné : liens physiques vers les fichiers des
+      partitions, préfixés du nom de la partition
+      (``annee=2022/arrondissement=5/2022-part-00000-0.parquet``) ; seuls
+      les fichiers d'une partition retraitée sont nouveaux.
+
+    La table est construite à côté puis renommée, comme ``SilverWriter``.
+    """
+    tmp = dst_path.with_name(dst_path.name + ".tmp")
+    _remove(tmp)
+    if not is_parquet(dst_path):
+        header = None
+        with open(tmp, "wb") as out:
+            for path in paths:
+                with open(path, "rb") as f:
+                    first = f.readline()
+                    if header is None and first:
+                        header = first
+                        out.write(first)
+                    shutil.copyfileobj(f, out)
+        offsets = np.cumsum([0, *rows])
+        positions = [np.arange(o, o + n) for o, n in zip(offsets, rows)]
+    else:
+        import pyarrow.parquet as pq
+
+        files = {}  # chemin dans la table réunie → fichier de la partition
+        for path in paths:
+            prefix = path.name.removesuffix(dst_path.suffix)
+            for f in path.rglob("*.parquet"):
+                rel = f.relative_to(path)
+                files[(rel.parent / f"{prefix}-{rel.name}").as_posix()] = f
+        tmp.mkdir(parents=True)
+        starts, lengths, total = {}, {}, 0
+        # pyarrow lit les fichiers d'un dataset dans l'ordre de leurs chemins
+        for rel in sorted(files):
+            f = files[rel]
+            target = tmp / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(f, target)
+            except OSError:
+                shutil.copyfile(f, target)
+            starts[f], lengths[f] = total, pq.ParquetFile(f).metadata.num_rows
+            total += lengths[f]
+        positions = []
+        for path in paths:
+            own = sorted(path.rglob("*.parquet"), key=lambda f: f.relative_to(path).as_posix())
+            positions.append(np.concatenate(
+                [np.arange(starts[f], starts[f] + lengths[f]) for f in own]
+                or [np.empty(0, dtype="int64")]))
+    _remove(dst_path)
+    tmp.replace(dst_path)
+    return positions
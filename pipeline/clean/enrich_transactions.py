@@ -0,0 +1,113 @@
+"""
+Enrichissement SILVER des transactions : équipements à proximité
+----------------------------------------------------------------
+Pour chaque couche d'équipements géolocalisés (``AMENITY_LAYERS``), ajoute
+à ``transactions_residentiel`` :
+
+- ``dist_<couche>_m`` : distance (m) à l'équipement le plus proche ;
+- ``nb_<couche>_<r>m`` : nombre d'équipements à moins de r mètres.
+
+La jointure passe par un index en grille des équipements
+(``pipeline.spatial_index.nearest_within``), par morceaux de transactions.
+Ajouter une couche = une ligne dans ``AMENITY_LAYERS`` et ses colonnes dans
+le schéma ``transactions_residentiel`` (pipeline/silver_store.py).
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.instrument import path_bytes, stage
+from pipeline.silver_store import SilverWriter, iter_silver, read_silver
+from pipeline.spatial_index import GridIndex, build_spatial_index, index_path, nearest_within
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+@dataclass(frozen=True)
+class AmenityLayer:
+    name: str                   # suffixe des colonnes, ex. "pavda"
+    dataset: str                # nom du jeu nettoyé (clé de CLEANERS dans main.py)
+    table: str                  # schéma SILVER de la couche (colonnes longitude/latitude)
+    radii: tuple[int, ...] = (200, 500)
+
+    @property
+    def columns(self) -> list[str]:
+        return [f"dist_{self.name}_m", *(f"nb_{self.name}_{r}m" for r in self.radii)]
+
+
+AMENITY_LAYERS = (
+    AmenityLayer("pavda", "dechets_alimentaires", "abribac_dechets_alimentaires"),
+)
+
+
+def amenity_index(amenities: pd.DataFrame, layer: AmenityLayer) -> GridIndex:
+    """Index en grille des équipements d'une couche (cellules du plus grand rayon)."""
+    return GridIndex.build(amenities["longitude"].to_numpy(), amenities["latitude"].to_numpy(),
+                           cell_m=max(layer.radii))
+
+
+def enrich_layer(transactions: pd.DataFrame, index: GridIndex | None,
+                 layer: AmenityLayer, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Renvoie les colonnes de `layer` pour chaque transaction (NA si couche absente)."""
+    if index is None:
+        return pd.DataFrame({
+            c: pd.Series(pd.NA, index=transactions.index, dtype="Float64" if c.startswith("dist_") else "Int64")
+            for c in layer.columns
+        })
+    dist, counts = nearest_within(index, transactions["longitude"].to_numpy(),
+                                  transactions["latitude"].to_numpy(), layer.radii, chunksize)
+    cols = {f"dist_{layer.name}_m": dist.round(1)}
+    cols.update({f"nb_{layer.name}_{r}m": counts[r] for r in layer.radii})
+    return pd.DataFrame(cols, index=transactions.index)
+
+
+def enrich_transactions(transactions_path: str | Path,
+                        amenities: dict[str, str | Path],
+                        layers: tuple[AmenityLayer, ...] = AMENITY_LAYERS,
+                        chunksize: int = DEFAULT_CHUNKSIZE) -> Path:
+    """Réécrit la table SILVER des transactions avec les colonnes d'équipements.
+
+    `amenities` associe le nom d'un jeu nettoyé au chemin de sa table
+    SILVER ; une couche dont la table manque donne des colonnes vides.
+
+    La table est lue et réécrite par morceaux de `chunksize` lignes (mémoire
+    bornée). L'ordre et les coordonnées des lignes ne changent pas : l'index
+    spatial à jour reste valable et n'est reconstruit que s'il manque ou
+    est périmé.
+    """
+    transactions_path = Path(transactions_path)
+    with stage("enrich", src=transactions_path, dst=transactions_path) as st:
+        st.log(f"Lecture: {transactions_path}")
+        indexes = {}
+        for layer in layers:
+            path = amenities.get(layer.dataset)
+            indexes[layer.name] = None
+            if path is not None and Path(path).exists():
+                points = read_silver(path, layer.table, columns=["longitude", "latitude"]).dropna()
+                st.bytes_read += path_bytes(path)
+                indexes[layer.name] = amenity_index(points, layer)
+            n = "absente" if indexes[layer.name] is None else f"{len(indexes[layer.name].rows):,} points"
+            st.log(f"{layer.name} ({n}): {', '.join(layer.columns)}")
+
+        spatial = index_path(transactions_path)
+        fresh = spatial.exists() and spatial.stat().st_mtime >= transactions_path.stat().st_mtime
+        with SilverWriter(transactions_path, "transactions_residentiel") as w:
+            for df in iter_silver(transactions_path, "transactions_residentiel", chunksize):
+                st.rows_in += len(df)
+                for layer in layers:
+                    cols = enrich_layer(df, indexes[layer.name], layer, chunksize)
+                    df = df.drop(columns=[c for c in cols.columns if c in df.columns]).join(cols)
+                w.write(df)
+
+        # Mêmes lignes dans le même ordre : un index à jour le reste, il doit
+        # seulement rester plus récent que la table (load_spatial_index)
+        if fresh:
+            os.utime(spatial)
+        else:
+            build_spatial_index(transactions_path, "transactions_residentiel")
+        st.rows_out = w.rows
+        st.log(f"OK: {w.rows:,} lignes → {transactions_path.resolve()}")
+    return transactions_path
@@ -0,0 +1,151 @@
+"""
+Noyaux de parsing partagés par les nettoyeurs
+---------------------------------------------
+- ``parse_number`` : texte → float64 en une passe de noyaux Arrow (C++),
+  formats français compris (``"1 234,5"``, espaces insécables) ; les
+  colonnes déjà numériques ne sont que converties ;
+- ``parse_date`` : dates au format fixe (ISO par défaut), parsées une
+  fois par valeur distincte puis redistribuées (quelques milliers de
+  dates pour des millions de lignes), repli sur le parsing générique pour
+  les valeurs hors format ;
+- ``extract_unique`` : ``str.extract`` évalué sur les valeurs distinctes
+  seulement (codes postaux, codes INSEE, libellés d'arrondissement) ;
+- ``normalize_cp`` : codes postaux sans espaces ni suffixe ``.0`` (colonne
+  lue en nombres), calculés par valeur distincte ;
+- ``arrondissement_from_cp`` : code postal → arrondissement par table de
+  correspondance (une entrée par catégorie, pas de regex par ligne).
+
+Les colonnes catégorielles passent par leurs catégories : le coût ne
+dépend plus du nombre de lignes. Mêmes résultats que les versions pandas
+qu'ils remplacent (voir benchmarks/bench_kernels.py).
+
+pyarrow reste optionnel (comme dans ``pipeline.silver_store``) : sans lui,
+``parse_number`` repasse par ``pd.to_numeric``, mêmes résultats, plus lent.
+"""
+
+import numpy as np
+import pandas as pd
+
+PARIS_CP = {f"750{n:02d}": n for n in range(1, 21)}
+
+# Séparateurs de milliers des exports français : espace, espace insécable, espace fine insécable
+THOUSANDS_SEPS = (" ", "\u00a0", "\u202f")
+# Valeurs inspectées pour reconnaître une colonne au format français
+SNIFF_VALUES = 1000
+# Nombre décimal accepté par le cast Arrow (après normalisation)
+_NUMBER_RE = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def _unique_codes(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """(codes, valeurs distinctes) ; code -1 pour les valeurs manquantes."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(), s.cat.categories
+    codes, uniques = pd.factorize(s)
+    return codes, pd.Index(uniques)
+
+
+def _parse_number_pandas(s: pd.Series) -> pd.Series:
+    """``parse_number`` sans pyarrow : conversion directe, puis format français
+    pour les valeurs restées invalides."""
+    out = pd.to_numeric(s, errors="coerce").astype("float64")
+    bad = out.isna() & s.notna()
+    if bad.any():
+        fixed = s[bad].astype(str).str.replace(",", ".", regex=False)
+        for sep in THOUSANDS_SEPS:
+            fixed = fixed.str.replace(sep, "", regex=False)
+        out[bad] = pd.to_numeric(fixed, errors="coerce")
+    return out
+
+
+def _strings(s: pd.Series):
+    import pyarrow as pa
+
+    if not pd.api.types.is_string_dtype(s.dtype):
+        s = s.astype("str")
+    return pa.array(s, type=pa.string(), from_pandas=True)
+
+
+def _to_float(arr):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    try:
+        return pc.cast(arr, pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+
+
+def parse_number(s: pd.Series) -> pd.Series:
+    """Texte ou nombres → float64 (NaN si non convertible).
+
+    Cast Arrow direct ; si la colonne est au format français ou si le cast
+    échoue, séparateurs de milliers retirés et virgule décimale remplacée
+    sur toute la colonne, puis nouveau cast ; les valeurs restées invalides
+    (en-têtes répétés, texte) passent à NaN.
+    """
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s.astype("float64")
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniques = _unique_codes(s)
+        values = np.append(parse_number(pd.Series(uniques, dtype=object)).to_numpy(), np.nan)
+        return pd.Series(values[codes], index=s.index)
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return _parse_number_pandas(s)
+    arr = _strings(s)
+    # Un cast qui échoue coûte autant que de parser chaque valeur invalide : une
+    # colonne au format français (repérée sur ses premières valeurs) est
+    # normalisée d'abord
+    head = arr.slice(0, SNIFF_VALUES)
+    out = None
+    if not any(pc.any(pc.match_substring(head, ch)).as_py() for ch in (",", *THOUSANDS_SEPS)):
+        out = _to_float(arr)
+    if out is None:
+        for sep in THOUSANDS_SEPS:
+            arr = pc.replace_substring(arr, sep, "")
+        arr = pc.replace_substring(arr, ",", ".")
+        out = _to_float(arr)
+    if out is None:
+        arr = pc.if_else(pc.match_substring_regex(arr, _NUMBER_RE), arr, pa.scalar(None, pa.string()))
+        out = pc.cast(arr, pa.float64())
+    return pd.Series(out.to_numpy(zero_copy_only=False), index=s.index, dtype="float64")
+
+
+def parse_date(s: pd.Series, format: str = "%Y-%m-%d") -> pd.Series:
+    """Dates au format `format` (repli sur le parsing générique), une fois par valeur distincte."""
+    codes, uniques = _unique_codes(s)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=format, errors="coerce")
+    bad = parsed.isna().to_numpy()
+    if bad.any():
+        parsed[bad] = pd.to_datetime(pd.Series(uniques[bad], dtype=object), errors="coerce", format="mixed")
+    values = pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(values, index=s.index)
+
+
+def extract_unique(s: pd.Series, regex: str) -> pd.Series:
+    """``s.astype("string").str.extract(regex, expand=False)`` (un groupe), calculé
+    sur les valeurs distinctes."""
+    codes, uniques = _unique_codes(s)
+    found = pd.Series(uniques, dtype=object).astype("string").str.extract(regex, expand=False)
+    values = pd.array(found, dtype="string").take(codes, allow_fill=True)
+    return pd.Series(values, index=s.index, dtype="string")
+
+
+def normalize_cp(s: pd.Series) -> pd.Series:
+    """Codes postaux en texte normalisé (``" 75001"``, ``"75001.0"`` → ``"75001"``), catégoriels."""
+    codes, uniques = _unique_codes(s)
+    text = pd.Series(uniques.astype(str)).str.strip().str.replace(r"\.0*$", "", regex=True)
+    categories = pd.Index(text.unique())
+    lut = categories.get_indexer(text)
+    new_codes = np.where(codes >= 0, lut[codes] if len(lut) else codes, -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=categories), index=s.index)
+
+
+def arrondissement_from_cp(s: pd.Series, table: dict[str, int] = PARIS_CP) -> pd.Series:
+    """Code postal → arrondissement (Int8, NA hors `table`)."""
+    codes, uniques = _unique_codes(s)
+    lut = np.append(pd.Series(uniques.astype(str)).map(table).to_numpy(dtype="float64", na_value=np.nan),
+                    np.nan)
+    return pd.Series(lut[codes], index=s.index).astype("Int8")
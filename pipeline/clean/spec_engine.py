@@ -0,0 +1,164 @@
+"""
+Moteur de nettoyage déclaratif
+------------------------------
+La plupart des jeux Paris Open Data suivent le même schéma :
+lecture → renommage → extraction de l'arrondissement → filtre 1–20 → écriture.
+Un ``DatasetSpec`` décrit ces étapes ; ``compile_spec`` en tire un
+``CleaningPlan`` qui :
+
+- ne lit que les colonnes sources réellement utilisées (usecols) ;
+- filtre les lignes hors Paris juste après la lecture, avant toute autre
+  transformation, et chunk par chunk si demandé ;
+- déduplique sur la clé déclarée, y compris d'un chunk à l'autre ;
+- écrit la table SILVER via ``pipeline.silver_store``.
+
+Un spec qui déclare sa clé métier (``key``) est nettoyé en mode delta
+(``pipeline.clean.cdc``) : seules les lignes des clés insérées ou
+modifiées depuis l'exécution précédente passent par le plan.
+
+Ajouter un jeu de données = écrire un spec dans ``pipeline/clean/specs.py``.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.clean.cdc import apply_delta
+from pipeline.clean.csv_reader import read_bronze_csv
+from pipeline.clean.kernels import extract_unique
+from pipeline.instrument import keep, stage
+from pipeline.manifest import cleaner_version
+from pipeline.silver_store import SilverWriter
+
+
+@dataclass(frozen=True)
+class ArrondissementRule:
+    """Règle d'extraction du numéro d'arrondissement.
+
+    `sources` : couples (colonne, regex à un groupe) essayés dans l'ordre,
+    le premier qui matche l'emporte. Les lignes hors 1–20 sont supprimées.
+    """
+    sources: tuple[tuple[str, str], ...]
+    target: str = "arr_num"
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    tag: str                                   # préfixe des logs, ex. "COLLEGES"
+    table: str                                 # schéma SILVER (pipeline.silver_store.SCHEMAS)
+    output: tuple[str, ...]                    # colonnes finales (noms SILVER)
+    rename: dict[str, str] = field(default_factory=dict)   # source -> SILVER
+    required: tuple[str, ...] = ()             # colonnes sources obligatoires
+    extract: dict[str, str] = field(default_factory=dict)  # normalisation colonne -> regex à un groupe
+    arrondissement: ArrondissementRule | None = None
+    dedup: tuple[str, ...] = ()                # clé de déduplication (noms SILVER)
+    numeric: tuple[str, ...] = ()              # colonnes converties en nombres
+    key: str | None = None                     # clé métier (nom SILVER) : mode delta
+
+
+@dataclass
+class CleaningPlan:
+    spec: DatasetSpec
+    read_columns: list[str]
+
+    @property
+    def source_key(self) -> str:
+        """Nom BRONZE de la clé métier."""
+        inverse = {v: k for k, v in self.spec.rename.items()}
+        return inverse.get(self.spec.key, self.spec.key)
+
+    @property
+    def version(self) -> str:
+        """Version du plan pour le mode delta : code du moteur et contenu du spec."""
+        return f"{cleaner_version(run_spec)}-{hashlib.sha256(repr(self.spec).encode()).hexdigest()[:8]}"
+
+    def run(self, src: str | Path, dst: str | Path, chunksize: int | None = None,
+            delta: bool = True) -> Path:
+        spec = self.spec
+        src, dst = Path(src), Path(dst)
+        with stage(f"clean:{spec.tag.lower()}", spec.tag, src=src, dst=dst) as st:
+            st.log(f"Lecture: {src}")
+
+            if spec.key and delta:
+                data = read_bronze_csv(src, usecols=self.read_columns, required=list(spec.required))
+                st.rows_in = len(data)
+                st.rows_out = apply_delta(data, dst, spec.table, self.source_key, spec.key,
+                                          lambda df: self._apply(df.copy(), set()), self.version,
+                                          arrondissement=spec.arrondissement and spec.arrondissement.target,
+                                          source=src)
+                st.log(f"OK: {st.rows_out:,} lignes → {dst.resolve()}")
+                return dst.resolve()
+
+            data = read_bronze_csv(src, usecols=self.read_columns, required=list(spec.required),
+                                   chunksize=chunksize)
+            chunks = data if chunksize else [data]
+
+            seen: set = set()
+            with SilverWriter(dst, spec.table) as w:
+                for chunk in chunks:
+                    st.rows_in += len(chunk)
+                    w.write(self._apply(chunk, seen))
+
+            st.rows_out = w.rows
+            st.log(f"OK: {w.rows:,} lignes → {dst.resolve()}")
+        return dst.resolve()
+
+    def _apply(self, df: pd.DataFrame, seen: set) -> pd.DataFrame:
+        spec = self.spec
+        df.columns = [c.strip() for c in df.columns]
+        df = df.rename(columns=spec.rename)
+
+        # Normalisations (lignes sans correspondance supprimées)
+        for col, regex in spec.extract.items():
+            df[col] = extract_unique(df[col], regex)
+            df = keep(f"format_{col}", df, df[col].notna())
+
+        # Arrondissement puis filtre Paris, au plus tôt
+        rule = spec.arrondissement
+        if rule is not None:
+            arr = pd.Series(pd.NA, index=df.index, dtype="string")
+            for col, regex in rule.sources:
+                if col in df.columns:
+                    arr = arr.fillna(extract_unique(df[col], regex))
+            arr = pd.to_numeric(arr, errors="coerce")
+            in_paris = arr.between(1, 20, inclusive="both")
+            df = keep("arrondissement_1_20", df, in_paris).copy()
+            df[rule.target] = arr[in_paris].astype("Int64")
+
+        # Déduplication, y compris entre chunks
+        if spec.dedup:
+            df = keep("doublons", df, ~df.duplicated(subset=list(spec.dedup)))
+            keys = pd.Series(list(zip(*(df[c] for c in spec.dedup))), index=df.index, dtype=object)
+            df = keep("doublons_chunks_precedents", df, ~keys.isin(seen))
+            seen.update(keys[~keys.isin(seen)])
+
+        for col in spec.numeric:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+
+        return df[[c for c in spec.output if c in df.columns]]
+
+
+def compile_spec(spec: DatasetSpec) -> CleaningPlan:
+    """Construit le plan d'un spec : colonnes sources minimales à lire."""
+    inverse = {v: k for k, v in spec.rename.items()}
+    rule = spec.arrondissement
+    if spec.key and spec.dedup not in ((), (spec.key,)):
+        # Le delta ne renettoie que les clés modifiées : une déduplication sur
+        # d'autres colonnes dépendrait des lignes inchangées
+        raise ValueError(f"{spec.tag}: mode delta incompatible avec la déduplication {spec.dedup}")
+    referenced = set(spec.output) | set(spec.extract) | set(spec.dedup) | set(spec.numeric)
+    if spec.key:
+        referenced.add(spec.key)
+    if rule is not None:
+        referenced |= {col for col, _ in rule.sources}
+        referenced.discard(rule.target)
+    read_columns = {inverse.get(c, c) for c in referenced} | set(spec.required)
+    return CleaningPlan(spec, sorted(read_columns))
+
+
+def run_spec(spec: DatasetSpec, src: str | Path, dst: str | Path,
+             chunksize: int | None = None, delta: bool = True) -> Path:
+    return compile_spec(spec).run(src, dst, chunksize=chunksize, delta=delta)
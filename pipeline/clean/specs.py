@@ -0,0 +1,75 @@
+"""
+Specs des jeux de données nettoyés par le moteur déclaratif
+(voir pipeline/clean/spec_engine.py).
+"""
+
+from pipeline.clean.spec_engine import ArrondissementRule, DatasetSpec
+
+PARIS_CP_RE = r"^750(0[1-9]|1[0-9]|20)"
+
+# --- Établissements scolaires (collèges, élémentaires, maternelles) ---
+def _etablissements(tag: str) -> DatasetSpec:
+    return DatasetSpec(
+        tag=tag,
+        table="etablissements_scolaires",
+        required=("libelle", "arr_libelle", "arr_insee"),
+        rename={"libelle": "nom_etablissement"},
+        # Code INSEE 751xx, sinon premier nombre du libellé ("5ème Ardt")
+        arrondissement=ArrondissementRule(
+            sources=(("arr_insee", r"751(\d{2})"), ("arr_libelle", r"(\d{1,2})")),
+        ),
+        dedup=("nom_etablissement", "arr_libelle", "arr_insee"),
+        output=("arr_num", "arr_insee", "arr_libelle", "nom_etablissement"),
+    )
+
+
+COLLEGES = _etablissements("COLLEGES")
+ELEMENTAIRES = _etablissements("ELEMENTAIRES")
+MATERNELLES = _etablissements("MATERNELLES")
+
+# --- Espaces verts ---
+ESPACES_VERTS = DatasetSpec(
+    tag="ESPACES_VERTS",
+    table="espaces_verts",
+    required=("nsq_espace_vert", "nom_ev", "type_ev", "adresse_codepostal"),
+    rename={
+        "nsq_espace_vert": "id_espace_vert",
+        "nom_ev": "nom_espace_vert",
+        "type_ev": "type_espace_vert",
+        "adresse_codepostal": "code_postal",
+    },
+    extract={"code_postal": r"(\d{5})"},
+    arrondissement=ArrondissementRule(sources=(("code_postal", r"^75\d(\d{2})$"),)),
+    dedup=("id_espace_vert",),
+    key="id_espace_vert",
+    output=("id_espace_vert", "nom_espace_vert", "type_espace_vert", "code_postal", "arr_num"),
+)
+
+# --- Logements sociaux financés ---
+LOGEMENTS_SOCIAUX = DatasetSpec(
+    tag="LS",
+    table="logements_sociaux_programmes",
+    required=("Code postal",),
+    rename={
+        "Année du financement - agrément": "annee",
+        "Nombre total de logements financés": "nb_total",
+        "Dont nombre de logements PLA I": "nb_plai",
+        "Dont nombre de logements PLUS": "nb_plus",
+        "Dont nombre de logements PLUS CD": "nb_plus_cd",
+        "Dont nombre de logements PLS": "nb_pls",
+        "Bailleur social": "bailleur",
+        "Code postal": "code_postal",
+        "Adresse du programme": "adresse",
+        "Mode de réalisation": "mode_realisation",
+        "Ville": "ville",
+        "Identifiant livraison": "id_programme",
+    },
+    arrondissement=ArrondissementRule(sources=(("code_postal", PARIS_CP_RE),), target="arrondissement"),
+    numeric=("annee", "nb_total", "nb_plai", "nb_plus", "nb_plus_cd", "nb_pls"),
+    key="id_programme",
+    output=(
+        "id_programme", "annee", "arrondissement", "code_postal",
+        "adresse", "ville", "bailleur", "mode_realisation",
+        "nb_total", "nb_plai", "nb_plus", "nb_plus_cd", "nb_pls",
+    ),
+)
@@ -1,18 +1,151 @@
+import http.client
+import json
 import os
+import shutil
+import urllib.error
+import urllib.request
+from pathlib import Path
 
-import pandas as pd
+from pipeline.instrument import current_stage, stage
 
+# Taille des blocs copiés du réseau vers le disque
+BLOCK_SIZE = 1 << 20
 
-def collect_csv(outputfile,url):
-    df = pd.read_csv(url, sep=';',encoding="utf-8")
-    # Sauvegarder localement
-    
-    output_dir = os.path.join("data", "bronze")
 
-    # Créer le dossier s'il n'existe pas
+def _load_json(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path: Path, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def _validators(headers) -> dict:
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+    }
+
+
+def _range_start(content_range: str) -> int | None:
+    """Premier octet de ``Content-Range: bytes <début>-<fin>/<taille>`` (None si illisible)."""
+    unit, _, spec = content_range.strip().partition(" ")
+    start = spec.partition("-")[0]
+    return int(start) if unit == "bytes" and start.isdigit() else None
+
+
+def collect_csv(outputfile, url, output_dir="data/bronze", timeout=60, retries=3) -> Path:
+    """
+    Télécharge `url` tel quel (octets bruts) dans `output_dir/outputfile`.
+
+    - requête conditionnelle (If-None-Match / If-Modified-Since) si le fichier
+      a déjà été téléchargé : une réponse 304 laisse le fichier BRONZE intact ;
+    - écriture en streaming dans un fichier ``.part`` renommé à la fin ;
+    - reprise d'un ``.part`` interrompu via Range / If-Range quand le serveur
+      le permet (sinon le téléchargement repart de zéro) ; une réponse 206
+      dont la plage ne commence pas à la fin du ``.part`` est rejetée ;
+    - les erreurs client définitives (404, 403, 410, ...) sont levées
+      telles quelles, sans nouvelle tentative.
+
+    Les validateurs HTTP sont conservés dans ``<fichier>.meta.json``.
+    Le téléchargement est mesuré comme un stage ``collect:<fichier>`` (durée,
+    octets reçus).
+    """
+    output_dir = Path(output_dir)
     os.makedirs(output_dir, exist_ok=True)
+    output_path = output_dir / outputfile
+    part_path = output_path.with_name(output_path.name + ".part")
+    meta_path = output_path.with_name(output_path.name + ".meta.json")
+    part_meta_path = output_path.with_name(output_path.name + ".part.json")
+
+    last_error = None
+    with stage(f"collect:{outputfile}", tag="COLLECT") as st:
+        for _ in range(max(1, retries)):
+            try:
+                changed = _download(url, output_path, part_path, meta_path, part_meta_path, timeout)
+            except (OSError, http.client.HTTPException) as e:
+                # Erreur client définitive (404, 403, 410...) : inutile de réessayer.
+                # 416 : le .part périmé vient d'être supprimé, la tentative suivante repart de zéro
+                if isinstance(e, urllib.error.HTTPError) and 400 <= e.code < 500 and e.code != 416:
+                    raise
+                # Le .part est conservé : la tentative suivante reprend où on s'est arrêté
+                last_error = e
+                st.log(f"Téléchargement interrompu ({e}), nouvelle tentative : {url}")
+                continue
+            if changed:
+                st.log(f"Fichier téléchargé ({st.bytes_written:,} octets reçus) : {output_path}")
+            else:
+                st.log(f"Fichier inchangé (304) : {output_path}")
+            return output_path
+
+        raise RuntimeError(f"Téléchargement échoué pour {url}: {last_error}")
+
+
+def _download(url, output_path, part_path, meta_path, part_meta_path, timeout) -> bool:
+    """Une tentative de téléchargement. Renvoie False si le serveur répond 304."""
+    headers = {}
+    meta = _load_json(meta_path)
+    if output_path.exists() and meta.get("url") == url:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    # Reprise d'un téléchargement partiel (seulement avec un validateur fort)
+    offset = 0
+    part_meta = _load_json(part_meta_path)
+    if part_path.exists() and part_meta.get("url") == url:
+        validator = part_meta.get("etag") or part_meta.get("last_modified")
+        if validator:
+            offset = part_path.stat().st_size
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        resp = urllib.request.urlopen(req, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return False
+        if e.code == 416:
+            # Plage invalide : le .part ne correspond plus à la ressource
+            part_path.unlink(missing_ok=True)
+            part_meta_path.unlink(missing_ok=True)
+        raise
+
+    with resp:
+        validators = _validators(resp.headers)
+        if resp.status == 206:
+            content_range = resp.headers.get("Content-Range", "")
+            if _range_start(content_range) != offset:
+                # Plage inattendue : ne pas l'ajouter au .part, repartir de zéro
+                part_path.unlink(missing_ok=True)
+                part_meta_path.unlink(missing_ok=True)
+                raise http.client.HTTPException(
+                    f"Content-Range {content_range!r} ne reprend pas à l'octet {offset}")
+            mode = "ab"
+        else:
+            mode = "wb"
+            _save_json(part_meta_path, {"url": url, **validators})
+        expected = resp.headers.get("Content-Length")
+        with open(part_path, mode) as f:
+            start = f.tell()
+            shutil.copyfileobj(resp, f, BLOCK_SIZE)
+            received = f.tell() - start
+        # Octets réellement reçus (reprises comprises), comptés dans le stage de collect_csv
+        st = current_stage()
+        if st is not None:
+            st.bytes_written += received
+        # Connexion coupée avant la fin : on garde le .part pour reprendre
+        if expected is not None and received < int(expected):
+            raise http.client.IncompleteRead(b"", int(expected) - received)
 
-    # Sauvegarder le fichier
-    output_path = os.path.join(output_dir, outputfile)
-    df.to_csv(output_path, index=False, encoding="utf-8")
-    print(f"✅ Fichier téléchargé : {output_path}")
+    part_path.replace(output_path)
+    validators = {k: v or part_meta.get(k) for k, v in validators.items()} if mode == "ab" else validators
+    _save_json(meta_path, {"url": url, **validators})
+    part_meta_path.unlink(missing_ok=True)
+    return True
@@ -0,0 +1,231 @@
+"""
+Couche GOLD : agrégats précalculés
+----------------------------------
+Tables produites (dans ``data/gold``) :
+
+- ``dvf_prix_m2_cube`` : prix/m² (nombre, moyenne, médiane, déciles,
+  quartiles et bornes IQR des valeurs aberrantes) pour chaque combinaison
+  de arrondissement × annee × type_local × typologie, sous-totaux compris
+  (colonne ``niveau`` = dimensions du regroupement, ``"total"`` pour
+  l'ensemble ; les dimensions agrégées valent NA). Les quantiles viennent
+  des sketchs écrits par le nettoyage DVF quand ils sont disponibles et
+  cohérents avec la table (erreur relative ≤ 1 %, voir
+  pipeline/gold/sketch.py), sinon d'un calcul exact ;
+- ``logements_sociaux_arr_annee`` : logements sociaux financés par
+  arrondissement et année ;
+- ``arrondissement_profil`` : une ligne par arrondissement avec les totaux
+  de logements sociaux et le nombre d'équipements (écoles, espaces verts,
+  points PAVDA) ;
+- ``dvf_tuiles/`` : pyramide de tuiles de la carte (voir pipeline/gold/tiles.py) ;
+- ``dvf_indice_mensuel`` : indice mensuel des prix/m² (voir pipeline/gold/price_index.py).
+
+Le front et l'API lisent une ligne de ces tables au lieu de parcourir
+toutes les transactions.
+"""
+
+from itertools import combinations
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.clean.dvf_to_silver import SKETCH_KEYS, sketch_path
+from pipeline.gold.price_index import update_price_index
+from pipeline.gold.sketch import grouped_quantiles, read_long, rollup_long
+from pipeline.gold.tiles import build_tile_pyramid
+from pipeline.instrument import log, path_bytes, stage
+from pipeline.silver_store import read_silver, write_silver
+
+CUBE_DIMS = ["arrondissement", "annee", "type_local", "typologie"]
+QUANTILES = {0.1: "prix_m2_q10", 0.25: "prix_m2_q25", 0.75: "prix_m2_q75", 0.9: "prix_m2_q90"}
+# Bornes des valeurs aberrantes par groupe : [Q1 − k·IQR, Q3 + k·IQR]
+IQR_K = 1.5
+LS_COUNTS = ["nb_total", "nb_plai", "nb_plus", "nb_plus_cd", "nb_pls"]
+ARRONDISSEMENTS = pd.Index(range(1, 21), name="arrondissement")
+PROFIL_COLS = [
+    "arrondissement", *LS_COUNTS, "nb_programmes_ls", "nb_colleges",
+    "nb_ecoles_elementaires", "nb_ecoles_maternelles", "nb_espaces_verts",
+    "nb_points_pavda",
+]
+
+
+# ---------- DVF ----------
+def add_prix_m2_typologie(df: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute prix_m2 et typologie si absents (silver antérieur à dvf_to_silver, mêmes bornes)."""
+    df = df.copy()
+    if "prix_m2" not in df.columns:
+        df["prix_m2"] = df["valeur_fonciere"] / df["surface_reelle_bati"]
+        df = df[
+            (df["prix_m2"].between(500, 30000))
+            & (df["surface_reelle_bati"].between(8, 1000))
+        ]
+    if "typologie" not in df.columns:
+        df["typologie"] = pd.cut(
+            df["nombre_pieces_principales"],
+            bins=[-1, 1, 2, 3, 4, 100],
+            labels=["T1", "T2", "T3", "T4", "T5+"],
+        )
+    return df
+
+
+def _stats(g) -> pd.DataFrame:
+    stats = g.agg(["count", "mean", "median"]).rename(columns={
+        "count": "nb_ventes", "mean": "prix_m2_moyen", "median": "prix_m2_median",
+    })
+    q = g.quantile(list(QUANTILES)).unstack()
+    return stats.join(q.rename(columns=QUANTILES))
+
+
+def _sketch_stats(fine: pd.DataFrame, sketch: pd.DataFrame, dims: list[str]) -> pd.DataFrame:
+    """Nombre et moyenne (sommes du grain fin), quantiles estimés à partir des sketchs."""
+    keys = dims or ["total"]
+    sums = fine.assign(total="total").groupby(keys, observed=True, dropna=True)[["nb_ventes", "somme"]].sum()
+    stats = pd.DataFrame({"nb_ventes": sums["nb_ventes"], "prix_m2_moyen": sums["somme"] / sums["nb_ventes"]})
+    q = grouped_quantiles(rollup_long(sketch, dims), keys, {0.5: "prix_m2_median", **QUANTILES})
+    return stats.join(q)
+
+
+def _sketch_matches(fine: pd.DataFrame, sketch: pd.DataFrame) -> bool:
+    """Les sketchs décrivent-ils exactement ces transactions (mêmes comptes par groupe) ?"""
+    expected = fine.loc[fine["nb_positifs"] > 0, "nb_positifs"]
+    actual = sketch.groupby(SKETCH_KEYS, observed=True, dropna=False)["n"].sum()
+    expected, actual = expected.sort_index(), actual.sort_index()
+    return expected.index.equals(actual.index) and bool((expected.to_numpy() == actual.to_numpy()).all())
+
+
+def build_dvf_cube(transactions: pd.DataFrame, sketch: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Calcule le cube prix/m² avec tous les sous-totaux (grouping sets).
+
+    `sketch` : sketchs de prix/m² par SKETCH_KEYS (``prix_m2_sketch``) ;
+    ignorés s'ils ne correspondent pas aux transactions.
+    """
+    df = add_prix_m2_typologie(transactions)
+    df = df.dropna(subset=["prix_m2"])
+    df["typologie"] = df["typologie"].astype("string")
+    if sketch is not None:
+        # Nombre et somme par groupe fin, sous-totaux obtenus en les additionnant
+        fine = df.assign(positif=df["prix_m2"] > 0).groupby(SKETCH_KEYS, observed=True, dropna=False).agg(
+            nb_ventes=("prix_m2", "count"), somme=("prix_m2", "sum"), nb_positifs=("positif", "sum"))
+        sketch = sketch.astype({k: df[k].dtype for k in SKETCH_KEYS})
+        if not _sketch_matches(fine, sketch):
+            log("GOLD", "sketchs de prix/m² non cohérents avec la table : quantiles exacts")
+            sketch = None
+        fine = fine.reset_index()
+
+    parts = []
+    for r in range(len(CUBE_DIMS), -1, -1):
+        for dims in combinations(CUBE_DIMS, r):
+            if sketch is not None:
+                part = _sketch_stats(fine, sketch, list(dims)).reset_index(drop=not dims)
+            elif dims:
+                g = df.groupby(list(dims), observed=True, dropna=True)["prix_m2"]
+                part = _stats(g).reset_index()
+            else:
+                s = df["prix_m2"]
+                part = pd.DataFrame([{
+                    "nb_ventes": s.count(), "prix_m2_moyen": s.mean(), "prix_m2_median": s.median(),
+                    **{name: s.quantile(q) for q, name in QUANTILES.items()},
+                }])
+            part["niveau"] = ",".join(dims) or "total"
+            parts.append(part)
+
+    cube = pd.concat(parts, ignore_index=True)
+    iqr = cube["prix_m2_q75"] - cube["prix_m2_q25"]
+    cube["prix_m2_borne_basse"] = cube["prix_m2_q25"] - IQR_K * iqr
+    cube["prix_m2_borne_haute"] = cube["prix_m2_q75"] + IQR_K * iqr
+    cols = ["niveau", *CUBE_DIMS, "nb_ventes", "prix_m2_moyen", "prix_m2_median", *QUANTILES.values(),
+            "prix_m2_borne_basse", "prix_m2_borne_haute"]
+    return cube[cols]
+
+
+# ---------- Logements sociaux & équipements ----------
+def build_logements_sociaux_arr_annee(programmes: pd.DataFrame) -> pd.DataFrame:
+    return (
+        programmes.groupby(["arrondissement", "annee"], dropna=True)[LS_COUNTS]
+        .sum()
+        .reset_index()
+        .sort_values(["annee", "arrondissement"])
+    )
+
+
+def _count_by_arr(df: pd.DataFrame | None, col: str) -> pd.Series:
+    if df is None:
+        return pd.Series(pd.NA, index=ARRONDISSEMENTS, dtype="Int64")
+    return df[col].value_counts().reindex(ARRONDISSEMENTS, fill_value=0)
+
+
+def build_arrondissement_profil(programmes: pd.DataFrame | None = None,
+                                colleges: pd.DataFrame | None = None,
+                                elementaires: pd.DataFrame | None = None,
+                                maternelles: pd.DataFrame | None = None,
+                                espaces_verts: pd.DataFrame | None = None,
+                                pavda: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Une ligne par arrondissement (1–20) : logements sociaux et équipements."""
+    profil = pd.DataFrame(index=ARRONDISSEMENTS)
+    if programmes is not None:
+        ls = programmes.groupby("arrondissement")[LS_COUNTS].sum()
+        profil = profil.join(ls.reindex(ARRONDISSEMENTS, fill_value=0))
+        profil["nb_programmes_ls"] = _count_by_arr(programmes, "arrondissement")
+    profil["nb_colleges"] = _count_by_arr(colleges, "arr_num")
+    profil["nb_ecoles_elementaires"] = _count_by_arr(elementaires, "arr_num")
+    profil["nb_ecoles_maternelles"] = _count_by_arr(maternelles, "arr_num")
+    profil["nb_espaces_verts"] = _count_by_arr(espaces_verts, "arr_num")
+    profil["nb_points_pavda"] = _count_by_arr(pavda, "arrondissement")
+    # Colonnes logements sociaux à NA si la table n'est pas disponible
+    return profil.reset_index().reindex(columns=PROFIL_COLS)
+
+
+# ---------- Orchestration ----------
+def build_gold(silver: dict[str, Path], gold_dir: str | Path, fmt: str = "csv") -> dict[str, Path]:
+    """Construit les tables GOLD à partir des tables SILVER disponibles.
+
+    `silver` associe un nom de jeu (dvf, logements_sociaux, colleges,
+    elementaires, maternelles, espaces_verts, dechets_alimentaires) au
+    chemin de sa table SILVER ; les tables manquantes sont ignorées.
+    """
+    gold_dir = Path(gold_dir)
+    tables = {
+        "dvf": "transactions_residentiel",
+        "logements_sociaux": "logements_sociaux_programmes",
+        "colleges": "etablissements_scolaires",
+        "elementaires": "etablissements_scolaires",
+        "maternelles": "etablissements_scolaires",
+        "espaces_verts": "espaces_verts",
+        "dechets_alimentaires": "abribac_dechets_alimentaires",
+    }
+    with stage("gold", dst=gold_dir) as st:
+        frames = {
+            name: read_silver(path, tables[name])
+            for name, path in silver.items()
+            if name in tables and Path(path).exists()
+        }
+        st.bytes_read = sum(path_bytes(silver[name]) for name in frames)
+        st.rows_in = sum(len(df) for df in frames.values())
+
+        out = {}
+        if "dvf" in frames:
+            sketch = sketch_path(silver["dvf"])
+            cube = build_dvf_cube(frames["dvf"], read_long(sketch) if sketch.exists() else None)
+            out["dvf_prix_m2_cube"] = write_silver(cube, gold_dir / f"dvf_prix_m2_cube.{fmt}", "dvf_prix_m2_cube")
+            st.log(f"dvf_prix_m2_cube: {len(cube):,} lignes")
+            priced = add_prix_m2_typologie(frames["dvf"])
+            build_tile_pyramid(priced, gold_dir / "dvf_tuiles", fmt)
+            out["dvf_tuiles"] = gold_dir / "dvf_tuiles"
+            out["dvf_indice_mensuel"] = update_price_index(priced, gold_dir, fmt)
+        if "logements_sociaux" in frames:
+            agg = build_logements_sociaux_arr_annee(frames["logements_sociaux"])
+            out["logements_sociaux_arr_annee"] = write_silver(
+                agg, gold_dir / f"logements_sociaux_arr_annee.{fmt}", "logements_sociaux_arr_annee")
+            st.log(f"logements_sociaux_arr_annee: {len(agg):,} lignes")
+
+        profil = build_arrondissement_profil(
+            programmes=frames.get("logements_sociaux"),
+            colleges=frames.get("colleges"),
+            elementaires=frames.get("elementaires"),
+            maternelles=frames.get("maternelles"),
+            espaces_verts=frames.get("espaces_verts"),
+            pavda=frames.get("dechets_alimentaires"),
+        )
+        out["arrondissement_profil"] = write_silver(
+            profil, gold_dir / f"arrondissement_profil.{fmt}", "arrondissement_profil")
+        st.log(f"arrondissement_profil: {len(profil):,} lignes")
+    return out
@@ -0,0 +1,138 @@
+"""
+Couche GOLD : indice mensuel des prix/m² par arrondissement et type de local
+----------------------------------------------------------------------------
+Deux tables :
+
+- ``dvf_indice_mensuel_partiels`` : agrégats partiels fusionnables par
+  (mois, arrondissement, type_local) — nombre de ventes, somme des prix/m²
+  et sketch de quantiles (``pipeline.gold.sketch``) ;
+- ``dvf_indice_mensuel`` : la série publiée, calculée à partir des
+  partiels seuls (moyenne, médiane et quartiles estimés, indice base 100
+  au premier mois de chaque série).
+
+Mise à jour incrémentale : l'empreinte des transactions de chaque mois est
+gardée dans ``dvf_indice_mensuel_empreintes.json`` ; seuls les mois dont
+l'empreinte change (nouveau millésime DVF, corrections) sont recalculés,
+les autres partiels sont relus tels quels. ``merge_partials`` permet aussi
+d'ajouter directement les partiels d'une tranche de ventes nouvelles.
+``verify_price_index`` refait le calcul complet et le compare au stock.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.gold.sketch import decode_long, encode_long, grouped_quantiles, merge_long, sketch_long
+from pipeline.instrument import log
+from pipeline.silver_store import read_silver, write_silver
+
+KEYS = ["mois", "arrondissement", "type_local"]
+INDEX_QUANTILES = {0.25: "prix_m2_q25", 0.5: "prix_m2_median", 0.75: "prix_m2_q75"}
+PARTIALS_COLS = [*KEYS, "nb_ventes", "somme_prix_m2", "sketch"]
+INDEX_COLS = [*KEYS, "nb_ventes", "prix_m2_moyen", *INDEX_QUANTILES.values(), "indice"]
+FINGERPRINT_COLS = ["id_mutation", "date_mutation", "arrondissement", "type_local", "prix_m2"]
+
+
+def _with_month(transactions: pd.DataFrame) -> pd.DataFrame:
+    df = transactions.dropna(subset=["prix_m2", "date_mutation", "arrondissement", "type_local"])
+    return df.assign(mois=pd.to_datetime(df["date_mutation"]).dt.strftime("%Y-%m"))
+
+
+def month_partials(transactions: pd.DataFrame) -> pd.DataFrame:
+    """Partiels (nombre, somme, sketch) par mois × arrondissement × type_local.
+
+    `transactions` doit porter prix_m2 (voir ``aggregate_cube.add_prix_m2_typologie``).
+    """
+    df = _with_month(transactions)
+    df = df.assign(type_local=df["type_local"].astype("string"))
+    sums = df.groupby(KEYS, observed=True)["prix_m2"].agg(nb_ventes="size", somme_prix_m2="sum")
+    sketch = encode_long(sketch_long(df, KEYS, "prix_m2"), KEYS).rename("sketch")
+    return sums.join(sketch).reset_index()[PARTIALS_COLS]
+
+
+def merge_partials(*partials: pd.DataFrame) -> pd.DataFrame:
+    """Fusionne des partiels (mêmes clés → comptes, sommes et sketchs additionnés)."""
+    allp = pd.concat(partials, ignore_index=True)
+    sums = allp.groupby(KEYS, observed=True)[["nb_ventes", "somme_prix_m2"]].sum()
+    sketch = encode_long(merge_long(decode_long(allp, KEYS), keys=KEYS), KEYS).rename("sketch")
+    return sums.join(sketch).reset_index()[PARTIALS_COLS]
+
+
+def index_from_partials(partials: pd.DataFrame) -> pd.DataFrame:
+    """Série publiée à partir des partiels uniquement."""
+    if partials.empty:
+        return pd.DataFrame(columns=INDEX_COLS)
+    q = grouped_quantiles(decode_long(partials, KEYS), KEYS, INDEX_QUANTILES)
+    out = partials.set_index(KEYS).join(q).reset_index().sort_values(KEYS, ignore_index=True)
+    out["prix_m2_moyen"] = out["somme_prix_m2"] / out["nb_ventes"]
+    base = out.groupby(["arrondissement", "type_local"])["prix_m2_median"].transform("first")
+    out["indice"] = 100 * out["prix_m2_median"] / base
+    return out[INDEX_COLS]
+
+
+# ---------- Stock persistant ----------
+def _paths(gold_dir: Path, fmt: str) -> tuple[Path, Path, Path]:
+    return (gold_dir / f"dvf_indice_mensuel_partiels.{fmt}",
+            gold_dir / f"dvf_indice_mensuel.{fmt}",
+            gold_dir / "dvf_indice_mensuel_empreintes.json")
+
+
+def _fingerprints(df: pd.DataFrame) -> dict[str, str]:
+    h = pd.util.hash_pandas_object(df[FINGERPRINT_COLS], index=False).to_numpy()
+    return {
+        mois: hashlib.sha256(h[pos].tobytes()).hexdigest()
+        for mois, pos in df.groupby("mois").indices.items()
+    }
+
+
+def update_price_index(transactions: pd.DataFrame, gold_dir: str | Path,
+                       fmt: str = "csv", force: bool = False) -> Path:
+    """Met à jour les partiels et la série ; seuls les mois modifiés sont recalculés."""
+    gold_dir = Path(gold_dir)
+    partials_path, index_path, fp_path = _paths(gold_dir, fmt)
+    df = _with_month(transactions)
+    fingerprints = _fingerprints(df)
+
+    stored = None
+    previous = {}
+    if not force and partials_path.exists() and fp_path.exists():
+        stored = read_silver(partials_path, "dvf_indice_mensuel_partiels")
+        previous = json.loads(fp_path.read_text(encoding="utf-8"))
+
+    changed = sorted(m for m, fp in fingerprints.items() if previous.get(m) != fp)
+    fresh = month_partials(df[df["mois"].isin(changed)])
+    if stored is not None:
+        kept = stored[stored["mois"].isin(set(fingerprints) - set(changed))]
+        partials = pd.concat([kept, fresh], ignore_index=True).sort_values(KEYS, ignore_index=True)
+    else:
+        partials = fresh
+
+    write_silver(partials, partials_path, "dvf_indice_mensuel_partiels")
+    index = index_from_partials(partials)
+    write_silver(index, index_path, "dvf_indice_mensuel")
+    tmp = fp_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(fingerprints, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(fp_path)
+    log("GOLD", f"dvf_indice_mensuel: {len(changed)}/{len(fingerprints)} mois recalculés, "
+                f"{len(index):,} lignes")
+    return index_path
+
+
+def verify_price_index(transactions: pd.DataFrame, gold_dir: str | Path, fmt: str = "csv") -> bool:
+    """Recalcul complet depuis les transactions, comparé aux partiels stockés."""
+    partials_path, _, _ = _paths(Path(gold_dir), fmt)
+    stored = read_silver(partials_path, "dvf_indice_mensuel_partiels").sort_values(KEYS, ignore_index=True)
+    full = month_partials(transactions).sort_values(KEYS, ignore_index=True)
+    ok = (
+        len(stored) == len(full)
+        and stored[KEYS].astype(str).equals(full[KEYS].astype(str))
+        and np.array_equal(stored["nb_ventes"].to_numpy(), full["nb_ventes"].to_numpy())
+        and np.allclose(stored["somme_prix_m2"].to_numpy(dtype=float), full["somme_prix_m2"].to_numpy(dtype=float))
+        and list(stored["sketch"]) == list(full["sketch"])
+    )
+    log("GOLD", f"dvf_indice_mensuel: vérification {'OK' if ok else 'ÉCHEC'} "
+                f"({len(stored):,} partiels stockés, {len(full):,} recalculés)")
+    return ok
@@ -0,0 +1,125 @@
+"""
+Couche GOLD : pyramide de tuiles pour la carte
+----------------------------------------------
+Pour chaque année et chaque niveau de zoom ``Z_MIN``–``Z_MAX`` (tuiles
+Web Mercator z/x/y), les ventes sont regroupées sur une sous-grille de
+``2**CLUSTER_BITS`` × ``2**CLUSTER_BITS`` cellules par tuile. Chaque
+cellule non vide donne un cluster : nombre de ventes, prix/m² médian,
+centroïde (longitude/latitude moyennes).
+
+Stockage : un fichier par année dans ``gold/dvf_tuiles/``
+(``annee=2022.csv`` ou ``.parquet``), plus ``_empreintes.json`` qui garde
+l'empreinte des transactions de chaque année. Une reconstruction ne
+recalcule que les années dont l'empreinte a changé.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.instrument import log
+from pipeline.silver_store import read_silver, write_silver
+
+Z_MIN, Z_MAX = 11, 16
+CLUSTER_BITS = 3
+# À changer si le calcul des tuiles change : force la reconstruction
+TILES_VERSION = "1"
+TILE_COLS = ["annee", "z", "x", "y", "nb_ventes", "prix_m2_median", "longitude", "latitude"]
+FINGERPRINT_COLS = ["id_mutation", "date_mutation", "valeur_fonciere",
+                    "surface_reelle_bati", "longitude", "latitude"]
+
+
+def lonlat_to_pixel(lon, lat, z: int) -> tuple[np.ndarray, np.ndarray]:
+    """Coordonnées entières de cellule Web Mercator au zoom `z`."""
+    n = 2.0 ** z
+    lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+    x = (np.asarray(lon) + 180.0) / 360.0 * n
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * n
+    return (np.clip(x, 0, n - 1).astype("int64"), np.clip(y, 0, n - 1).astype("int64"))
+
+
+def build_tiles(transactions: pd.DataFrame, annee: int) -> pd.DataFrame:
+    """Clusters de toutes les tuiles Z_MIN–Z_MAX pour une année."""
+    df = transactions.dropna(subset=["prix_m2", "longitude", "latitude"])
+    px, py = lonlat_to_pixel(df["longitude"].to_numpy(), df["latitude"].to_numpy(), Z_MAX + CLUSTER_BITS)
+    base = pd.DataFrame({
+        "prix_m2": df["prix_m2"].to_numpy(),
+        "longitude": df["longitude"].to_numpy(),
+        "latitude": df["latitude"].to_numpy(),
+    })
+
+    parts = []
+    for z in range(Z_MIN, Z_MAX + 1):
+        shift = Z_MAX - z
+        g = base.groupby([px >> shift, py >> shift], sort=True)
+        part = g.agg(
+            nb_ventes=("prix_m2", "size"),
+            prix_m2_median=("prix_m2", "median"),
+            longitude=("longitude", "mean"),
+            latitude=("latitude", "mean"),
+        )
+        cx = part.index.get_level_values(0).to_numpy()
+        cy = part.index.get_level_values(1).to_numpy()
+        part = part.reset_index(drop=True).assign(
+            annee=annee, z=z, x=cx >> CLUSTER_BITS, y=cy >> CLUSTER_BITS)
+        parts.append(part)
+
+    return pd.concat(parts, ignore_index=True)[TILE_COLS]
+
+
+def _fingerprint(df: pd.DataFrame) -> str:
+    h = hashlib.sha256(TILES_VERSION.encode())
+    h.update(pd.util.hash_pandas_object(df[FINGERPRINT_COLS], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def tiles_path(tiles_dir: Path, annee: int, fmt: str) -> Path:
+    return tiles_dir / f"annee={annee}.{fmt}"
+
+
+def build_tile_pyramid(transactions: pd.DataFrame, tiles_dir: str | Path,
+                       fmt: str = "csv", force: bool = False) -> dict[int, Path]:
+    """Met à jour la pyramide : seules les années modifiées sont recalculées.
+
+    `transactions` doit porter la colonne prix_m2 (voir
+    ``aggregate_cube.add_prix_m2_typologie``).
+    """
+    tiles_dir = Path(tiles_dir)
+    tiles_dir.mkdir(parents=True, exist_ok=True)
+    fp_path = tiles_dir / "_empreintes.json"
+    previous = {} if force or not fp_path.exists() else json.loads(fp_path.read_text(encoding="utf-8"))
+
+    fingerprints, out, rebuilt = {}, {}, 0
+    for annee, sub in transactions.groupby("annee", sort=True):
+        annee = int(annee)
+        fp = _fingerprint(sub)
+        fingerprints[str(annee)] = fp
+        path = tiles_path(tiles_dir, annee, fmt)
+        out[annee] = path
+        if previous.get(str(annee)) == fp and path.exists():
+            continue
+        tiles = build_tiles(sub, annee)
+        write_silver(tiles, path, "dvf_tuiles")
+        rebuilt += 1
+        log("GOLD", f"dvf_tuiles {annee}: {len(tiles):,} clusters")
+
+    # Années disparues du SILVER
+    for old in set(previous) - set(fingerprints):
+        tiles_path(tiles_dir, int(old), fmt).unlink(missing_ok=True)
+
+    tmp = fp_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(fingerprints, indent=2), encoding="utf-8")
+    tmp.replace(fp_path)
+    log("GOLD", f"dvf_tuiles: {rebuilt}/{len(fingerprints)} années recalculées")
+    return out
+
+
+def read_tiles(tiles_dir: str | Path, fmt: str = "csv") -> pd.DataFrame | None:
+    """Toutes les années de la pyramide, ou None si elle n'a pas été construite."""
+    paths = sorted(Path(tiles_dir).glob(f"annee=*.{fmt}"))
+    if not paths:
+        return None
+    return pd.concat([read_silver(p, "dvf_tuiles") for p in paths], ignore_index=True)
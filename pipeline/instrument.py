@@ -0,0 +1,327 @@
+"""
+Instrumentation du pipeline
+---------------------------
+Chaque nettoyeur (et l'enrichissement, le GOLD) s'exécute dans un
+``stage`` qui relève :
+
+- la durée et le pic de mémoire résidente du processus pendant le stage
+  (``PeakRSS``) ;
+- les lignes en entrée / en sortie, et pour chaque filtre nommé les
+  lignes avant / après (cumulées sur les chunks en mode streaming) ;
+- les octets lus (fichier BRONZE) et écrits (table SILVER, fichier ou
+  dossier partitionné) ;
+- les messages de log (``log`` remplace les ``print`` ad hoc et les garde
+  dans le rapport) ;
+- les résultats des règles de qualité des tables écrites
+  (``pipeline.quality``), résumés en tête du rapport.
+
+Les stages terminés dans un thread sont collectés par ``collect`` :
+l'ordonnanceur s'en sert autour de chaque tâche, y compris dans les
+processus workers, et ``main`` assemble le rapport JSON de l'exécution
+(``write_run_report``).
+
+Profilage à la demande : ``PIPELINE_PROFILE="clean:dvf"`` (motifs fnmatch
+séparés par des virgules) enregistre un profil cProfile de chaque stage
+correspondant dans ``PIPELINE_PROFILE_DIR`` (``data/profiles`` par défaut).
+"""
+
+import cProfile
+import fnmatch
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+PROFILE_ENV = "PIPELINE_PROFILE"
+PROFILE_DIR_ENV = "PIPELINE_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "data/profiles"
+
+_local = threading.local()
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus courant depuis son démarrage (Mo)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss / 2**20 if sys.platform == "darwin" else rss / 2**10  # octets (macOS) / ko (Linux)
+    # ru_maxrss suit VmHWM, que PeakRSS remet à zéro : on garde le pic replié
+    return max(rss, _lifetime_mb)
+
+
+# ---------- Pic de mémoire par bloc ----------
+# ru_maxrss ne redescend jamais : un worker réutilisé rapporterait le pic de
+# toutes ses tâches précédentes. Sous Linux, écrire 5 dans
+# /proc/self/clear_refs remet VmHWM (pic courant) à la mémoire actuelle ; à
+# chaque remise à zéro, le pic atteint depuis la précédente est d'abord
+# reporté sur toutes les mesures ouvertes du processus (stages imbriqués ou
+# dans d'autres threads compris), et sur le pic du processus.
+_peak_lock = threading.Lock()
+_peak_open: dict[int, float] = {}   # mesure ouverte → pic vu jusqu'ici (Mo)
+_peak_ids = iter(range(1, 2**63))
+_hwm_ok: bool | None = None
+_lifetime_mb = 0.0
+
+
+def _vm_hwm_mb() -> float:
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 2**10  # ko
+    raise OSError("VmHWM absent de /proc/self/status")
+
+
+def _reset_hwm() -> None:
+    with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+        f.write("5")
+
+
+def _hwm_supported() -> bool:
+    global _hwm_ok
+    if _hwm_ok is None:
+        try:
+            _vm_hwm_mb()
+            _reset_hwm()
+            _hwm_ok = True
+        except OSError:
+            _hwm_ok = False
+    return _hwm_ok
+
+
+def _fold_hwm() -> None:
+    """Reporte le pic depuis la dernière remise à zéro sur les mesures ouvertes (verrou tenu)."""
+    global _lifetime_mb
+    hwm = _vm_hwm_mb()
+    _lifetime_mb = max(_lifetime_mb, hwm)
+    for k, v in _peak_open.items():
+        _peak_open[k] = max(v, hwm)
+    _reset_hwm()
+
+
+def _after_fork() -> None:
+    global _peak_lock
+    _peak_lock = threading.Lock()
+    _peak_open.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+class PeakRSS:
+    """Pic de mémoire résidente (Mo) du processus entre ``start`` et ``stop``.
+
+    Sans /proc (macOS) ou si clear_refs n'est pas accessible, ``stop``
+    renvoie le pic depuis le démarrage du processus (``peak_rss_mb``).
+    """
+
+    def __init__(self):
+        self._id = None
+
+    def start(self) -> "PeakRSS":
+        if _hwm_supported():
+            with _peak_lock:
+                _fold_hwm()
+                self._id = next(_peak_ids)
+                _peak_open[self._id] = 0.0
+        return self
+
+    def stop(self) -> float:
+        if self._id is None:
+            return peak_rss_mb()
+        with _peak_lock:
+            _fold_hwm()
+            return _peak_open.pop(self._id)
+
+
+def path_bytes(path: str | Path | None) -> int:
+    """Taille d'un fichier, ou de tous les fichiers d'un dossier (Parquet partitionné)."""
+    if path is None:
+        return 0
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+@dataclass
+class Stage:
+    name: str
+    tag: str
+    start: float = 0.0
+    duration_s: float = 0.0
+    status: str = "ok"
+    rows_in: int = 0
+    rows_out: int = 0
+    filters: dict[str, dict[str, int]] = field(default_factory=dict)
+    bytes_read: int = 0
+    bytes_written: int = 0
+    peak_rss_mb: float = 0.0
+    profile: str | None = None
+    messages: list[str] = field(default_factory=list)
+    quality: list[dict] = field(default_factory=list)
+
+    def log(self, msg: str) -> None:
+        print(f"[{self.tag}] {msg}")
+        self.messages.append(f"[{self.tag}] {msg}")
+
+    def count(self, step: str, rows_in: int, rows_out: int) -> None:
+        """Ajoute les comptes d'un filtre (cumulés d'un chunk à l'autre)."""
+        f = self.filters.setdefault(step, {"rows_in": 0, "rows_out": 0})
+        f["rows_in"] += int(rows_in)
+        f["rows_out"] += int(rows_out)
+
+    def keep(self, step: str, df, mask):
+        """``df[mask]`` en comptant les lignes avant / après sous le nom `step`."""
+        out = df[mask]
+        self.count(step, len(df), len(out))
+        return out
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["filters"] = [{"step": k, **v} for k, v in self.filters.items()]
+        d["duration_s"] = round(self.duration_s, 4)
+        d["peak_rss_mb"] = round(self.peak_rss_mb, 1)
+        return d
+
+
+def _stack() -> list[Stage]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_stage() -> Stage | None:
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def log(tag: str, msg: str) -> None:
+    """Log d'un module utilitaire : affiché, et gardé dans le stage en cours s'il y en a un."""
+    print(f"[{tag}] {msg}")
+    st = current_stage()
+    if st is not None:
+        st.messages.append(f"[{tag}] {msg}")
+
+
+def keep(step: str, df, mask):
+    """``df[mask]``, compté dans le stage en cours s'il y en a un (voir ``Stage.keep``)."""
+    st = current_stage()
+    return st.keep(step, df, mask) if st is not None else df[mask]
+
+
+def count(step: str, rows_in: int, rows_out: int) -> None:
+    st = current_stage()
+    if st is not None:
+        st.count(step, rows_in, rows_out)
+
+
+def _profile_path(name: str) -> Path | None:
+    patterns = [p.strip() for p in os.environ.get(PROFILE_ENV, "").split(",") if p.strip()]
+    if not any(fnmatch.fnmatchcase(name, p) for p in patterns):
+        return None
+    out = Path(os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR))
+    out.mkdir(parents=True, exist_ok=True)
+    return out / f"{name.replace(':', '_')}.prof"
+
+
+@contextmanager
+def stage(name: str, tag: str | None = None, src: str | Path | None = None,
+          dst: str | Path | None = None):
+    """Mesure le bloc comme un stage ; `src` / `dst` comptent les octets lus / écrits.
+
+    Sans `dst`, le bloc peut compter lui-même ses octets (``st.bytes_written``)."""
+    st = Stage(name, tag or name.split(":")[-1].upper())
+    st.bytes_read = path_bytes(src)
+    prof_path = _profile_path(name)
+    profiler = cProfile.Profile() if prof_path else None
+    stack = _stack()
+    stack.append(st)
+    peak = PeakRSS().start()
+    st.start = time.time()
+    t0 = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield st
+    except BaseException:
+        st.status = "failed"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(prof_path)
+            st.profile = str(prof_path)
+        st.duration_s = time.perf_counter() - t0
+        st.bytes_written += path_bytes(dst)
+        st.peak_rss_mb = peak.stop()
+        stack.pop()
+        records = getattr(_local, "records", None)
+        if records is not None:
+            records.append(st.to_dict())
+
+
+@contextmanager
+def collect():
+    """Liste des stages terminés dans ce thread pendant le bloc (dicts sérialisables)."""
+    previous = getattr(_local, "records", None)
+    _local.records = records = []
+    try:
+        yield records
+    finally:
+        _local.records = previous
+
+
+# ---------- Rapport d'exécution ----------
+def run_report(results: dict, started: float, startup_s: float | None = None) -> dict:
+    """Rapport JSON-isable à partir des ``TaskResult`` de l'ordonnanceur.
+
+    `startup_s` : démarrage du processus principal (imports, construction du
+    DAG) avant la première tâche.
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    children = children / 2**20 if sys.platform == "darwin" else children / 2**10
+    # ru_maxrss d'un worker ne couvre que la fin de sa vie (PeakRSS remet son
+    # pic à zéro) : on le complète par les pics mesurés tâche par tâche
+    children = max([children, *(r.peak_rss_mb for r in results.values() if r.peak_rss_mb is not None)])
+    tasks = []
+    for r in results.values():
+        tasks.append({
+            "name": r.name,
+            "status": r.status,
+            "start": r.start,
+            "duration_s": round(r.duration, 4),
+            "peak_rss_mb": round(r.peak_rss_mb, 1) if r.peak_rss_mb is not None else None,
+            "error": r.error,
+            "stages": r.stages,
+        })
+    stages = [s for t in tasks for s in t["stages"]]
+    checks = [{"stage": s["name"], **q} for s in stages for q in s.get("quality", [])]
+    return {
+        "started": started,
+        "duration_s": round(time.time() - started, 4),
+        "startup_s": round(startup_s, 4) if startup_s is not None else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_workers_mb": round(children, 1),
+        "bytes_read": sum(s["bytes_read"] for s in stages),
+        "bytes_written": sum(s["bytes_written"] for s in stages),
+        "quality": {
+            "rules": len(checks),
+            "failed": [q for q in checks if q["status"] == "failed"],
+            "warnings": [q for q in checks if q["status"] == "warning"],
+        },
+        "tasks": tasks,
+    }
+
+
+def write_run_report(path: str | Path, results: dict, started: float,
+                     startup_s: float | None = None) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(run_report(results, started, startup_s), indent=2, ensure_ascii=False, default=str),
+                   encoding="utf-8")
+    tmp.replace(path)
+    return path
@@ -0,0 +1,155 @@
+"""
+Manifeste d'exécution du pipeline
+---------------------------------
+Pour chaque jeu de données, le manifeste (``data/manifest.json``) garde :
+
+- le hash SHA-256 du fichier BRONZE utilisé ;
+- la version du nettoyeur (hash du code source de son module) ;
+- le chemin et le hash de la sortie SILVER produite.
+
+Si rien n'a changé depuis la dernière exécution, le nettoyage peut être
+sauté (``Manifest.is_up_to_date``).
+
+Une étape dérivée (enrichissement des transactions) a une entrée du même
+type, avec le hash de chacune de ses tables d'entrée à la place du
+BRONZE (``make_derived_entry`` / ``derived_is_up_to_date``).
+"""
+
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+_BLOCK = 1 << 20
+
+
+def file_hash(path: str | Path) -> str:
+    """SHA-256 d'un fichier, ou d'un dossier (dataset Parquet partitionné)."""
+    path = Path(path)
+    h = hashlib.sha256()
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for p in files:
+        if path.is_dir():
+            h.update(str(p.relative_to(path)).encode())
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(_BLOCK), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def _pipeline_sources(module_name: str, seen: set[str]) -> None:
+    """Ajoute à `seen` le fichier du module et, récursivement, ceux des modules
+    ``pipeline.*`` qu'il importe (moteur de specs, silver_store, ...)."""
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or not spec.origin or spec.origin in seen:
+        return
+    seen.add(spec.origin)
+    with open(spec.origin, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        elif isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        else:
+            continue
+        for name in names:
+            if name.split(".")[0] == "pipeline":
+                _pipeline_sources(name, seen)
+
+
+def cleaner_version(fn) -> str:
+    """Version d'un nettoyeur : hash des sources de son module et des modules
+    du pipeline dont il dépend.
+
+    `fn` : la fonction, ou sa cible ``"module:fonction"`` (calculée sans
+    importer le module, voir ``CLEANERS`` dans main.py).
+    """
+    files: set[str] = set()
+    _pipeline_sources(fn.partition(":")[0] if isinstance(fn, str) else fn.__module__, files)
+    if not files:
+        files.add(inspect.getsourcefile(fn))
+    h = hashlib.sha256()
+    for path in sorted(files):
+        h.update(file_hash(path).encode())
+    return h.hexdigest()[:16]
+
+
+def entry_is_up_to_date(entry: dict | None, src: str | Path, dst: str | Path, fn) -> bool:
+    """Vrai si BRONZE, nettoyeur et SILVER correspondent à l'entrée `entry`."""
+    src, dst = Path(src), Path(dst)
+    if entry is None or not src.exists() or not dst.exists():
+        return False
+    return (
+        entry["bronze"]["path"] == str(src)
+        and entry["silver"]["path"] == str(dst)
+        and entry["cleaner_version"] == cleaner_version(fn)
+        and entry["bronze"]["sha256"] == file_hash(src)
+        and entry["silver"]["sha256"] == file_hash(dst)
+    )
+
+
+def make_entry(src: str | Path, dst: str | Path, fn) -> dict:
+    return {
+        "bronze": {"path": str(Path(src)), "sha256": file_hash(src)},
+        "cleaner": f"{fn.__module__}.{fn.__name__}",
+        "cleaner_version": cleaner_version(fn),
+        "silver": {"path": str(Path(dst)), "sha256": file_hash(dst)},
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def _inputs(inputs: dict[str, str | Path]) -> dict[str, dict]:
+    return {name: {"path": str(Path(p)), "sha256": file_hash(p) if Path(p).exists() else None}
+            for name, p in sorted(inputs.items())}
+
+
+def derived_is_up_to_date(entry: dict | None, inputs: dict[str, str | Path],
+                          dst: str | Path, fn) -> bool:
+    """Vrai si les tables d'entrée (`inputs` : nom → chemin, absentes
+    comprises), le code et la sortie correspondent à l'entrée `entry`."""
+    dst = Path(dst)
+    if entry is None or not dst.exists():
+        return False
+    return (
+        entry.get("inputs") == _inputs(inputs)
+        and entry["silver"]["path"] == str(dst)
+        and entry["cleaner_version"] == cleaner_version(fn)
+        and entry["silver"]["sha256"] == file_hash(dst)
+    )
+
+
+def make_derived_entry(inputs: dict[str, str | Path], dst: str | Path, fn) -> dict:
+    return {
+        "inputs": _inputs(inputs),
+        "cleaner": f"{fn.__module__}.{fn.__name__}",
+        "cleaner_version": cleaner_version(fn),
+        "silver": {"path": str(Path(dst)), "sha256": file_hash(dst)},
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+class Manifest:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_up_to_date(self, name: str, src: str | Path, dst: str | Path, fn) -> bool:
+        """Vrai si BRONZE, nettoyeur et SILVER sont ceux de la dernière exécution."""
+        return entry_is_up_to_date(self.entries.get(name), src, dst, fn)
+
+    def record(self, name: str, src: str | Path, dst: str | Path, fn) -> None:
+        self.entries[name] = make_entry(src, dst, fn)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        tmp.replace(self.path)
@@ -0,0 +1,256 @@
+"""
+Règles de qualité des tables SILVER
+-----------------------------------
+Des règles déclaratives par table (``RULES``, comme les schémas de
+``pipeline.silver_store``) :
+
+- ``NotNull`` : part maximale de valeurs manquantes (une conversion
+  ``errors="coerce"`` qui échoue laisse un NA : c'est ici qu'elle se voit) ;
+- ``InRange`` : part maximale de valeurs hors bornes ;
+- ``ArrondissementCode`` : code postal / code INSEE cohérent avec le
+  numéro d'arrondissement (``75005`` / ``75105`` ↔ 5, ``75116`` ↔ 16) ;
+- ``UniqueKey`` : part maximale de lignes en double sur une clé.
+
+Elles sont évaluées par ``SilverWriter`` sur chaque morceau écrit, déjà
+typé : même passe que le nettoyage, sans relire la table. Les comptes
+s'additionnent d'un chunk à l'autre ; les doublons sont détectés sur les
+hashes (uint64) des clés, gardés jusqu'à la fin de l'écriture.
+
+À la fermeture du writer, chaque règle est comparée à son seuil. Les
+résultats vont dans le stage en cours (``Stage.quality``, repris dans le
+rapport d'exécution) ; une règle ``"error"`` dépassée lève
+``QualityError`` avant la publication de la table : la table SILVER
+précédente reste en place et le stage échoue. Une règle ``"warning"``
+est seulement signalée.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from pipeline.instrument import current_stage, log
+
+
+class QualityError(ValueError):
+    """Une règle de qualité de sévérité ``"error"`` dépasse son seuil."""
+
+
+@dataclass(frozen=True)
+class Rule:
+    max_ratio: float = 0.0          # part maximale de lignes en défaut
+    severity: str = "error"         # "error" (fait échouer le stage) ou "warning"
+
+    @property
+    def name(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        raise NotImplementedError
+
+    def evaluate(self, df: pd.DataFrame) -> tuple[int, int]:
+        """(lignes vérifiées, lignes en défaut) d'un morceau."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class NotNull(Rule):
+    column: str = ""
+
+    @property
+    def name(self) -> str:
+        return f"non_null:{self.column}"
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return (self.column,)
+
+    def evaluate(self, df: pd.DataFrame) -> tuple[int, int]:
+        return len(df), int(df[self.column].isna().sum())
+
+
+@dataclass(frozen=True)
+class InRange(Rule):
+    column: str = ""
+    low: float | None = None
+    high: float | None = None
+
+    @property
+    def name(self) -> str:
+        return f"bornes:{self.column}"
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return (self.column,)
+
+    def evaluate(self, df: pd.DataFrame) -> tuple[int, int]:
+        values = df[self.column].to_numpy(dtype="float64", na_value=np.nan)
+        present = ~np.isnan(values)
+        bad = np.zeros(len(values), dtype=bool)
+        if self.low is not None:
+            bad |= values < self.low
+        if self.high is not None:
+            bad |= values > self.high
+        return int(present.sum()), int((bad & present).sum())
+
+
+def _code_arrondissement(codes: pd.Series, prefixes: tuple[str, ...]) -> pd.Series:
+    """Arrondissement désigné par chaque code (750NN, 751NN, ...), NA sinon."""
+    text = codes.astype("string").str.strip()
+    arr = pd.to_numeric(text.str.slice(3, 5), errors="coerce")
+    valid = text.str.len().eq(5) & text.str.slice(0, 3).isin(list(prefixes))
+    return arr.where(valid.fillna(False))
+
+
+@dataclass(frozen=True)
+class ArrondissementCode(Rule):
+    code: str = "code_postal"
+    arrondissement: str = "arrondissement"
+    prefixes: tuple[str, ...] = ("750", "751")
+
+    @property
+    def name(self) -> str:
+        return f"coherence:{self.code}/{self.arrondissement}"
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return (self.code, self.arrondissement)
+
+    def evaluate(self, df: pd.DataFrame) -> tuple[int, int]:
+        codes = df[self.code]
+        if isinstance(codes.dtype, pd.CategoricalDtype):
+            # Une conversion par catégorie, pas par ligne
+            per_code = _code_arrondissement(pd.Series(codes.cat.categories), self.prefixes).to_numpy()
+            expected = np.append(per_code.astype("float64"), np.nan)[codes.cat.codes.to_numpy()]
+        else:
+            expected = _code_arrondissement(codes, self.prefixes).to_numpy(dtype="float64", na_value=np.nan)
+        arr = df[self.arrondissement].to_numpy(dtype="float64", na_value=np.nan)
+        checked = codes.notna().to_numpy() & ~np.isnan(arr)
+        return int(checked.sum()), int((checked & (expected != arr)).sum())
+
+
+@dataclass(frozen=True)
+class UniqueKey(Rule):
+    key: tuple[str, ...] = ()
+
+    @property
+    def name(self) -> str:
+        return f"cle_unique:{','.join(self.key)}"
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self.key
+
+    def hashes(self, df: pd.DataFrame) -> np.ndarray:
+        keys = df[list(self.key)]
+        return pd.util.hash_pandas_object(keys, index=False, categorize=False).to_numpy()
+
+
+# --- Règles par table SILVER (tables absentes : pas de contrôle) ---
+RULES: dict[str, tuple[Rule, ...]] = {
+    "transactions_residentiel": (
+        UniqueKey(key=("id_mutation",)),
+        NotNull(column="arrondissement"),
+        ArrondissementCode(code="code_postal", arrondissement="arrondissement"),
+        NotNull(column="date_mutation", max_ratio=0.01),
+        InRange(column="annee", low=2014, high=2100),
+        InRange(column="prix_m2", low=500, high=30000),
+        InRange(column="surface_reelle_bati", low=8, high=1000),
+        NotNull(column="longitude", max_ratio=0.05, severity="warning"),
+        InRange(column="longitude", low=2.2, high=2.5, max_ratio=0.01, severity="warning"),
+        InRange(column="latitude", low=48.8, high=48.93, max_ratio=0.01, severity="warning"),
+    ),
+    "logements_sociaux_programmes": (
+        UniqueKey(key=("id_programme",), max_ratio=0.01, severity="warning"),
+        NotNull(column="arrondissement"),
+        ArrondissementCode(code="code_postal", arrondissement="arrondissement"),
+        NotNull(column="annee", max_ratio=0.01, severity="warning"),
+        InRange(column="annee", low=1990, high=2100, severity="warning"),
+        InRange(column="nb_total", low=0),
+    ),
+    "etablissements_scolaires": (
+        NotNull(column="arr_num"),
+        InRange(column="arr_num", low=1, high=20),
+        ArrondissementCode(code="arr_insee", arrondissement="arr_num", prefixes=("751",),
+                           max_ratio=0.01, severity="warning"),
+        NotNull(column="nom_etablissement", max_ratio=0.01, severity="warning"),
+    ),
+    "espaces_verts": (
+        UniqueKey(key=("id_espace_vert",)),
+        NotNull(column="arr_num"),
+        ArrondissementCode(code="code_postal", arrondissement="arr_num"),
+        NotNull(column="nom_espace_vert", max_ratio=0.05, severity="warning"),
+    ),
+    "abribac_dechets_alimentaires": (
+        UniqueKey(key=("pavda_id",), max_ratio=0.01, severity="warning"),
+        ArrondissementCode(code="code_insee", arrondissement="arrondissement", prefixes=("751",),
+                           max_ratio=0.01, severity="warning"),
+        InRange(column="arrondissement", low=1, high=20, max_ratio=0.01, severity="warning"),
+        NotNull(column="longitude", max_ratio=0.05, severity="warning"),
+        InRange(column="longitude", low=2.2, high=2.5, max_ratio=0.01, severity="warning"),
+        InRange(column="latitude", low=48.8, high=48.93, max_ratio=0.01, severity="warning"),
+    ),
+}
+
+
+@dataclass
+class QualityCheck:
+    """Évaluation des règles d'une table, morceau par morceau (voir le docstring du module)."""
+    table: str
+    rules: tuple[Rule, ...] | None = None
+    checked: list[int] = field(default_factory=list)
+    failed: list[int] = field(default_factory=list)
+    _hashes: list[list[np.ndarray]] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.rules is None:
+            self.rules = RULES.get(self.table, ())
+        self.checked = [0] * len(self.rules)
+        self.failed = [0] * len(self.rules)
+        self._hashes = [[] for _ in self.rules]
+
+    def update(self, df: pd.DataFrame) -> None:
+        for i, rule in enumerate(self.rules):
+            if not all(c in df.columns for c in rule.columns):
+                continue
+            if isinstance(rule, UniqueKey):
+                self._hashes[i].append(rule.hashes(df))
+                self.checked[i] += len(df)
+            else:
+                n, bad = rule.evaluate(df)
+                self.checked[i] += n
+                self.failed[i] += bad
+
+    def results(self) -> list[dict]:
+        out = []
+        for i, rule in enumerate(self.rules):
+            failed = self.failed[i]
+            if isinstance(rule, UniqueKey) and self._hashes[i]:
+                h = np.sort(np.concatenate(self._hashes[i]))
+                failed = int((h[1:] == h[:-1]).sum())
+            checked = self.checked[i]
+            ratio = failed / checked if checked else 0.0
+            status = "ok" if ratio <= rule.max_ratio else ("failed" if rule.severity == "error" else "warning")
+            out.append({
+                "table": self.table, "rule": rule.name, "checked": checked, "failed": failed,
+                "ratio": round(ratio, 6), "max_ratio": rule.max_ratio, "severity": rule.severity,
+                "status": status,
+            })
+        return out
+
+    def finish(self) -> list[dict]:
+        """Compare chaque règle à son seuil, enregistre les résultats dans le
+        stage en cours et lève ``QualityError`` si une règle ``"error"`` échoue."""
+        results = self.results()
+        st = current_stage()
+        if st is not None:
+            st.quality.extend(results)
+        for r in results:
+            if r["status"] != "ok":
+                log("QUALITE", f"{self.table}: {r['rule']} {r['failed']:,}/{r['checked']:,} "
+                               f"({r['ratio']:.2%} > {r['max_ratio']:.2%}, {r['severity']})")
+        failed = [r["rule"] for r in results if r["status"] == "failed"]
+        if failed:
+            raise QualityError(f"{self.table}: règles de qualité en échec : {', '.join(failed)}")
+        return results
@@ -0,0 +1,198 @@
+"""
+Ordonnanceur de tâches (DAG) pour le pipeline
+---------------------------------------------
+Chaque tâche déclare ses dépendances ; elle démarre dès que toutes ses
+dépendances ont réussi, sans attendre le reste du pipeline.
+
+- tâches I/O (téléchargements) → pool de threads ;
+- tâches CPU (nettoyeurs pandas) → pool de processus dimensionné sur la machine.
+
+Un échec est reporté sur la tâche concernée ; ses dépendants sont marqués
+« skipped » et les autres branches continuent. ``print_summary`` affiche
+les durées et le chemin critique de l'exécution.
+
+Chaque résultat porte aussi les stages instrumentés exécutés par la tâche
+et le pic de mémoire de son worker (voir ``pipeline.instrument``).
+"""
+
+import concurrent.futures as cf
+import os
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from pipeline.instrument import PeakRSS, collect
+
+
+@dataclass
+class Task:
+    name: str
+    fn: Callable
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    deps: tuple[str, ...] = ()
+    cpu: bool = False
+
+
+@dataclass
+class TaskResult:
+    name: str
+    status: str  # "ok" | "failed" | "skipped"
+    value: Any = None
+    error: str | None = None
+    start: float | None = None
+    end: float | None = None
+    stages: list[dict] = field(default_factory=list)
+    peak_rss_mb: float | None = None
+
+    @property
+    def duration(self) -> float:
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+
+def _timed(fn, args, kwargs):
+    """Exécute `fn` (dans le worker) et renvoie
+    (ok, valeur|trace, début, fin, stages instrumentés, pic RSS du worker
+    pendant la tâche)."""
+    peak = PeakRSS().start()
+    start = time.time()
+    with collect() as stages:
+        try:
+            value = fn(*args, **kwargs)
+            return True, value, start, time.time(), stages, peak.stop()
+        except Exception:
+            return False, traceback.format_exc(), start, time.time(), stages, peak.stop()
+
+
+def _check(tasks: dict[str, Task]) -> None:
+    for t in tasks.values():
+        unknown = [d for d in t.deps if d not in tasks]
+        if unknown:
+            raise ValueError(f"Tâche {t.name}: dépendances inconnues {unknown}")
+    # Détection de cycle (DFS)
+    state: dict[str, int] = {}
+
+    def visit(name):
+        if state.get(name) == 1:
+            raise ValueError(f"Cycle détecté autour de la tâche {name}")
+        if state.get(name) == 2:
+            return
+        state[name] = 1
+        for d in tasks[name].deps:
+            visit(d)
+        state[name] = 2
+
+    for name in tasks:
+        visit(name)
+
+
+def run_dag(tasks: list[Task], io_workers: int = 4,
+            cpu_workers: int | None = None) -> dict[str, TaskResult]:
+    """Exécute les tâches en respectant leurs dépendances. Ne lève pas en cas d'échec."""
+    by_name = {t.name: t for t in tasks}
+    if len(by_name) != len(tasks):
+        raise ValueError("Noms de tâches dupliqués")
+    _check(by_name)
+
+    results: dict[str, TaskResult] = {}
+    pending = dict(by_name)
+    running: dict[cf.Future, str] = {}
+    cpu_workers = cpu_workers or os.cpu_count() or 1
+
+    with cf.ThreadPoolExecutor(max_workers=io_workers) as io_pool, \
+            cf.ProcessPoolExecutor(max_workers=cpu_workers) as cpu_pool:
+
+        def schedule():
+            for name, t in list(pending.items()):
+                dep_status = [results[d].status if d in results else None for d in t.deps]
+                if any(s in ("failed", "skipped") for s in dep_status):
+                    failed = [d for d, s in zip(t.deps, dep_status) if s != "ok"]
+                    results[name] = TaskResult(name, "skipped", error=f"dépendances en échec: {failed}")
+                    del pending[name]
+                elif all(s == "ok" for s in dep_status):
+                    pool = cpu_pool if t.cpu else io_pool
+                    running[pool.submit(_timed, t.fn, t.args, t.kwargs)] = name
+                    del pending[name]
+
+        schedule()
+        while running:
+            done, _ = cf.wait(running, return_when=cf.FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    ok, value, start, end, stages, rss = fut.result()
+                except Exception as e:  # processus worker mort, pickling...
+                    results[name] = TaskResult(name, "failed", error=repr(e))
+                    print(f"[DAG] ✗ {name}: {e!r}")
+                    continue
+                if ok:
+                    results[name] = TaskResult(name, "ok", value=value, start=start, end=end,
+                                               stages=stages, peak_rss_mb=rss)
+                else:
+                    results[name] = TaskResult(name, "failed", error=value, start=start, end=end,
+                                               stages=stages, peak_rss_mb=rss)
+                    print(f"[DAG] ✗ {name} a échoué:\n{value}")
+            # Les statuts "skipped" peuvent se propager en cascade
+            n = -1
+            while n != len(pending):
+                n = len(pending)
+                schedule()
+
+    return results
+
+
+def critical_path(tasks: list[Task], results: dict[str, TaskResult]) -> list[str]:
+    """Chaîne de dépendances la plus longue en durées d'exécution cumulées
+    (tâches exécutées uniquement).
+
+    Les durées sont mesurées dans les workers : l'attente d'une tâche dans
+    la file d'un pool n'en fait pas partie. Le chemin ne dépend donc pas du
+    nombre de cœurs, contrairement à la dernière tâche terminée (sur une
+    machine à un cœur, c'est simplement la dernière de la file).
+    """
+    by_name = {t.name: t for t in tasks}
+    ran = [t.name for t in tasks if results.get(t.name) and results[t.name].end is not None]
+    if not ran:
+        return []
+    ran_set = set(ran)
+    best: dict[str, tuple[float, str | None]] = {}  # tâche → (durée cumulée, dépendance amont)
+
+    def length(name: str) -> float:
+        if name not in best:
+            deps = [d for d in by_name[name].deps if d in ran_set]
+            prev = max(deps, key=length, default=None)
+            best[name] = (results[name].duration + (length(prev) if prev else 0.0), prev)
+        return best[name][0]
+
+    node = max(ran, key=length)
+    path = []
+    while node is not None:
+        path.append(node)
+        node = best[node][1]
+    return path[::-1]
+
+
+def print_summary(tasks: list[Task], results: dict[str, TaskResult]) -> None:
+    starts = [r.start for r in results.values() if r.start is not None]
+    ends = [r.end for r in results.values() if r.end is not None]
+    t0 = min(starts) if starts else 0.0
+
+    print("\n[DAG] Résumé")
+    for t in tasks:
+        r = results[t.name]
+        offset = f"+{r.start - t0:6.2f}s" if r.start is not None else " " * 8
+        print(f"  {r.status:<8} {t.name:<42} {offset}  {r.duration:7.2f}s")
+
+    path = critical_path(tasks, results)
+    if path:
+        total = max(ends) - t0
+        length = sum(results[n].duration for n in path)
+        chain = " → ".join(f"{n} ({results[n].duration:.2f}s)" for n in path)
+        print(f"[DAG] Chemin critique ({length:.2f}s de calcul, {total:.2f}s au total): {chain}")
+
+    failed = [r.name for r in results.values() if r.status != "ok"]
+    if failed:
+        print(f"[DAG] Tâches non abouties: {failed}")
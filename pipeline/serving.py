@@ -0,0 +1,209 @@
+"""
+Tables servies par l'API
+------------------------
+Les workers de l'API (``uvicorn --workers N``) ne relisent pas chacun les
+tables SILVER / GOLD : le pipeline les publie une fois au format Arrow IPC
+non compressé, déjà préparées pour l'API (colonnes utiles, transactions
+triées par date décroissante, index spatial renuméroté), et chaque worker
+les projette en mémoire (``pyarrow.memory_map``) sans copie. Les pages
+sont celles du cache disque : partagées par tous les workers, payées une
+fois par machine ; l'ouverture prend quelques millisecondes.
+
+Disposition :
+
+    data/serving/<version>/            une version publiée, immuable
+        <table>.arrow                   tables Arrow IPC
+        transactions.spatial/*.npy      index spatial (np.load mmap_mode="r")
+        version.json                    lignes par table, paramètres de l'index
+    data/serving/CURRENT               version courante
+
+La version est dérivée du contenu des tables source : republier sans
+changement ne crée rien. ``publish`` écrit la version dans un dossier
+temporaire, le renomme, puis remplace ``CURRENT`` (écriture atomique) ;
+les workers basculent sur la nouvelle version entre deux requêtes. Les
+``KEEP_VERSIONS`` dernières versions sont gardées pour les workers en
+retard (sous POSIX, un fichier supprimé reste lisible tant qu'il est
+projeté).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from pipeline.clean.enrich_transactions import AMENITY_LAYERS
+from pipeline.gold.tiles import read_tiles
+from pipeline.instrument import log, stage
+from pipeline.manifest import file_hash
+from pipeline.silver_store import memory_bytes, read_silver
+from pipeline.spatial_index import GridIndex, load_spatial_index
+
+SERVING_DIR = "serving"
+CURRENT = "CURRENT"
+KEEP_VERSIONS = 2
+# À incrémenter si la préparation des tables change (colonnes, tri, disposition)
+SERVING_VERSION = "1"
+
+TRANSACTION_COLS = [
+    "id_mutation", "date_mutation", "annee", "arrondissement", "type_local",
+    "typologie", "nb_locaux", "surface_reelle_bati", "nombre_pieces_principales",
+    "valeur_fonciere", "prix_m2", "longitude", "latitude",
+    *(c for layer in AMENITY_LAYERS for c in layer.columns),
+]
+
+# Table servie → (couche, table du schéma) ; les tuiles sont un dossier d'années
+SOURCES = {
+    "cube": ("gold", "dvf_prix_m2_cube"),
+    "profil": ("gold", "arrondissement_profil"),
+    "ls_arr_annee": ("gold", "logements_sociaux_arr_annee"),
+    "transactions": ("silver", "transactions_residentiel"),
+}
+GRID_ARRAYS = ("lon", "lat", "rows", "offsets")
+
+
+def _source_paths(data_dir: Path, fmt: str) -> dict[str, Path]:
+    paths = {name: data_dir / layer / f"{table}.{fmt}" for name, (layer, table) in SOURCES.items()}
+    paths["tiles"] = data_dir / "gold" / "dvf_tuiles"
+    return paths
+
+
+# ---------- Lecture depuis SILVER / GOLD ----------
+def prepare_transactions(tx: pd.DataFrame, spatial: GridIndex | None = None) -> tuple[pd.DataFrame, GridIndex]:
+    """Colonnes de l'API, tri par date décroissante, index spatial renuméroté."""
+    if spatial is None:
+        spatial = GridIndex.build(tx["longitude"].to_numpy(), tx["latitude"].to_numpy())
+    tx = tx[[c for c in TRANSACTION_COLS if c in tx.columns]].reset_index(drop=True)
+    tx = tx.sort_values("date_mutation", ascending=False, kind="stable")
+    new_position = np.empty(len(tx), dtype="int64")
+    new_position[tx.index.to_numpy()] = np.arange(len(tx))
+    return tx.reset_index(drop=True), spatial.remap(new_position)
+
+
+def load_source_tables(data_dir: str | Path, fmt: str = "csv") -> tuple[dict, GridIndex | None]:
+    """Tables de l'API lues dans SILVER / GOLD (None si absentes), transactions préparées."""
+    data_dir = Path(data_dir)
+    paths = _source_paths(data_dir, fmt)
+    tables: dict[str, pd.DataFrame | None] = {}
+    for name, (_, table) in SOURCES.items():
+        if not paths[name].exists():
+            tables[name] = None
+            continue
+        tables[name] = df = read_silver(paths[name], table)
+        log("API", f"{table}: {len(df):,} lignes, {memory_bytes(df) / 1e6:.1f} Mo")
+    tables["tiles"] = read_tiles(paths["tiles"], fmt)
+
+    spatial = None
+    if tables["transactions"] is not None:
+        tx = tables["transactions"]
+        tables["transactions"], spatial = prepare_transactions(
+            tx, load_spatial_index(paths["transactions"], n_rows=len(tx)))
+    return tables, spatial
+
+
+# ---------- Publication ----------
+def source_version(data_dir: str | Path, fmt: str = "csv") -> str:
+    """Identifiant dérivé du contenu des tables source (et du format de publication)."""
+    h = hashlib.sha256(f"{SERVING_VERSION}:{fmt}".encode())
+    for name, path in sorted(_source_paths(Path(data_dir), fmt).items()):
+        if path.exists():
+            h.update(f"{name}:{file_hash(path)}".encode())
+    return h.hexdigest()[:12]
+
+
+def _write_arrow(df: pd.DataFrame, path: Path) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    with ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+def publish(data_dir: str | Path, fmt: str = "csv") -> Path:
+    """Publie les tables de l'API (si leur contenu a changé) et en fait la version courante."""
+    data_dir = Path(data_dir)
+    root = data_dir / SERVING_DIR
+    version = source_version(data_dir, fmt)
+    out = root / version
+    with stage("serving", dst=out) as st:
+        if (out / "version.json").exists():
+            st.log(f"version {version} déjà publiée")
+        else:
+            tables, spatial = load_source_tables(data_dir, fmt)
+            tmp = root / f".tmp-{version}-{os.getpid()}"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            meta = {"version": version, "created": time.time(), "tables": {}}
+            for name, df in tables.items():
+                if df is not None:
+                    _write_arrow(df, tmp / f"{name}.arrow")
+                    meta["tables"][name] = len(df)
+            if spatial is not None:
+                (tmp / "transactions.spatial").mkdir()
+                for a in GRID_ARRAYS:
+                    np.save(tmp / "transactions.spatial" / f"{a}.npy", getattr(spatial, a))
+                meta["spatial"] = {"origin": list(spatial.origin), "step": list(spatial.step),
+                                   "shape": list(spatial.shape), "n_rows": spatial.n_rows}
+            (tmp / "version.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+            shutil.rmtree(out, ignore_errors=True)
+            tmp.replace(out)
+            st.rows_out = sum(meta["tables"].values())
+            st.log(f"version {version} publiée : " + ", ".join(f"{k} {v:,}" for k, v in meta["tables"].items()))
+        _write_text(root / CURRENT, version)
+        _prune(root, version)
+    return out
+
+
+def _prune(root: Path, current: str) -> None:
+    """Supprime les versions au-delà des KEEP_VERSIONS plus récentes (la courante est gardée)."""
+    versions = sorted((p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    keep = {current, *(p.name for p in versions[:KEEP_VERSIONS])}
+    for p in versions:
+        if p.name not in keep:
+            shutil.rmtree(p, ignore_errors=True)
+
+
+# ---------- Lecture par les workers ----------
+def current_version(data_dir: str | Path) -> str | None:
+    """Version publiée courante, ou None si rien n'a été publié."""
+    try:
+        version = (Path(data_dir) / SERVING_DIR / CURRENT).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def _zero_copy(arrow_type: pa.DataType):
+    # Colonnes adossées aux tampons Arrow projetés ; les catégories (dictionnaires,
+    # codes int8) restent des Categorical pandas
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def _map_table(path: Path) -> pd.DataFrame:
+    table = ipc.open_file(pa.memory_map(str(path))).read_all()
+    return table.to_pandas(types_mapper=_zero_copy)
+
+
+def open_version(data_dir: str | Path, version: str) -> tuple[dict, GridIndex | None]:
+    """Tables et index spatial d'une version publiée, projetés en mémoire sans copie."""
+    out = Path(data_dir) / SERVING_DIR / version
+    meta = json.loads((out / "version.json").read_text(encoding="utf-8"))
+    tables = {name: _map_table(out / f"{name}.arrow") if name in meta["tables"] else None
+              for name in (*SOURCES, "tiles")}
+    spatial = None
+    if "spatial" in meta:
+        s = meta["spatial"]
+        arrays = [np.load(out / "transactions.spatial" / f"{a}.npy", mmap_mode="r") for a in GRID_ARRAYS]
+        spatial = GridIndex(*arrays, tuple(s["origin"]), tuple(s["step"]), tuple(s["shape"]), s["n_rows"])
+    return tables, spatial
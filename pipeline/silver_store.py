@@ -0,0 +1,467 @@
+"""
+Stockage SILVER : CSV (historique) ou Parquet typé et partitionné.
+-----------------------------------------------------------------
+Le format est choisi d'après l'extension du chemin de sortie :
+
+- ``*.csv``      → CSV (colonnes typées selon le schéma avant écriture) ;
+- ``*.parquet``  → Parquet avec le schéma explicite de la table
+  (``SCHEMAS``). Les tables déclarant des colonnes de partition
+  (``PARTITIONS``) sont écrites en dataset Hive
+  (``transactions_residentiel.parquet/annee=2022/arrondissement=15/...``).
+
+La lecture (``read_silver``) accepte une sélection de colonnes et des
+filtres au format pyarrow (``[("annee", ">=", 2020), ("arrondissement", "in", [5, 6])]``) :
+en Parquet, les partitions et colonnes inutiles ne sont pas lues ; en CSV,
+les mêmes filtres sont appliqués après lecture.
+
+pyarrow n'est nécessaire que pour le format Parquet.
+"""
+
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.instrument import log
+from pipeline.quality import QualityCheck
+
+# --- Schémas explicites par table (nom de colonne -> dtype pandas) ---
+# Types compacts : ces tables restent en mémoire dans les workers de l'API.
+#   - texte à faible cardinalité (types, codes postaux, libellés) : category ;
+#   - arrondissement : Int8, année : Int16, pièces / petits comptes : Int16 ;
+#   - float32 pour les mesures où 7 chiffres significatifs suffisent
+#     (surface, prix/m², distances). Les montants (valeur_fonciere) et les
+#     coordonnées restent en float64 : float32 perdrait les centimes au-delà
+#     de 100 000 € et ~0,5 m de précision sur la position.
+SCHEMAS: dict[str, dict[str, str]] = {
+    "transactions_residentiel": {
+        "id_mutation": "string",
+        "date_mutation": "datetime64[ns]",
+        "annee": "Int16",
+        "arrondissement": "Int8",
+        "code_postal": "category",
+        "nature_mutation": "category",
+        "type_local": "category",
+        "typologie": "category",
+        "nb_locaux": "Int16",
+        "surface_reelle_bati": "float32",
+        "nombre_pieces_principales": "Int16",
+        "valeur_fonciere": "float64",
+        "prix_m2": "float32",
+        "longitude": "float64",
+        "latitude": "float64",
+        # équipements à proximité (pipeline/clean/enrich_transactions.py)
+        "dist_pavda_m": "float32",
+        "nb_pavda_200m": "Int16",
+        "nb_pavda_500m": "Int16",
+    },
+    "logements_sociaux_programmes": {
+        "id_programme": "string",
+        "annee": "Int16",
+        "arrondissement": "Int8",
+        "code_postal": "category",
+        "adresse": "string",
+        "ville": "category",
+        "bailleur": "category",
+        "mode_realisation": "category",
+        "nb_total": "Int16",
+        "nb_plai": "Int16",
+        "nb_plus": "Int16",
+        "nb_plus_cd": "Int16",
+        "nb_pls": "Int16",
+    },
+    # Sommes par arrondissement et par année : quelques milliers de logements au
+    # plus (tout Paris en finance ~10 000 par an), Int16 comme les programmes
+    "logements_sociaux_arr_annee": {
+        "arrondissement": "Int8",
+        "annee": "Int16",
+        "nb_total": "Int16",
+        "nb_plai": "Int16",
+        "nb_plus": "Int16",
+        "nb_plus_cd": "Int16",
+        "nb_pls": "Int16",
+    },
+    # colleges, écoles élémentaires et maternelles
+    "etablissements_scolaires": {
+        "arr_num": "Int8",
+        "arr_insee": "category",
+        "arr_libelle": "category",
+        "nom_etablissement": "string",
+    },
+    "espaces_verts": {
+        "id_espace_vert": "string",
+        "nom_espace_vert": "string",
+        "type_espace_vert": "category",
+        "code_postal": "category",
+        "arr_num": "Int8",
+    },
+    "abribac_dechets_alimentaires": {
+        "pavda_id": "string",
+        "type_etablissement": "category",
+        "arrondissement_txt": "category",
+        "code_insee": "category",
+        "longitude": "float64",
+        "latitude": "float64",
+        "arrondissement": "Int8",
+    },
+    # --- GOLD (pipeline/gold) ---
+    "dvf_prix_m2_cube": {
+        "niveau": "category",
+        "arrondissement": "Int8",
+        "annee": "Int16",
+        "type_local": "category",
+        "typologie": "category",
+        "nb_ventes": "Int32",
+        "prix_m2_moyen": "float64",
+        "prix_m2_median": "float64",
+        "prix_m2_q10": "float64",
+        "prix_m2_q25": "float64",
+        "prix_m2_q75": "float64",
+        "prix_m2_q90": "float64",
+        "prix_m2_borne_basse": "float64",
+        "prix_m2_borne_haute": "float64",
+    },
+    "dvf_tuiles": {
+        "annee": "Int16",
+        "z": "Int8",
+        "x": "Int32",
+        "y": "Int32",
+        "nb_ventes": "Int32",
+        "prix_m2_median": "float64",
+        "longitude": "float64",
+        "latitude": "float64",
+    },
+    "dvf_indice_mensuel_partiels": {
+        "mois": "category",
+        "arrondissement": "Int8",
+        "type_local": "category",
+        "nb_ventes": "Int32",
+        "somme_prix_m2": "float64",
+        "sketch": "string",
+    },
+    "dvf_indice_mensuel": {
+        "mois": "category",
+        "arrondissement": "Int8",
+        "type_local": "category",
+        "nb_ventes": "Int32",
+        "prix_m2_moyen": "float64",
+        "prix_m2_q25": "float64",
+        "prix_m2_median": "float64",
+        "prix_m2_q75": "float64",
+        "indice": "float64",
+    },
+    "arrondissement_profil": {
+        "arrondissement": "Int8",
+        "nb_total": "Int32",
+        "nb_plai": "Int32",
+        "nb_plus": "Int32",
+        "nb_plus_cd": "Int32",
+        "nb_pls": "Int32",
+        "nb_programmes_ls": "Int32",
+        "nb_colleges": "Int32",
+        "nb_ecoles_elementaires": "Int32",
+        "nb_ecoles_maternelles": "Int32",
+        "nb_espaces_verts": "Int32",
+        "nb_points_pavda": "Int32",
+    },
+}
+
+# --- Colonnes de partition (Parquet uniquement) ---
+PARTITIONS: dict[str, list[str]] = {
+    "transactions_residentiel": ["annee", "arrondissement"],
+}
+
+
+def is_parquet(path: str | Path) -> bool:
+    return Path(path).suffix == ".parquet"
+
+
+# ---------- Typage ----------
+def _integral(s: pd.Series, dtype: str) -> pd.Series:
+    """Valeurs non entières ou hors des bornes de `dtype` (Int8/Int16/Int32) → NA,
+    comme une valeur non numérique avec ``errors="coerce"`` : une valeur BRONZE
+    aberrante ne doit pas faire échouer le stage (la règle de qualité
+    ``NotNull`` de la colonne, s'il y en a une, la compte)."""
+    info = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+    values = s.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        bad = (values != np.round(values)) | (values < info.min) | (values > info.max)
+    bad &= ~np.isnan(values)
+    if not bad.any():
+        return s
+    log("DTYPES", f"{s.name}: {int(bad.sum()):,} valeur(s) non entière(s) ou hors {dtype} → NA")
+    return s.mask(bad)
+
+
+def _cast(s: pd.Series, dtype: str) -> pd.Series:
+    if dtype.startswith("datetime64"):
+        return pd.to_datetime(s, errors="coerce").astype(dtype)
+    if dtype != "string" and dtype != "category" and not pd.api.types.is_numeric_dtype(s):
+        s = pd.to_numeric(s, errors="coerce")
+    if dtype.startswith("Int") and str(s.dtype) != dtype and not pd.api.types.is_bool_dtype(s):
+        s = _integral(s, dtype)
+    return s.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """Convertit les colonnes de `df` selon le schéma de `table`.
+
+    Toute colonne absente du schéma est une erreur : le schéma doit rester
+    la référence de ce qui est publié en SILVER.
+    """
+    schema = SCHEMAS[table]
+    extra = [c for c in df.columns if c not in schema]
+    if extra:
+        raise ValueError(f"Colonnes hors schéma pour {table}: {extra}")
+    return df.assign(**{c: _cast(df[c], schema[c]) for c in df.columns})
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Empreinte mémoire réelle (chaînes comprises)."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def _human(n: int) -> str:
+    return f"{n / 1e6:.1f} Mo" if n >= 1e6 else f"{n / 1e3:.0f} ko"
+
+
+def memory_report(df: pd.DataFrame, table: str) -> tuple[int, int]:
+    """Mémoire de `df` avant / après application du schéma compact de `table`."""
+    return memory_bytes(df), memory_bytes(apply_schema(df, table))
+
+
+def _arrow_schema(columns: list[str], table: str):
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "float64": pa.float64(),
+        "float32": pa.float32(),
+        "Int64": pa.int64(),
+        "Int32": pa.int32(),
+        "Int16": pa.int16(),
+        "Int8": pa.int8(),
+        "datetime64[ns]": pa.timestamp("ns"),
+    }
+    schema = SCHEMAS[table]
+    return pa.schema([(c, types[schema[c]]) for c in columns])
+
+
+# ---------- Écriture ----------
+class SilverWriter:
+    """Écrit une table SILVER en un ou plusieurs morceaux.
+
+    >>> with SilverWriter("data/silver/t.parquet", "transactions_residentiel") as w:
+    ...     for chunk in chunks:
+    ...         w.write(chunk)
+
+    La sortie est construite dans un chemin temporaire puis renommée à la
+    fermeture : un lecteur ne voit jamais de table partielle.
+
+    Avec `check`, les règles de qualité de la table (``pipeline.quality``)
+    sont évaluées sur chaque morceau typé ; une règle bloquante en échec
+    lève ``QualityError`` à la fermeture, sans remplacer la table existante.
+    """
+
+    def __init__(self, dst: str | Path, table: str, check: bool = True):
+        self.dst = Path(dst)
+        self.table = table
+        self.quality = QualityCheck(table) if check else None
+        self.parquet = is_parquet(self.dst)
+        self.partition_cols = PARTITIONS.get(table, []) if self.parquet else []
+        self.tmp = self.dst.with_name(self.dst.name + ".tmp")
+        self.rows = 0
+        self.bytes_before = 0   # mémoire des chunks reçus
+        self.bytes_after = 0    # mémoire après typage compact
+        self._n_chunks = 0
+        self._file = None
+        self._pq_writer = None
+
+    def __enter__(self):
+        self.dst.parent.mkdir(parents=True, exist_ok=True)
+        _remove(self.tmp)
+        if not self.parquet:
+            self._file = open(self.tmp, "w", encoding="utf-8", newline="")
+        elif self.partition_cols:
+            self.tmp.mkdir(parents=True)
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        self.bytes_before += memory_bytes(df)
+        df = apply_schema(df, self.table)
+        self.bytes_after += memory_bytes(df)
+        if self.quality is not None:
+            self.quality.update(df)
+        if not self.parquet:
+            df.to_csv(self._file, index=False, header=(self._n_chunks == 0))
+        else:
+            self._write_parquet(df)
+        self._n_chunks += 1
+        self.rows += len(df)
+
+    def _write_parquet(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = _arrow_schema(list(df.columns), self.table)
+        tbl = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        if self.partition_cols:
+            if len(df):
+                pq.write_to_dataset(
+                    tbl, self.tmp, partition_cols=self.partition_cols,
+                    basename_template=f"part-{self._n_chunks:05d}-{{i}}.parquet",
+                )
+            return
+        if self._pq_writer is None:
+            self._pq_writer = pq.ParquetWriter(self.tmp, schema)
+        self._pq_writer.write_table(tbl)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None:
+            self._file.close()
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+        if exc_type is not None:
+            _remove(self.tmp)
+            return False
+        if self.quality is not None:
+            try:
+                self.quality.finish()
+            except Exception:
+                _remove(self.tmp)
+                raise
+        if self.parquet and self.rows == 0 and self._pq_writer is None:
+            # Aucune donnée : on publie une table vide mais lisible
+            self._write_empty_parquet()
+        _remove(self.dst)
+        self.tmp.replace(self.dst)
+        if self.bytes_before:
+            log("DTYPES", f"{self.table}: {_human(self.bytes_before)} → "
+                          f"{_human(self.bytes_after)} en mémoire "
+                          f"({100 * (self.bytes_after / self.bytes_before - 1):+.0f} %)")
+        return False
+
+    def _write_empty_parquet(self) -> None:
+        import pyarrow.parquet as pq
+
+        cols = [c for c in SCHEMAS[self.table] if c not in self.partition_cols]
+        schema = _arrow_schema(cols, self.table)
+        path = self.tmp / "part-empty.parquet" if self.partition_cols else self.tmp
+        pq.write_table(schema.empty_table(), path)
+
+
+def write_silver(df: pd.DataFrame, dst: str | Path, table: str, check: bool = True) -> Path:
+    """Écrit `df` en SILVER (CSV ou Parquet selon l'extension de `dst`)."""
+    with SilverWriter(dst, table, check) as w:
+        w.write(df)
+    return Path(dst)
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+# ---------- Lecture ----------
+_OPS = {
+    "==": lambda s, v: s == v,
+    "=": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "in": lambda s, v: s.isin(list(v)),
+    "not in": lambda s, v: ~s.isin(list(v)),
+}
+
+
+def _filter_mask(df: pd.DataFrame, filters) -> pd.Series:
+    """Évalue des filtres pyarrow (liste de tuples, ou liste de listes = OU de ET)."""
+    if filters and isinstance(filters[0], tuple):
+        filters = [filters]
+    mask = pd.Series(False, index=df.index)
+    for conj in filters:
+        m = pd.Series(True, index=df.index)
+        for col, op, val in conj:
+            m &= _OPS[op](df[col], val).fillna(False).astype(bool)
+        mask |= m
+    return mask
+
+
+def _filter_columns(filters) -> set[str]:
+    if not filters:
+        return set()
+    if isinstance(filters[0], tuple):
+        filters = [filters]
+    return {col for conj in filters for col, _, _ in conj}
+
+
+def read_silver(path: str | Path, table: str,
+                columns: list[str] | None = None,
+                filters=None) -> pd.DataFrame:
+    """Lit une table SILVER typée selon son schéma.
+
+    `columns` restreint les colonnes lues, `filters` suit la syntaxe
+    pyarrow ; en Parquet les deux sont poussés jusqu'à la lecture
+    (élagage des partitions et des colonnes).
+    """
+    path = Path(path)
+    if is_parquet(path):
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        partitioning = None
+        if path.is_dir() and PARTITIONS.get(table):
+            partitioning = ds.partitioning(
+                _arrow_schema(PARTITIONS[table], table), flavor="hive"
+            )
+        tbl = pq.read_table(path, columns=columns, filters=filters,
+                            partitioning=partitioning)
+        return apply_schema(tbl.to_pandas(), table)
+
+    # CSV : lecture des colonnes utiles, typage, puis filtres
+    needed = None
+    if columns is not None:
+        needed = set(columns) | _filter_columns(filters)
+    df = pd.read_csv(path, dtype=str, usecols=(lambda c: c in needed) if needed else None)
+    df = apply_schema(df, table)
+    if filters:
+        df = df[_filter_mask(df, filters)].reset_index(drop=True)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def iter_silver(path: str | Path, table: str, chunksize: int):
+    """Lit une table SILVER par morceaux d'environ `chunksize` lignes, typés,
+    dans l'ordre de ``read_silver`` (mêmes positions de lignes)."""
+    path = Path(path)
+    if not is_parquet(path):
+        with pd.read_csv(path, dtype=str, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield apply_schema(chunk, table)
+        return
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = None
+    if path.is_dir() and PARTITIONS.get(table):
+        partitioning = ds.partitioning(_arrow_schema(PARTITIONS[table], table), flavor="hive")
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    # Lecture séquentielle : les lots sortent dans l'ordre des fichiers
+    batches, rows = [], 0
+    for batch in dataset.to_batches(batch_size=chunksize, use_threads=False):
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= chunksize:
+            yield apply_schema(pa.Table.from_batches(batches).to_pandas(), table)
+            batches, rows = [], 0
+    if batches:
+        yield apply_schema(pa.Table.from_batches(batches).to_pandas(), table)
+
@@ -0,0 +1,271 @@
+"""
+Index spatial des tables SILVER géolocalisées
+---------------------------------------------
+Grille régulière (≈ ``cell_m`` mètres de côté) sur longitude/latitude :
+
+- les points sont triés par cellule (ligne de grille puis colonne) et
+  ``offsets`` donne le début de chaque cellule (format CSR) ;
+- une rangée de cellules contiguës est donc une tranche contiguë des
+  tableaux triés : une requête rectangle lit une tranche par rangée de
+  grille puis filtre exactement les candidats ;
+- une requête rayon passe par le rectangle englobant puis la distance
+  haversine ;
+- ``nearest_within`` joint un grand nombre de points (par morceaux) à
+  l'index : plus proche voisin et nombre de voisins dans des rayons fixes,
+  en ne comparant chaque point qu'aux cellules voisines de la sienne.
+
+Les positions renvoyées sont les numéros de ligne de la table telle que
+lue par ``read_silver`` (même ordre). L'index est persisté à côté de la
+table (``<table>.<ext>.spatial.npz``) par ``build_spatial_index``.
+"""
+
+from pathlib import Path
+
+import math
+
+import numpy as np
+
+from pipeline.instrument import log
+from pipeline.silver_store import read_silver
+
+EARTH_RADIUS_M = 6_371_008.8
+M_PER_DEG_LAT = 111_320.0
+DEFAULT_CELL_M = 250.0
+
+
+def haversine_m(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """Distance haversine en mètres (vectorisée, diffusion numpy)."""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    """Grille régulière lon/lat ; voir le docstring du module."""
+
+    def __init__(self, lon, lat, rows, offsets, origin, step, shape, n_rows):
+        self.lon = lon            # longitudes triées par cellule
+        self.lat = lat
+        self.rows = rows          # position dans la table de chaque point trié
+        self.offsets = offsets    # début de chaque cellule (len = nx*ny + 1)
+        self.origin = origin      # (lon0, lat0) coin sud-ouest
+        self.step = step          # (dlon, dlat) en degrés
+        self.shape = shape        # (nx, ny)
+        self.n_rows = n_rows      # lignes de la table (points sans coordonnées compris)
+
+    # ---------- Construction ----------
+    @classmethod
+    def build(cls, lon, lat, cell_m: float = DEFAULT_CELL_M) -> "GridIndex":
+        lon = np.asarray(lon, dtype="float64")
+        lat = np.asarray(lat, dtype="float64")
+        valid = np.isfinite(lon) & np.isfinite(lat)
+        return cls._grid(lon[valid], lat[valid], np.flatnonzero(valid), len(lon), cell_m)
+
+    @classmethod
+    def merge(cls, indexes: list["GridIndex"], positions: list[np.ndarray], n_rows: int,
+              cell_m: float = DEFAULT_CELL_M) -> "GridIndex":
+        """Index d'une table réunissant des tables déjà indexées, sans relire
+        leurs coordonnées : ``positions[i]`` donne la position dans la table
+        réunie de chaque ligne de la i-ème table. Identique à ``build`` sur la
+        table réunie."""
+        lon = np.concatenate([ix.lon for ix in indexes] or [np.empty(0)])
+        lat = np.concatenate([ix.lat for ix in indexes] or [np.empty(0)])
+        rows = np.concatenate([np.asarray(pos, dtype="int64")[ix.rows]
+                               for ix, pos in zip(indexes, positions)] or [np.empty(0, "int64")])
+        order = np.argsort(rows, kind="stable")
+        return cls._grid(lon[order], lat[order], rows[order], n_rows, cell_m)
+
+    @classmethod
+    def _grid(cls, lon, lat, rows, n_rows: int, cell_m: float) -> "GridIndex":
+        """Grille sur des points valides (`rows` : leurs positions, croissantes)."""
+        if len(rows):
+            lon0, lat0 = lon.min(), lat.min()
+            dlat = cell_m / M_PER_DEG_LAT
+            dlon = cell_m / (M_PER_DEG_LAT * np.cos(np.radians((lat0 + lat.max()) / 2)))
+            nx = int((lon.max() - lon0) // dlon) + 1
+            ny = int((lat.max() - lat0) // dlat) + 1
+        else:
+            lon0 = lat0 = 0.0
+            dlon = dlat = 1.0
+            nx = ny = 1
+
+        cell = cls._cell(lon, lat, (lon0, lat0), (dlon, dlat), (nx, ny))
+        order = np.argsort(cell, kind="stable")
+        counts = np.bincount(cell, minlength=nx * ny)
+        offsets = np.zeros(nx * ny + 1, dtype="int64")
+        np.cumsum(counts, out=offsets[1:])
+        return cls(lon[order], lat[order], rows[order], offsets,
+                   (lon0, lat0), (dlon, dlat), (nx, ny), n_rows)
+
+    @staticmethod
+    def _cell(lon, lat, origin, step, shape) -> np.ndarray:
+        ix = np.clip(((lon - origin[0]) // step[0]).astype("int64"), 0, shape[0] - 1)
+        iy = np.clip(((lat - origin[1]) // step[1]).astype("int64"), 0, shape[1] - 1)
+        return iy * shape[0] + ix
+
+    # ---------- Requêtes ----------
+    def _candidates(self, min_lon, min_lat, max_lon, max_lat) -> np.ndarray:
+        """Indices (dans l'ordre trié) des points des cellules touchant le rectangle."""
+        (lon0, lat0), (dlon, dlat), (nx, ny) = self.origin, self.step, self.shape
+        ix0, ix1 = int((min_lon - lon0) // dlon), int((max_lon - lon0) // dlon)
+        iy0, iy1 = int((min_lat - lat0) // dlat), int((max_lat - lat0) // dlat)
+        if ix1 < 0 or iy1 < 0 or ix0 >= nx or iy0 >= ny or ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype="int64")
+        ix0, ix1 = max(ix0, 0), min(ix1, nx - 1)
+        iy = np.arange(max(iy0, 0), min(iy1, ny - 1) + 1)
+        starts = self.offsets[iy * nx + ix0]
+        ends = self.offsets[iy * nx + ix1 + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.empty(0, dtype="int64")
+        # Concaténation vectorisée des tranches [start, end)
+        shift = np.repeat(starts - np.cumsum(np.r_[0, lengths[:-1]]), lengths)
+        return np.arange(lengths.sum()) + shift
+
+    def bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> np.ndarray:
+        """Positions (croissantes) des points dans le rectangle, bords inclus."""
+        cand = self._candidates(min_lon, min_lat, max_lon, max_lat)
+        lon, lat = self.lon[cand], self.lat[cand]
+        inside = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return np.sort(self.rows[cand[inside]])
+
+    def radius(self, lon: float, lat: float, meters: float) -> tuple[np.ndarray, np.ndarray]:
+        """Positions et distances (m) des points à moins de `meters`, du plus proche au plus lointain."""
+        dlat = meters / M_PER_DEG_LAT
+        dlon = meters / (M_PER_DEG_LAT * max(np.cos(np.radians(lat + np.sign(lat) * dlat)), 1e-6))
+        cand = self._candidates(lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+        dist = haversine_m(lon, lat, self.lon[cand], self.lat[cand])
+        keep = dist <= meters
+        order = np.argsort(dist[keep], kind="stable")
+        return self.rows[cand[keep]][order], dist[keep][order]
+
+    def _cell_xy(self, lon, lat) -> tuple[np.ndarray, np.ndarray]:
+        """Colonne et rangée de grille (non bornées) de chaque point."""
+        (lon0, lat0), (dlon, dlat) = self.origin, self.step
+        return (np.floor((lon - lon0) / dlon).astype("int64"),
+                np.floor((lat - lat0) / dlat).astype("int64"))
+
+    def cover_k(self, lon, lat) -> np.ndarray:
+        """Plus petit k dont le bloc (2k+1)² autour du point couvre toute la grille."""
+        ix, iy = self._cell_xy(lon, lat)
+        nx, ny = self.shape
+        return np.maximum.reduce([ix, nx - 1 - ix, iy, ny - 1 - iy])
+
+    def block_pairs(self, lon, lat, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Couples (requête, point trié) pour les (2k+1)² cellules autour de chaque requête."""
+        nx, ny = self.shape
+        ix, iy = self._cell_xy(lon, lat)
+        x0, x1 = np.clip(ix - k, 0, nx - 1), np.clip(ix + k, 0, nx - 1)
+        in_x = (ix + k >= 0) & (ix - k < nx)
+
+        qs, starts, lengths = [], [], []
+        for dy in range(-k, k + 1):
+            row = iy + dy
+            ok = in_x & (row >= 0) & (row < ny)
+            q = np.flatnonzero(ok)
+            start = self.offsets[row[ok] * nx + x0[ok]]
+            end = self.offsets[row[ok] * nx + x1[ok] + 1]
+            qs.append(q)
+            starts.append(start)
+            lengths.append(end - start)
+        q, start, length = np.concatenate(qs), np.concatenate(starts), np.concatenate(lengths)
+        total = int(length.sum())
+        shift = np.repeat(start - (np.cumsum(length) - length), length)
+        return np.repeat(q, length), np.arange(total) + shift
+
+    def remap(self, new_position: np.ndarray) -> "GridIndex":
+        """Index équivalent après réordonnancement de la table (ancienne position → nouvelle)."""
+        return GridIndex(self.lon, self.lat, np.asarray(new_position)[self.rows], self.offsets,
+                         self.origin, self.step, self.shape, self.n_rows)
+
+    # ---------- Persistance ----------
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, lon=self.lon, lat=self.lat, rows=self.rows, offsets=self.offsets,
+                 origin=np.array(self.origin), step=np.array(self.step),
+                 shape=np.array(self.shape), n_rows=np.array(self.n_rows))
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "GridIndex":
+        with np.load(path) as z:
+            return cls(z["lon"], z["lat"], z["rows"], z["offsets"],
+                       tuple(z["origin"].tolist()), tuple(z["step"].tolist()),
+                       tuple(int(v) for v in z["shape"]), int(z["n_rows"]))
+
+
+def nearest_within(index: GridIndex, lon, lat, radii=(),
+                   chunksize: int = 100_000) -> tuple[np.ndarray, dict[float, np.ndarray]]:
+    """Distance (m) au point le plus proche de l'index et nombre de points
+    à moins de chaque rayon, pour chaque couple (lon, lat).
+
+    Les requêtes sont traitées par morceaux de `chunksize`. Chaque requête
+    n'est comparée qu'aux points du bloc de cellules qui l'entoure ; celles
+    dont le plus proche voisin trouvé est plus loin que le bord du bloc
+    sont reprises avec un bloc deux fois plus grand. Les comptages sont
+    exacts si les cellules de l'index font au moins le plus grand rayon
+    (sinon le premier bloc est élargi en conséquence).
+    Distance NaN pour les requêtes sans coordonnées ou un index vide.
+    """
+    lon = np.asarray(lon, dtype="float64")
+    lat = np.asarray(lat, dtype="float64")
+    n = len(lon)
+    dist = np.full(n, np.nan)
+    counts = {r: np.zeros(n, dtype="int64") for r in radii}
+    if not len(index.rows):
+        return dist, counts
+
+    cell_m = index.step[1] * M_PER_DEG_LAT
+    k0 = max(1, math.ceil(max(radii, default=0) / cell_m))
+    valid = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+
+    for start in range(0, len(valid), chunksize):
+        pending = valid[start:start + chunksize]
+        k = k0
+        while len(pending):
+            q, p = index.block_pairs(lon[pending], lat[pending], k)
+            d = haversine_m(lon[pending][q], lat[pending][q], index.lon[p], index.lat[p])
+            if k == k0:
+                for r in radii:
+                    counts[r][pending] = np.bincount(q[d <= r], minlength=len(pending))
+            best = np.full(len(pending), np.inf)
+            np.minimum.at(best, q, d)
+            # résolu si aucun point hors du bloc ne peut être plus proche (marge 1 %)
+            # ou si le bloc couvre déjà toute la grille
+            done = (best <= 0.99 * k * cell_m) | (k >= index.cover_k(lon[pending], lat[pending]))
+            dist[pending[done]] = best[done]
+            pending = pending[~done]
+            k *= 2
+
+    dist[np.isinf(dist)] = np.nan
+    return dist, counts
+
+
+def index_path(silver_path: str | Path) -> Path:
+    silver_path = Path(silver_path)
+    return silver_path.with_name(silver_path.name + ".spatial.npz")
+
+
+def build_spatial_index(silver_path: str | Path, table: str,
+                        cell_m: float = DEFAULT_CELL_M) -> Path:
+    """Construit et persiste l'index d'une table SILVER ayant longitude/latitude."""
+    df = read_silver(silver_path, table, columns=["longitude", "latitude"])
+    index = GridIndex.build(df["longitude"].to_numpy(), df["latitude"].to_numpy(), cell_m)
+    out = index.save(index_path(silver_path))
+    log("SPATIAL", f"{table}: {len(index.rows):,} points, grille {index.shape[0]}×{index.shape[1]} → {out}")
+    return out
+
+
+def load_spatial_index(silver_path: str | Path, n_rows: int | None = None) -> GridIndex | None:
+    """Charge l'index d'une table ; None s'il manque, est plus ancien que la
+    table ou ne correspond pas à `n_rows`."""
+    path = index_path(silver_path)
+    if not path.exists() or path.stat().st_mtime < Path(silver_path).stat().st_mtime:
+        return None
+    index = GridIndex.load(path)
+    if n_rows is not None and index.n_rows != n_rows:
+        return None
+    return index
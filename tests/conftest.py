@@ -0,0 +1,6 @@
+"""Tests du pipeline et de l'API : ``python -m pytest`` depuis la racine du dépôt."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,142 @@
+"""API (api/endpoints.py) sur un petit magasin SILVER / GOLD synthétique."""
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.endpoints import create_app, etag_matches
+from benchmarks.bench_api_latency import synthetic_transactions
+from pipeline.gold.aggregate_cube import build_gold
+from pipeline.silver_store import write_silver
+
+N_TRANSACTIONS = 2000
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("data")
+    tx = write_silver(synthetic_transactions(N_TRANSACTIONS), tmp / "silver" / "transactions_residentiel.csv",
+                      "transactions_residentiel")
+    programmes = pd.DataFrame({
+        "id_programme": ["p1", "p2", "p3"],
+        "annee": [2020, 2020, 2021],
+        "arrondissement": [5, 5, 13],
+        "code_postal": ["75005", "75005", "75013"],
+        "nb_total": [10, 20, 40],
+        "nb_plai": [1, 2, 4],
+        "nb_plus": [5, 10, 20],
+        "nb_plus_cd": [0, 0, 0],
+        "nb_pls": [4, 8, 16],
+    })
+    ls = write_silver(programmes, tmp / "silver" / "logements_sociaux_programmes.csv", "logements_sociaux_programmes")
+    build_gold({"dvf": tx, "logements_sociaux": ls}, tmp / "gold", "csv")
+    return tmp
+
+
+@pytest.fixture
+def client(data_dir):
+    with TestClient(create_app(data_dir, "csv")) as c:
+        yield c
+
+
+def test_health(client):
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert r.json()["transactions"] == N_TRANSACTIONS
+
+
+def test_prix_m2_filters(client):
+    total = client.get("/prix-m2").json()
+    assert len(total) == 1 and total[0]["nb_ventes"] == N_TRANSACTIONS
+
+    par_annee = client.get("/prix-m2", params={"arrondissement": 5, "par": "annee"}).json()
+    assert par_annee and all(row["arrondissement"] == 5 for row in par_annee)
+    assert sorted(row["annee"] for row in par_annee) == [2020, 2021, 2022, 2023]
+    arr5 = client.get("/prix-m2", params={"arrondissement": 5}).json()
+    assert sum(row["nb_ventes"] for row in par_annee) == arr5[0]["nb_ventes"]
+
+
+def test_transactions_filters_and_paging(client):
+    r = client.get("/transactions", params={"arrondissement": 5, "annee": 2021, "limit": 3}).json()
+    assert r["total"] > 3 and len(r["items"]) == 3
+    assert all(it["arrondissement"] == 5 and it["annee"] == 2021 for it in r["items"])
+    dates = [it["date_mutation"] for it in r["items"]]
+    assert dates == sorted(dates, reverse=True)
+
+    maisons = client.get("/transactions", params={"type_local": "Maison", "limit": 1000}).json()
+    assert all(it["type_local"] == "Maison" for it in maisons["items"])
+    nxt = client.get("/transactions", params={"arrondissement": 5, "annee": 2021, "limit": 3, "offset": 3}).json()
+    assert {it["id_mutation"] for it in nxt["items"]}.isdisjoint(it["id_mutation"] for it in r["items"])
+
+
+def test_logements_sociaux(client):
+    rows = client.get("/logements-sociaux", params={"arrondissement": 5}).json()
+    assert rows == [{"arrondissement": 5, "annee": 2020, "nb_total": 30, "nb_plai": 3, "nb_plus": 15,
+                     "nb_plus_cd": 0, "nb_pls": 12}]
+
+
+def test_cache_hits_and_misses(client):
+    cache = client.app.state.cache
+    hits, misses = cache.hits, cache.misses
+    first = client.get("/prix-m2", params={"annee": 2021, "par": "arrondissement"})
+    assert (cache.hits, cache.misses) == (hits, misses + 1)
+    # Mêmes paramètres normalisés (ordre, valeur par défaut explicite) : même entrée
+    again = client.get("/prix-m2?par=arrondissement&annee=2021")
+    assert (cache.hits, cache.misses) == (hits + 1, misses + 1)
+    assert again.content == first.content
+    client.get("/transactions", params={"arrondissement": 1})
+    client.get("/transactions", params={"arrondissement": 1, "limit": 100, "offset": 0})
+    assert (cache.hits, cache.misses) == (hits + 2, misses + 2)
+
+
+def test_etag_not_modified(client):
+    r = client.get("/arrondissements")
+    etag = r.headers["etag"]
+    assert client.get("/arrondissements", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/arrondissements", headers={"If-None-Match": f'"autre", {etag}'}).status_code == 304
+    assert client.get("/arrondissements", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get("/arrondissements", headers={"If-None-Match": "*"}).status_code == 304
+    # Sous-chaîne d'un autre ETag : pas de correspondance
+    other = client.get("/arrondissements", headers={"If-None-Match": f'"x{etag[1:-1]}x"'})
+    assert other.status_code == 200 and other.content == r.content
+
+
+def test_etag_matches():
+    assert etag_matches('"a", "b"', '"b"')
+    assert not etag_matches('"ab"', '"a"')
+    assert not etag_matches("", '"a"')
+
+
+def test_not_found(client):
+    assert client.get("/arrondissements/21").status_code == 404
+    assert client.get("/tuiles/99/0/0").status_code == 404
+    store = client.app.state.store
+    profil = store.profil
+    store.profil = profil[profil["arrondissement"] != 7]
+    try:
+        assert client.get("/arrondissements/7").status_code == 404
+    finally:
+        store.profil = profil
+    assert client.get("/arrondissements/8").json()["arrondissement"] == 8
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/prix-m2", {"arrondissement": 0}),
+    ("/prix-m2", {"par": "inconnue"}),
+    ("/prix-m2", {"arrondissement": 5, "par": "arrondissement"}),
+    ("/transactions", {"limit": 0}),
+    ("/transactions", {"annee": "deux-mille"}),
+    ("/transactions/zone", {"bbox": "2.3,48.8"}),
+    ("/transactions/rayon", {"lon": 2.35, "lat": 48.85, "r": 0}),
+])
+def test_invalid_parameters(client, path, params):
+    assert client.get(path, params=params).status_code == 422
+
+
+def test_spatial_queries(client):
+    zone = client.get("/transactions/zone", params={"bbox": "2.30,48.84,2.36,48.87", "limit": 1000}).json()
+    assert zone["total"] > 0
+    assert all(2.30 <= it["longitude"] <= 2.36 and 48.84 <= it["latitude"] <= 48.87 for it in zone["items"])
+    rayon = client.get("/transactions/rayon", params={"lon": 2.35, "lat": 48.85, "r": 800}).json()
+    dist = [it["distance_m"] for it in rayon["items"]]
+    assert rayon["total"] > 0 and dist == sorted(dist) and dist[-1] <= 800
@@ -0,0 +1,103 @@
+"""Nettoyage delta (pipeline/clean/cdc.py) : hashes par clé, diff, application."""
+
+import pandas as pd
+import pytest
+
+from pipeline.clean.cdc import (CHANGELOG_FILE, META_FILE, STATE_FILE, apply_delta, cdc_dir, diff, key_hashes,
+                               read_changelog)
+from pipeline.silver_store import read_silver
+
+TABLE = "logements_sociaux_programmes"
+
+
+def bronze(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["id", "cp", "total"], dtype="str")
+
+
+def clean(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "id_programme": df["id"].to_numpy(),
+        "code_postal": df["cp"].to_numpy(),
+        "arrondissement": df["cp"].str[-2:].astype(int).to_numpy(),
+        "nb_total": df["total"].astype(int).to_numpy(),
+    })
+
+
+BASE = [("a", "75001", "10"), ("b", "75002", "20"), ("c", "75003", "30"), ("d", "75004", "40")]
+
+
+def run(rows: list[tuple], dst, version: str = "v1") -> int:
+    return apply_delta(bronze(rows), dst, TABLE, "id", "id_programme", clean, version,
+                       arrondissement="arrondissement")
+
+
+def test_key_hashes_ignore_row_position_between_keys():
+    h = key_hashes(bronze(BASE), "id")
+    shuffled = key_hashes(bronze(BASE[::-1]), "id")
+    assert h.index.tolist() == ["a", "b", "c", "d"]
+    assert h.sort_index().equals(shuffled.sort_index())
+
+
+def test_key_hashes_duplicate_key_is_one_group():
+    rows = BASE + [("b", "75002", "21")]
+    h = key_hashes(bronze(rows), "id")
+    assert len(h) == 4
+    changed = key_hashes(bronze(BASE + [("b", "75002", "22")]), "id")
+    assert (h != changed).tolist() == [False, True, False, False]
+
+
+def test_diff():
+    previous = key_hashes(bronze(BASE), "id")
+    current = key_hashes(bronze([BASE[3], ("b", "75002", "25"), BASE[0], ("e", "75005", "50")]), "id")
+    delta = diff(previous, current)
+    assert delta.inserted.tolist() == ["e"]
+    assert delta.updated.tolist() == ["b"]
+    assert delta.deleted.tolist() == ["c"]
+    assert delta.unchanged == 2
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_apply_delta_matches_full_clean(tmp_path, fmt):
+    dst = tmp_path / f"{TABLE}.{fmt}"
+    assert run(BASE, dst) == 4
+    assert read_changelog(dst)[-1]["mode"] == "full"
+
+    new = [("e", "75005", "50"), BASE[0], ("b", "75002", "25"), BASE[3], ("b", "75012", "1")]
+    assert run(new, dst) == 5
+    entry = read_changelog(dst)[-1]
+    assert entry["mode"] == "delta"
+    assert (entry["inserted"], entry["updated"], entry["deleted"]) == (["e"], ["b"], ["c"])
+    assert entry["arrondissements"] == [2, 3, 5, 12]
+
+    expected = read_silver(_full(tmp_path, new, fmt), TABLE)
+    pd.testing.assert_frame_equal(read_silver(dst, TABLE), expected)
+    # Seul l'état CDC est conservé à côté de la table, pas de copie de celle-ci
+    assert {p.name for p in cdc_dir(dst).iterdir()} == {STATE_FILE, META_FILE, CHANGELOG_FILE}
+
+
+def _full(tmp_path, rows, fmt):
+    dst = tmp_path / "complet" / f"{TABLE}.{fmt}"
+    run(rows, dst)
+    return dst
+
+
+def test_reordered_bronze_is_not_a_change(tmp_path):
+    dst = tmp_path / f"{TABLE}.csv"
+    run(BASE, dst)
+    before = dst.read_bytes()
+    assert run(BASE[::-1], dst) == 4
+    entry = read_changelog(dst)[-1]
+    assert entry["mode"] == "delta" and entry["unchanged"] == 4
+    assert entry["inserted"] == entry["updated"] == entry["deleted"] == []
+    assert dst.read_bytes() == before
+
+
+def test_new_version_or_rewritten_table_means_full_clean(tmp_path):
+    dst = tmp_path / f"{TABLE}.csv"
+    run(BASE, dst)
+    run(BASE, dst, version="v2")
+    assert read_changelog(dst)[-1]["mode"] == "full"
+    dst.write_text(dst.read_text() + "e,75005,5,50\n")
+    run(BASE, dst, version="v2")
+    assert read_changelog(dst)[-1]["mode"] == "full"
+    assert len(read_silver(dst, TABLE)) == 4
@@ -0,0 +1,152 @@
+"""Téléchargements BRONZE (pipeline/collect/collect_data.py) face à un serveur HTTP local."""
+
+import json
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pipeline.collect.collect_data import collect_csv
+from pipeline.instrument import collect
+
+BODY = b"".join(b"%06d;ligne;%d\n" % (i, i * 7) for i in range(20_000))
+ETAG = '"v1"'
+
+
+class Resource(BaseHTTPRequestHandler):
+    """Ressource ``BODY`` : 304 sur If-None-Match, plages Range / If-Range.
+
+    Attributs de classe réglés par chaque test :
+    - ``truncate`` : nombre de réponses coupées à mi-corps ;
+    - ``status`` : code d'erreur renvoyé à toutes les requêtes ;
+    - ``range_shift`` : décalage du début de plage annoncé (serveur fautif).
+    """
+    truncate = 0
+    status = None
+    range_shift = 0
+    requests: list[dict] = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests.append(dict(self.headers))
+        if cls.status is not None:
+            self.send_error(cls.status)
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        start = 0
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range") == ETAG:
+            start = int(rng.removeprefix("bytes=").split("-")[0])
+            if start >= len(BODY):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(BODY)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            shown = start + cls.range_shift
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {shown}-{len(BODY) - 1}/{len(BODY)}")
+        else:
+            self.send_response(200)
+        payload = BODY[start:]
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if cls.truncate:
+            cls.truncate -= 1
+            self.wfile.write(payload[:len(payload) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def server():
+    Resource.truncate, Resource.status, Resource.range_shift, Resource.requests = 0, None, 0, []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Resource)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/export.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_full_download_then_not_modified(server, tmp_path):
+    out = collect_csv("export.csv", server, tmp_path)
+    assert out.read_bytes() == BODY
+    assert not (tmp_path / "export.csv.part").exists()
+    mtime = out.stat().st_mtime_ns
+
+    collect_csv("export.csv", server, tmp_path)
+    assert Resource.requests[-1]["If-None-Match"] == ETAG
+    assert out.stat().st_mtime_ns == mtime and out.read_bytes() == BODY
+
+
+def test_truncated_body_is_resumed(server, tmp_path):
+    Resource.truncate = 1
+    out = collect_csv("export.csv", server, tmp_path)
+    assert out.read_bytes() == BODY
+    assert len(Resource.requests) == 2
+    assert Resource.requests[1]["Range"] == f"bytes={len(BODY) // 2}-"
+    assert Resource.requests[1]["If-Range"] == ETAG
+
+
+def test_download_is_a_stage_counting_received_bytes(server, tmp_path):
+    Resource.truncate = 1
+    with collect() as records:
+        collect_csv("export.csv", server, tmp_path)
+        collect_csv("export.csv", server, tmp_path)  # 304 : rien reçu
+    assert [r["name"] for r in records] == ["collect:export.csv"] * 2
+    # Début coupé puis reprise : chaque octet n'est compté qu'une fois
+    assert [r["bytes_written"] for r in records] == [len(BODY), 0]
+
+
+def test_truncated_on_every_attempt_keeps_part(server, tmp_path):
+    Resource.truncate = 10
+    with pytest.raises(RuntimeError):
+        collect_csv("export.csv", server, tmp_path, retries=2)
+    assert not (tmp_path / "export.csv").exists()
+    part = (tmp_path / "export.csv.part").read_bytes()
+    assert BODY.startswith(part) and 0 < len(part) < len(BODY)
+
+
+def test_stale_part_416_restarts_from_zero(server, tmp_path):
+    (tmp_path / "export.csv.part").write_bytes(BODY + b"en trop")
+    (tmp_path / "export.csv.part.json").write_text(json.dumps({"url": server, "etag": ETAG}))
+    out = collect_csv("export.csv", server, tmp_path)
+    assert out.read_bytes() == BODY
+    assert "Range" in Resource.requests[0] and "Range" not in Resource.requests[1]
+
+
+def test_unexpected_content_range_is_not_appended(server, tmp_path):
+    Resource.truncate, Resource.range_shift = 1, 100
+    out = collect_csv("export.csv", server, tmp_path)
+    assert out.read_bytes() == BODY
+    # tentative 2 : plage refusée, .part supprimé ; tentative 3 : téléchargement complet
+    assert len(Resource.requests) == 3 and "Range" not in Resource.requests[2]
+
+
+@pytest.mark.parametrize("status", [403, 404, 410])
+def test_client_errors_are_not_retried(server, tmp_path, capsys, status):
+    Resource.status = status
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        collect_csv("export.csv", server, tmp_path, retries=3)
+    assert exc.value.code == status
+    assert len(Resource.requests) == 1
+    assert "interrompu" not in capsys.readouterr().out
+
+
+def test_server_errors_are_retried(server, tmp_path):
+    Resource.status = 503
+    with pytest.raises(RuntimeError):
+        collect_csv("export.csv", server, tmp_path, retries=3)
+    assert len(Resource.requests) == 3
@@ -0,0 +1,49 @@
+"""Lecture BRONZE (pipeline/clean/csv_reader.py) : séparateur, colonnes, chunks."""
+
+import gzip
+
+import pandas as pd
+import pytest
+
+from pipeline.clean.csv_reader import read_bronze_csv, sniff_sep
+
+# En-têtes entourés d'espaces, comme dans certains exports open data
+CSV = " id ; Code postal ;total;geo\n" + "".join(
+    f"{i:03d};750{i % 20 + 1:02d};{i * 10};\"{{\"\"x\"\": [2.3, 48.8]}}\"\n" for i in range(25))
+
+
+@pytest.fixture(params=["csv", "csv.gz"])
+def bronze(tmp_path, request):
+    path = tmp_path / f"b.{request.param}"
+    opener = gzip.open if request.param.endswith("gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write(CSV)
+    return path
+
+
+def test_sniff_sep_ignores_commas_in_quoted_fields(bronze):
+    assert sniff_sep(bronze) == ";"
+
+
+def test_one_shot_strips_headers_and_applies_dtypes(bronze):
+    df = read_bronze_csv(bronze, usecols=["id", "Code postal", "total"],
+                         dtype={"id": str, "Code postal": "category", "total": "int64"})
+    assert df.columns.tolist() == ["id", "Code postal", "total"]
+    assert df["id"].iloc[0] == "000"
+    assert isinstance(df["Code postal"].dtype, pd.CategoricalDtype)
+    assert df["total"].dtype == "int64"
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 25, 100])
+def test_chunks_match_one_shot(bronze, chunksize):
+    kwargs = dict(usecols=["id", "Code postal", "total"],
+                  dtype={"id": str, "Code postal": str, "total": "int64"})
+    chunks = list(read_bronze_csv(bronze, chunksize=chunksize, **kwargs))
+    assert all(c.columns.tolist() == ["id", "Code postal", "total"] for c in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                  read_bronze_csv(bronze, **kwargs))
+
+
+def test_missing_required_column(bronze):
+    with pytest.raises(ValueError, match="absent"):
+        read_bronze_csv(bronze, required=["id", "absent"])
@@ -0,0 +1,92 @@
+"""DVF multi-années (pipeline/clean/dvf_to_silver.py) : partitions, réunion, rafraîchissement."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_bronze
+from pipeline.clean.dvf_to_silver import clean_dvf, partitions_dir, sketch_path
+from pipeline.silver_store import read_silver
+from pipeline.spatial_index import GridIndex, index_path
+
+TABLE = "transactions_residentiel"
+YEARS = (2021, 2022, 2023)
+
+
+@pytest.fixture
+def bronze(tmp_path):
+    src = tmp_path / "dvf"
+    for year in YEARS:
+        write_bronze("dvf", 3000, src / f"{year}.csv.gz", seed=year, year=year)
+    return src
+
+
+def assert_same_index(a: GridIndex, b: GridIndex):
+    for attr in ("lon", "lat", "rows", "offsets"):
+        assert np.array_equal(getattr(a, attr), getattr(b, attr)), attr
+    assert (a.origin, a.step, a.shape, a.n_rows) == (b.origin, b.step, b.shape, b.n_rows)
+
+
+@pytest.mark.parametrize("ext", ["csv", "parquet"])
+def test_union_matches_single_file_cleaning(bronze, tmp_path, ext):
+    dst = tmp_path / f"t.{ext}"
+    clean_dvf(bronze, dst, chunksize=1000, workers=1)
+
+    expected = []
+    for year in YEARS:
+        one = tmp_path / f"{year}.{ext}"
+        clean_dvf(bronze / f"{year}.csv.gz", one)
+        expected.append(read_silver(one, TABLE))
+    union = read_silver(dst, TABLE)
+    expected = pd.concat(expected, ignore_index=True)
+    if ext == "parquet":  # lu partition hive par partition hive
+        key = ["annee", "arrondissement", "id_mutation"]
+        union = union.sort_values(key, ignore_index=True)
+        expected = expected.sort_values(key, ignore_index=True)
+    pd.testing.assert_frame_equal(union, expected, check_categorical=False)
+
+    # Index fusionné depuis les partitions = index construit sur la table réunie
+    table = read_silver(dst, TABLE)
+    assert_same_index(GridIndex.load(index_path(dst)),
+                      GridIndex.build(table["longitude"], table["latitude"]))
+
+
+@pytest.mark.parametrize("ext", ["csv", "parquet"])
+def test_refresh_rewrites_only_the_changed_partition(bronze, tmp_path, ext):
+    dst = tmp_path / f"t.{ext}"
+    clean_dvf(bronze, dst, workers=1)
+    parts = partitions_dir(dst)
+    mtimes = {p: p.stat().st_mtime_ns for p in parts.rglob("*") if p.is_file()}
+
+    clean_dvf(bronze, dst, workers=1)  # rien de modifié : rien n'est réécrit
+    published = [dst, sketch_path(dst), index_path(dst)]
+    before = {p: p.stat().st_mtime_ns for p in published}
+    clean_dvf(bronze, dst, workers=1)
+    assert {p: p.stat().st_mtime_ns for p in published} == before
+
+    write_bronze("dvf", 2000, bronze / "2023.csv.gz", seed=99, year=2023)
+    clean_dvf(bronze, dst, workers=1)
+    changed = {p.relative_to(parts).parts[0] for p, t in mtimes.items()
+               if not p.exists() or p.stat().st_mtime_ns != t}
+    assert changed == {f"2023.{ext}", f"2023.{ext}.sketch.parquet",
+                       f"2023.{ext}.spatial.npz", "_sources.json"}
+
+    table = read_silver(dst, TABLE)
+    assert (table["annee"] == 2023).sum() < 2000
+    assert_same_index(GridIndex.load(index_path(dst)),
+                      GridIndex.build(table["longitude"], table["latitude"]))
+
+
+def test_removed_year_leaves_the_union(bronze, tmp_path):
+    dst = tmp_path / "t.parquet"
+    clean_dvf(bronze, dst, workers=1)
+    (bronze / "2021.csv.gz").unlink()
+    clean_dvf(bronze, dst, workers=1)
+    assert not (partitions_dir(dst) / "2021.parquet").exists()
+    assert set(read_silver(dst, TABLE)["annee"].unique()) == {2022, 2023}
+
+
+def test_same_partition_name_is_rejected(bronze, tmp_path):
+    write_bronze("dvf", 100, bronze / "2022.csv", seed=1, year=2022)
+    with pytest.raises(ValueError, match="2022"):
+        clean_dvf(bronze, tmp_path / "t.csv", workers=1)
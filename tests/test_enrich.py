@@ -0,0 +1,59 @@
+"""Enrichissement des transactions (pipeline/clean/enrich_transactions.py) :
+réécriture par morceaux, index spatial, saut quand rien n'a changé."""
+
+import pandas as pd
+import pytest
+
+import main
+from benchmarks.synthetic import write_bronze
+from pipeline.clean.dechet_alimentaires_to_silver import clean_dechets_silver
+from pipeline.clean.dvf_to_silver import clean_dvf
+from pipeline.clean.enrich_transactions import enrich_transactions
+from pipeline.silver_store import read_silver
+from pipeline.spatial_index import GridIndex, load_spatial_index
+
+TABLE = "transactions_residentiel"
+
+
+@pytest.fixture
+def amenities(tmp_path):
+    src = write_bronze("dechets_alimentaires", 300, tmp_path / "pavda.csv", seed=1)
+    dst = tmp_path / "pavda_silver.csv"
+    clean_dechets_silver(src, dst)
+    return {"dechets_alimentaires": dst}
+
+
+def cleaned(tmp_path, ext, name="t"):
+    src = write_bronze("dvf", 3000, tmp_path / "dvf.csv.gz", seed=3)
+    dst = tmp_path / f"{name}.{ext}"
+    clean_dvf(src, dst)
+    return dst
+
+
+@pytest.mark.parametrize("ext", ["csv", "parquet"])
+def test_chunked_rewrite_matches_one_shot(tmp_path, amenities, ext):
+    chunked, one_shot = cleaned(tmp_path, ext, "a"), cleaned(tmp_path, ext, "b")
+    enrich_transactions(chunked, amenities, chunksize=700)
+    enrich_transactions(one_shot, amenities, chunksize=10_000)
+    table = read_silver(chunked, TABLE)
+    pd.testing.assert_frame_equal(table, read_silver(one_shot, TABLE), check_categorical=False)
+    assert table["dist_pavda_m"].notna().any()
+
+    # Mêmes lignes, même ordre : l'index publié reste valable
+    index = load_spatial_index(chunked, len(table))
+    assert index is not None
+    fresh = GridIndex.build(table["longitude"], table["latitude"])
+    assert (index.rows == fresh.rows).all() and (index.offsets == fresh.offsets).all()
+
+
+def test_unchanged_inputs_skip_enrichment(tmp_path, amenities):
+    dst = cleaned(tmp_path, "parquet")
+    entry = main.enrich(dst, amenities)
+    mtime = dst.stat().st_mtime_ns
+    assert main.enrich(dst, amenities, entry=entry) is entry
+    assert dst.stat().st_mtime_ns == mtime
+
+    # Une couche modifiée (ou une table réécrite) relance l'enrichissement
+    layer = amenities["dechets_alimentaires"]
+    clean_dechets_silver(write_bronze("dechets_alimentaires", 200, tmp_path / "pavda.csv", seed=2), layer)
+    assert main.enrich(dst, amenities, entry=entry) != entry
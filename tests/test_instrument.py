@@ -0,0 +1,49 @@
+"""Instrumentation (pipeline/instrument.py) : pic de mémoire par stage et par tâche."""
+
+import numpy as np
+import pytest
+
+from pipeline.instrument import _hwm_supported, collect, peak_rss_mb, stage
+from pipeline.scheduler import Task, run_dag
+
+pytestmark = pytest.mark.skipif(not _hwm_supported(), reason="VmHWM non réinitialisable ici")
+
+BIG_MB = 300
+
+
+def allocate(mb: int) -> None:
+    a = np.ones(mb * 2**20 // 8)
+    del a
+
+
+def staged(name: str, mb: int) -> None:
+    with stage(name):
+        allocate(mb)
+
+
+def test_each_stage_reports_its_own_peak():
+    with collect() as records:
+        staged("gros", BIG_MB)
+        staged("petit", 0)
+    peaks = {r["name"]: r["peak_rss_mb"] for r in records}
+    assert peaks["gros"] - peaks["petit"] > BIG_MB * 0.8
+    assert peak_rss_mb() >= peaks["gros"] - 0.1  # arrondi du rapport ; le pic du processus survit aux remises à zéro
+
+
+def test_enclosing_stage_sees_nested_peaks():
+    with collect() as records:
+        with stage("englobant"):
+            staged("interne", BIG_MB)
+            staged("apres", 0)
+    peaks = {r["name"]: r["peak_rss_mb"] for r in records}
+    assert peaks["englobant"] >= peaks["interne"] > peaks["apres"]
+
+
+def test_reused_worker_reports_each_task_peak():
+    tasks = [Task("gros", staged, args=("gros", BIG_MB), cpu=True),
+             Task("petit", staged, args=("petit", 0), cpu=True, deps=("gros",))]
+    results = run_dag(tasks, cpu_workers=1)
+    assert all(r.status == "ok" for r in results.values())
+    gros, petit = results["gros"], results["petit"]
+    assert gros.peak_rss_mb - petit.peak_rss_mb > BIG_MB * 0.8
+    assert petit.stages[0]["peak_rss_mb"] < gros.stages[0]["peak_rss_mb"] - BIG_MB * 0.8
@@ -0,0 +1,24 @@
+"""Tâches de main.py : options passées aux nettoyeurs dans leur worker."""
+
+import main
+import pipeline.clean.dvf_to_silver as dvf_to_silver
+
+CLEANER = "pipeline.clean.dvf_to_silver:clean_dvf"
+
+
+def fake_cleaner(calls):
+    def clean_dvf(src, dst, chunksize=None, workers=None):
+        calls.append(chunksize)
+        open(dst, "w").write("x")
+    clean_dvf.__module__ = dvf_to_silver.__name__
+    return clean_dvf
+
+
+def test_chunksize_defaults_to_the_cleaner_module(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(dvf_to_silver, "clean_dvf", fake_cleaner(calls))
+    src = tmp_path / "dvf.csv"
+    src.write_text("a\n")
+    main.clean("dvf", CLEANER, src, tmp_path / "a.csv", force=True)
+    main.clean("dvf", CLEANER, src, tmp_path / "b.csv", force=True, chunksize=1000)
+    assert calls == [dvf_to_silver.DEFAULT_CHUNKSIZE, 1000]
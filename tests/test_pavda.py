@@ -0,0 +1,36 @@
+"""Coordonnées des PAVDA (pipeline/clean/dechet_alimentaires_to_silver.py)."""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.clean.dechet_alimentaires_to_silver import parse_lon_lat
+
+SHAPES = [
+    '{"coordinates": [2.35, 48.85], "type": "Point"}',
+    '{"coordinates": [2.35, 48.85, 35.0], "type": "Point"}',   # altitude ignorée
+    '{"type": "Point", "coordinates": [ 2.35 , 48.85 , -1 ]}',
+    '{"type": "MultiPoint", "points": [[2.35,48.85,0]]}',       # repli : première position
+    '{"coordinates": [2.35], "type": "Point"}',                 # incomplet
+    None,
+]
+
+
+@pytest.mark.parametrize("pyarrow", [True, False])
+def test_geojson_positions_with_or_without_altitude(pyarrow, monkeypatch):
+    if not pyarrow:  # repli pandas (str.extract) du même motif
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+    out = parse_lon_lat(pd.DataFrame({"geo_shape": SHAPES}))
+    expected = [2.35] * 4 + [np.nan] * 2
+    np.testing.assert_array_equal(out["longitude"].to_numpy(), expected)
+    np.testing.assert_array_equal(out["latitude"].to_numpy(), [48.85] * 4 + [np.nan] * 2)
+
+
+def test_point_column_takes_precedence():
+    df = pd.DataFrame({"geo_point_2d": ["48.86, 2.34", None],
+                       "geo_shape": ['{"coordinates": [2.35, 48.85, 1]}'] * 2})
+    out = parse_lon_lat(df)
+    assert out["longitude"].tolist() == [2.34, 2.35]
+    assert out["latitude"].tolist() == [48.86, 48.85]
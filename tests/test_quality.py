@@ -0,0 +1,119 @@
+"""Règles de qualité SILVER (pipeline/quality.py) : comptes, seuils, évaluation par chunks."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.instrument import stage
+from pipeline.quality import ArrondissementCode, InRange, NotNull, QualityCheck, QualityError, UniqueKey
+from pipeline.silver_store import read_silver, write_silver
+
+RULES = (
+    UniqueKey(key=("id",), max_ratio=0.5),
+    UniqueKey(key=("id", "annee"), max_ratio=0.5),
+    NotNull(column="prix", max_ratio=0.5),
+    InRange(column="prix", low=500, high=30000, max_ratio=0.5),
+    InRange(column="annee", low=2014, max_ratio=0.5),
+    ArrondissementCode(code="cp", arrondissement="arr", max_ratio=0.5),
+    ArrondissementCode(code="insee", arrondissement="arr", prefixes=("751",), max_ratio=0.5),
+)
+
+FRAME = pd.DataFrame({
+    # "b" en double de part et d'autre de plusieurs frontières de chunk, "e" trois fois
+    "id": ["a", "b", "b", "c", "d", "e", "b", "e", "f", "e"],
+    "annee": pd.array([2020, 2020, 2021, 2013, 2022, 2022, 2020, 2022, None, 2023], dtype="Int16"),
+    "prix": [1000.0, np.nan, 400.0, 2000.0, 31000.0, 5000.0, np.nan, 30000.0, 500.0, 8000.0],
+    "cp": ["75001", "75002", "75116", "75016", "92100", None, "75005", " 75007", "75020", "7500"],
+    "insee": ["75101", "75102", "75116", "75116", "75103", "75106", None, "75107", "75020", "75120"],
+    "arr": pd.array([1, 2, 16, 15, 3, 6, 5, 7, 20, None], dtype="Int16"),
+})
+
+# (vérifiées, en défaut) attendues pour chaque règle de RULES ; un doublon
+# compte chaque occurrence au-delà de la première
+EXPECTED = [
+    (10, 4),   # id : b ×3, e ×3
+    (10, 2),   # (id, annee) : (b, 2020) ×2, (e, 2022) ×2
+    (10, 2),   # prix manquant
+    (8, 2),    # 400 < 500, 31000 > 30000 ; bornes incluses, NA non vérifiés
+    (9, 1),    # 2013 ; annee manquante non vérifiée
+    (8, 2),    # 75016 ≠ 15, 92100 hors Paris ; " 75007" accepté
+    (8, 2),    # 75116 ≠ 15, 75020 (préfixe 750 non admis pour un code INSEE)
+]
+
+
+def counts(check: QualityCheck) -> list[tuple[int, int]]:
+    return [(r["checked"], r["failed"]) for r in check.results()]
+
+
+def evaluate(df: pd.DataFrame, chunksize: int | None = None) -> QualityCheck:
+    check = QualityCheck("t", rules=RULES)
+    step = chunksize or max(len(df), 1)
+    for start in range(0, len(df), step):
+        check.update(df.iloc[start:start + step])
+    return check
+
+
+def test_one_shot_counts():
+    assert counts(evaluate(FRAME)) == EXPECTED
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 4, 7, 9, 10])
+def test_chunked_matches_one_shot(chunksize):
+    assert evaluate(FRAME, chunksize).results() == evaluate(FRAME).results()
+
+
+@pytest.mark.parametrize("chunksize", [1, 3, 4])
+def test_chunked_matches_one_shot_with_categories(chunksize):
+    # Chaque chunk a ses propres catégories : clés et codes comparés par valeur
+    check = QualityCheck("t", rules=RULES)
+    for start in range(0, len(FRAME), chunksize):
+        check.update(FRAME.iloc[start:start + chunksize].astype(
+            {"id": "category", "cp": "category", "insee": "category"}))
+    assert counts(check) == EXPECTED
+
+
+def test_duplicate_across_many_chunks_of_one_row():
+    df = pd.DataFrame({"id": ["x"] * 5 + ["y"]})
+    check = QualityCheck("t", rules=(UniqueKey(key=("id",)),))
+    for i in range(len(df)):
+        check.update(df.iloc[i:i + 1])
+    assert counts(check) == [(6, 4)]
+
+
+def test_rules_on_missing_columns_are_skipped():
+    check = QualityCheck("t", rules=RULES)
+    check.update(FRAME[["id"]])
+    assert counts(check) == [(10, 4)] + [(0, 0)] * (len(RULES) - 1)
+    assert all(r["status"] == "ok" for r in check.results()[1:])
+
+
+def test_thresholds_and_severity():
+    rules = (
+        NotNull(column="prix", max_ratio=0.2),                        # 2/10 : au seuil
+        NotNull(column="prix", max_ratio=0.1, severity="warning"),    # dépassé, signalé
+        InRange(column="prix", low=500, high=30000, max_ratio=0.1),   # 2/8 : échec
+    )
+    check = QualityCheck("t", rules=rules)
+    check.update(FRAME)
+    assert [r["status"] for r in check.results()] == ["ok", "warning", "failed"]
+    with stage("test:qualite") as st:
+        with pytest.raises(QualityError, match="bornes:prix"):
+            check.finish()
+        assert [r["rule"] for r in st.quality] == ["non_null:prix", "non_null:prix", "bornes:prix"]
+
+
+def test_warning_only_does_not_raise():
+    check = QualityCheck("t", rules=(NotNull(column="prix", severity="warning"),))
+    check.update(FRAME)
+    assert check.finish()[0]["status"] == "warning"
+
+
+def test_failed_check_keeps_previous_table(tmp_path):
+    dst = tmp_path / "programmes.csv"
+    good = pd.DataFrame({"id_programme": ["p1", "p2"], "code_postal": ["75001", "75002"],
+                         "arrondissement": [1, 2], "annee": [2020, 2021], "nb_total": [10, 20]})
+    write_silver(good, dst, "logements_sociaux_programmes")
+    bad = good.assign(nb_total=[10, -5])
+    with pytest.raises(QualityError, match="bornes:nb_total"):
+        write_silver(bad, dst, "logements_sociaux_programmes")
+    assert read_silver(dst, "logements_sociaux_programmes")["nb_total"].tolist() == [10, 20]
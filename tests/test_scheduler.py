@@ -0,0 +1,71 @@
+"""Ordonnanceur (pipeline/scheduler.py) : dépendances, échecs, chemin critique."""
+
+import time
+
+import pytest
+
+from pipeline.scheduler import Task, TaskResult, critical_path, print_summary, run_dag
+
+
+def ok(name: str, start: float, end: float) -> TaskResult:
+    return TaskResult(name, "ok", start=start, end=end)
+
+
+def test_critical_path_ignores_queue_wait():
+    # Un seul cœur : « long » passe d'abord, « court » puis « suite » attendent
+    # dans la file et finissent en dernier sans être sur le chemin critique.
+    tasks = [Task("long", print), Task("court", print), Task("suite", print, deps=("court",))]
+    results = {"long": ok("long", 0, 5), "court": ok("court", 5, 6), "suite": ok("suite", 6, 7)}
+    assert critical_path(tasks, results) == ["long"]
+
+
+def test_critical_path_sums_durations_along_edges():
+    #   a (1s) ─┬─ c (3s) ─┐
+    #   b (2s) ─┘          ├─ e (1s)
+    #   d (4.5s) ──────────┘
+    tasks = [Task("a", print), Task("b", print), Task("c", print, deps=("a", "b")),
+             Task("d", print), Task("e", print, deps=("c", "d"))]
+    results = {"a": ok("a", 0, 1), "b": ok("b", 0, 2), "c": ok("c", 2, 5),
+               "d": ok("d", 0, 4.5), "e": ok("e", 5, 6)}
+    assert critical_path(tasks, results) == ["b", "c", "e"]
+
+
+def test_critical_path_skips_tasks_that_did_not_run():
+    tasks = [Task("a", print), Task("b", print, deps=("a",)), Task("c", print, deps=("b",))]
+    results = {"a": ok("a", 0, 1), "b": TaskResult("b", "failed", start=1, end=3),
+               "c": TaskResult("c", "skipped")}
+    assert critical_path(tasks, results) == ["a", "b"]
+    assert critical_path(tasks, {"c": TaskResult("c", "skipped")}) == []
+
+
+def boom():
+    raise RuntimeError("boom")
+
+
+def test_run_dag_propagates_failures_and_reports(capsys):
+    tasks = [
+        Task("lent", time.sleep, args=(0.2,)),
+        Task("rapide", time.sleep, args=(0.01,)),
+        Task("apres", time.sleep, args=(0.01,), deps=("rapide",)),
+        Task("echec", boom),
+        Task("aval", time.sleep, args=(0,), deps=("echec",)),
+        Task("aval2", time.sleep, args=(0,), deps=("aval",)),
+    ]
+    results = run_dag(tasks, io_workers=1)
+    assert {n: r.status for n, r in results.items()} == {
+        "lent": "ok", "rapide": "ok", "apres": "ok", "echec": "failed",
+        "aval": "skipped", "aval2": "skipped"}
+    assert "RuntimeError: boom" in results["echec"].error
+    assert critical_path(tasks, results) == ["lent"]
+    print_summary(tasks, results)
+    assert "Chemin critique" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("tasks, message", [
+    ([Task("a", print, deps=("x",))], "inconnues"),
+    ([Task("a", print, deps=("b",)), Task("b", print, deps=("a",))], "Cycle"),
+    ([Task("a", print), Task("a", print)], "dupliqués"),
+])
+def test_run_dag_rejects_invalid_graphs(tasks, message):
+    with pytest.raises(ValueError, match=message):
+        run_dag(tasks)
@@ -0,0 +1,50 @@
+"""Sketchs de quantiles (pipeline/gold/sketch.py) face aux quantiles exacts de pandas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_api_latency import synthetic_transactions
+from pipeline.clean.dvf_to_silver import prix_m2_sketch
+from pipeline.gold.aggregate_cube import QUANTILES, add_prix_m2_typologie, build_dvf_cube
+from pipeline.gold.sketch import ALPHA, LogSketch, grouped_quantiles, merge_long, sketch_long
+
+QS = [0.1, 0.25, 0.5, 0.75, 0.9]
+# Marge pour les arrondis flottants autour de alpha
+TOL = ALPHA * 1.0001
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 11, 20, 200])
+def test_sketch_quantile_within_alpha_of_pandas(n):
+    values = np.random.default_rng(n).uniform(500, 30000, n)
+    sketch = LogSketch().add(values)
+    exact = pd.Series(values).quantile(QS).to_numpy()
+    approx = np.array([sketch.quantile(q) for q in QS])
+    assert np.abs(approx / exact - 1).max() <= TOL
+
+
+def test_two_values_median_is_interpolated():
+    sketch = LogSketch().add([1064.0, 15236.0])
+    assert sketch.quantile(0.5) == pytest.approx(8150.0, rel=ALPHA)
+
+
+def test_grouped_quantiles_match_pandas_on_small_groups():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"g": rng.integers(0, 40, 300), "v": rng.lognormal(8.5, 0.6, 300)})
+    # sketchs construits en deux moitiés puis fusionnés
+    long = merge_long(sketch_long(df[:150], ["g"], "v"), sketch_long(df[150:], ["g"], "v"), keys=["g"])
+    approx = grouped_quantiles(long, ["g"], {q: str(q) for q in QS})
+    exact = df.groupby("g")["v"].quantile(QS).unstack().rename(columns=str)
+    assert np.abs(approx.sort_index().to_numpy() / exact.to_numpy() - 1).max() <= TOL
+
+
+def test_cube_from_sketch_matches_exact_cube(capsys):
+    tx = add_prix_m2_typologie(synthetic_transactions(400, seed=3))
+    exact = build_dvf_cube(tx)
+    approx = build_dvf_cube(tx, prix_m2_sketch(tx))
+    assert "non cohérents" not in capsys.readouterr().out  # chemin des sketchs bien utilisé
+    assert (exact["nb_ventes"] < 5).any()
+    assert exact["nb_ventes"].tolist() == approx["nb_ventes"].tolist()
+    cols = ["prix_m2_median", *QUANTILES.values()]
+    assert np.abs(approx[cols].to_numpy() / exact[cols].to_numpy() - 1).max() <= TOL
+    np.testing.assert_allclose(approx["prix_m2_moyen"], exact["prix_m2_moyen"], rtol=1e-9)